@@ -0,0 +1,89 @@
+# Бенчмарк загрузки настроек: компиляция config.toml против кэша скомпилированного вида,
+# и проверка, что кэш сбрасывается при правке файла, а ошибки в файле находятся.
+#
+#   python benchmarks/bench_config.py
+
+import os
+import re
+import sys
+import tempfile
+import time
+import tomllib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIG_PATH, ConfigError, load_config, parse_config
+
+REPEATS = 5
+
+BAD_CONFIGS = {
+    "неизвестное поле": '[[feeds]]\nurl = "https://a.example.com/"\nweigth = 2\n',
+    "не http-адрес": '[[feeds]]\nurl = "ftp://a.example.com/"\n',
+    "неизвестная частота": '[[feeds]]\nurl = "https://a.example.com/"\ncadence = "daily"\n',
+    "отрицательный вес": '[[feeds]]\nurl = "https://a.example.com/"\nweight = -1\n',
+    "канал без слов": '[[feeds]]\nurl = "https://a.example.com/"\n[[channels]]\nname = "c"\nchat = "@c"\nkeywords = []\n',
+    "дробный max_posts": '[[feeds]]\nurl = "https://a.example.com/"\n'
+                         '[[channels]]\nname = "c"\nchat = "@c"\nkeywords = ["x"]\nmax_posts = 2.5\n',
+    "нет каналов": '[[feeds]]\nurl = "https://a.example.com/"\n',
+    "digest не флаг": '[[feeds]]\nurl = "https://a.example.com/"\n'
+                      '[[channels]]\nname = "c"\nchat = "@c"\nkeywords = ["x"]\ndigest = "yes"\n',
+}
+
+
+def best_time(function):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main_bench():
+    for name, text in BAD_CONFIGS.items():
+        try:
+            parse_config(tomllib.loads(text))
+        except ConfigError as e:
+            print(f"  {name:<20} {e}")
+        else:
+            raise AssertionError(f"{name}: ошибка не найдена")
+
+    config = parse_config(tomllib.loads('[[feeds]]\nurl = "https://a.example.com/"\n[[feeds]]\n'
+                                        'url = "https://a.example.com/"\ncadence = "weekly"\n'
+                                        '[[channels]]\nname = "c"\nchat = "@c"\nkeywords = ["Bot", "bot ", "n8n"]\n'))
+    assert list(config.feeds) == ["https://a.example.com/"] and config.feed("https://a.example.com/").cadence == "news"
+    assert config.channels["c"].keywords == ("bot", "n8n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "config.toml")
+        cache_path = os.path.join(tmp, "config.pickle")
+        with open(CONFIG_PATH, "rb") as f:
+            content = f.read()
+        with open(path, "wb") as f:
+            f.write(content)
+
+        # Модуль re помнит скомпилированные выражения: сбрасываем, как при новом запуске
+        compiled = best_time(lambda: (re.purge(), load_config(path, cache_path=None)))
+        load_config(path, cache_path)
+        cached = best_time(lambda: (re.purge(), load_config(path, cache_path)))
+        config = load_config(path, cache_path)
+        fresh = load_config(path, cache_path=None)
+        assert config.digest == fresh.digest and config.sites == fresh.sites
+        assert config.matcher.channels_by_keyword == fresh.matcher.channels_by_keyword
+        text = "новый агент n8n для telegram-ботов и генерация изображений в midjourney".lower()
+        assert config.matcher.match_lower(text) == fresh.matcher.match_lower(text)
+
+        # Правка файла сбрасывает кэш
+        with open(path, "ab") as f:
+            f.write(b'\n[[feeds]]\nurl = "https://new.example.com/feed"\n')
+        assert "https://new.example.com/feed" in load_config(path, cache_path).feeds
+
+    print(f"лент: {len(fresh.feeds)}, каналов: {len(fresh.channels)}, "
+          f"ключевых слов: {sum(len(c.keywords) for c in fresh.channels.values())}")
+    print(f"компиляция config.toml: {compiled * 1000:6.1f} мс")
+    print(f"из кэша:                {cached * 1000:6.1f} мс ({compiled / cached:.1f}x)")
+    assert cached * 2 < compiled
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,113 @@
+# Бенчмарк и проверка корректности разбора дат из RSS: прежний parse_date_string()
+# с перебором strptime против dates.parse_date() с памятью форматов и кэшем.
+#
+#   python benchmarks/bench_dates.py
+
+import calendar
+import email.utils
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dates
+from dates import DATE_FORMATS, entry_timestamp, parse_date
+
+# Строки в том виде, в каком их отдают реальные ленты, и ожидаемое время в UTC
+CASES = [
+    ("Sun, 18 Oct 2026 13:04:26 GMT", (2026, 10, 18, 13, 4, 26)),
+    ("Sun, 18 Oct 2026 13:04:26 +0000", (2026, 10, 18, 13, 4, 26)),
+    ("Sun, 18 Oct 2026 16:04:26 +0300", (2026, 10, 18, 13, 4, 26)),       # habr, vc.ru
+    ("Sun, 18 Oct 2026 06:04:26 -0700", (2026, 10, 18, 13, 4, 26)),       # venturebeat
+    ("Sun, 18 Oct 2026 09:04:26 EDT", (2026, 10, 18, 13, 4, 26)),
+    ("Sun, 18 Oct 2026 08:04:26 EST", (2026, 10, 18, 13, 4, 26)),
+    ("Sun, 18 Oct 2026 13:04:26 UT", (2026, 10, 18, 13, 4, 26)),
+    ("18 Oct 2026 13:04:26 +0000", (2026, 10, 18, 13, 4, 26)),
+    ("Mon, 19 Oct 2026 01:34:26 +1230", (2026, 10, 18, 13, 4, 26)),
+    ("2026-10-18T13:04:26Z", (2026, 10, 18, 13, 4, 26)),                   # Atom
+    ("2026-10-18T16:04:26+03:00", (2026, 10, 18, 13, 4, 26)),
+    ("2026-10-18T13:04:26.123Z", (2026, 10, 18, 13, 4, 26.123)),
+    ("2026-10-18T08:34:26.5-04:30", (2026, 10, 18, 13, 4, 26.5)),
+    ("2026-10-18T13:04:26", (2026, 10, 18, 13, 4, 26)),                    # без зоны -> UTC
+    ("2026-10-18 13:04:26", (2026, 10, 18, 13, 4, 26)),
+    ("18 Oct 2026 13:04:26", (2026, 10, 18, 13, 4, 26)),
+    ("18 Oct 2026", (2026, 10, 18, 0, 0, 0)),
+    ("2026-10-18", (2026, 10, 18, 0, 0, 0)),
+    ("Thu, 31 Dec 2026 23:30:00 -0100", (2027, 1, 1, 0, 30, 0)),           # переход через год
+]
+INVALID = ["", "вчера", "not a date", "2026-13-45"]
+
+
+def expected_epoch(parts):
+    *whole, seconds = parts
+    return calendar.timegm((*whole, int(seconds), 0, 0, 0)) + (seconds - int(seconds))
+
+
+def old_parse_date_string(date_str):
+    """Прежняя реализация из main.py."""
+    try:
+        return email.utils.parsedate_to_datetime(date_str)
+    except Exception:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except Exception:
+            continue
+    return None
+
+
+def check_correctness():
+    for text, parts in CASES:
+        value = parse_date(text)
+        assert value is not None and abs(value - expected_epoch(parts)) < 1e-3, (text, value)
+    for text in INVALID:
+        assert parse_date(text) is None, text
+    # struct_time от feedparser — UTC, а не локальное время
+    os.environ["TZ"] = "Europe/Moscow"
+    time.tzset()
+    parsed = time.strptime("2026-10-18 13:04:26", "%Y-%m-%d %H:%M:%S")
+    assert entry_timestamp({"published_parsed": parsed}) == expected_epoch((2026, 10, 18, 13, 4, 26))
+    assert entry_timestamp({"updated": "2026-10-18T16:04:26+03:00"}) == expected_epoch((2026, 10, 18, 13, 4, 26))
+    assert entry_timestamp({}) is None
+    print(f"корректность: {len(CASES)} строк с разными зонами и {len(INVALID)} неразборчивых — OK")
+
+
+def make_corpus(count, seed=7):
+    """Ленты отдают даты одного формата; строки часто повторяются между запусками и каналами."""
+    rnd = random.Random(seed)
+    sources = [(f"feed{i}", CASES[i % len(CASES)][0]) for i in range(15)]
+    corpus = []
+    for _ in range(count):
+        source, template = rnd.choice(sources)
+        day = rnd.randint(1, 28)
+        corpus.append((source, template.replace("18", f"{day:02d}", 1)))
+    return corpus
+
+
+def main():
+    check_correctness()
+    corpus = make_corpus(20_000)
+    dates._parse.cache_clear()
+
+    started = time.perf_counter()
+    for _, text in corpus:
+        old_parse_date_string(text)
+    old_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for source, text in corpus:
+        parse_date(text, source)
+    new_time = time.perf_counter() - started
+
+    print(f"строк: {len(corpus)}, уникальных: {len(set(t for _, t in corpus))}")
+    print(f"parse_date_string: {old_time * 1000:8.1f} мс")
+    print(f"dates.parse_date:  {new_time * 1000:8.1f} мс")
+    print(f"ускорение:         {old_time / new_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Бенчмарк хранилища опубликованных статей: загрузка журнала при старте,
+# проверки членства и вытеснение устаревших записей по TTL. Загрузка журнала
+# из RECORDS записей (по две строки на запись: ссылка и id) должна укладываться
+# в LOAD_BUDGET; при другом числе записей бюджет не проверяется.
+#
+#   python benchmarks/bench_dedup_store.py [число записей]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup_store import PublishedStore, normalize_url
+from records import EntryRecord
+
+DAY = 86400
+RECORDS = 5_000
+LOAD_BUDGET = 0.010      # Секунд на загрузку журнала из RECORDS записей, лучшая из LOAD_REPEATS
+LOAD_REPEATS = 5
+
+
+def make_record(i):
+    link = f"https://www.site{i % 15}.example.com/news/{i}/?utm_source=rss"
+    return EntryRecord(id=f"https://site{i % 15}.example.com/?p={i}", title=f"Статья {i}",
+                       link=link, source="", published=None, text="")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "published.log")
+
+        # Пишем журнал без вытеснения, чтобы при загрузке в нём был мусор
+        store = PublishedStore(path, ttl=365 * DAY, now=now)
+        records = [make_record(i) for i in range(count)]
+        for i, record in enumerate(records):
+            # Половина записей старше TTL и должна вытесниться
+            stamp = now - (40 * DAY if i % 2 else DAY)
+            store.add("channel1" if i % 3 else "channel2", record, stamp=stamp)
+        store.save()
+        size = os.path.getsize(path)
+
+        load_time = float("inf")
+        for _ in range(LOAD_REPEATS):
+            started = time.perf_counter()
+            store = PublishedStore(path, now=now)
+            load_time = min(load_time, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        found = sum(store.contains("channel1" if i % 3 else "channel2", r) for i, r in enumerate(records))
+        lookup_time = time.perf_counter() - started
+
+        assert found == (count + 1) // 2, found
+        assert store.contains("channel1", make_record(2)), "свежая запись должна найтись"
+        assert not store.contains("channel2", make_record(2)), "каналы не должны пересекаться"
+        assert normalize_url("http://www.a.com/x/?utm_source=rss#top") == normalize_url("https://a.com/x")
+
+        store.add("channel1", make_record(count + 1))
+        store.save()
+        compacted = os.path.getsize(path)
+        assert PublishedStore(path, now=now).contains("channel1", make_record(count + 1))
+
+    print(f"записей: {count}, журнал: {size / 1024:.0f} КБ -> после вытеснения {compacted / 1024:.0f} КБ")
+    print(f"загрузка при старте:  {load_time * 1000:7.2f} мс (бюджет {LOAD_BUDGET * 1000:.0f} мс на {RECORDS} записей)")
+    print(f"{count} проверок:      {lookup_time * 1000:7.2f} мс "
+          f"({lookup_time / count * 1e6:.2f} мкс на проверку)")
+    if count == RECORDS:
+        assert load_time < LOAD_BUDGET, f"загрузка {count} записей заняла {load_time * 1000:.1f} мс"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Бенчмарк параллельной загрузки: 15 лент с искусственной задержкой на локальном сервере.
+# Последовательный проход занимает сумму задержек, fetch_feeds() — примерно самую долгую.
+# Лента, которую сервер отдаёт по байту, не должна растягивать загрузку дольше таймаута
+# и задерживать выход из процесса.
+#
+#   python benchmarks/bench_fetch.py
+
+import random
+import subprocess
+import sys
+import time
+
+import feedparser
+
+from feedserver import ROOT, FeedServer, make_rss
+from fetcher import close_sessions, fetch_feed, fetch_feeds
+
+FEEDS = 15
+TRICKLE = 0.05           # Пауза между байтами тянущейся ленты, с: целиком она качалась бы минуты
+TRICKLE_TIMEOUT = 2
+SLACK = 1.0
+
+
+def check_trickle(server, fast_url):
+    url = server.url("/trickle.xml")
+    started = time.perf_counter()
+    result = fetch_feed(url, timeout=TRICKLE_TIMEOUT)
+    elapsed = time.perf_counter() - started
+    assert result.error, "тянущаяся лента не должна скачаться"
+    assert elapsed < TRICKLE_TIMEOUT + SLACK, f"загрузка с таймаутом {TRICKLE_TIMEOUT} с шла {elapsed:.1f} с"
+
+    # Процесс берёт первую ленту и завершается, не дожидаясь потока с тянущейся
+    code = f"from fetcher import iter_feeds; next(iter_feeds([{fast_url!r}, {url!r}]))"
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, timeout=60)
+    exit_time = time.perf_counter() - started
+    assert exit_time < TRICKLE_TIMEOUT + SLACK, f"процесс ждал брошенную загрузку {exit_time:.1f} с"
+    return elapsed, exit_time
+
+
+def main():
+    rnd = random.Random(42)
+    routes = {f"/feed{i}.xml": (make_rss(f"site{i}"), rnd.uniform(0.1, 0.6)) for i in range(FEEDS)}
+    latencies = [delay for _, delay in routes.values()]
+
+    with FeedServer({**routes, "/trickle.xml": (make_rss("trickle"), 0, TRICKLE)}) as server:
+        urls = [server.url(path) for path in routes]
+
+        started = time.perf_counter()
+        sequential = [feedparser.parse(url).entries for url in urls]
+        sequential_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = fetch_feeds(urls)
+        parallel = [feedparser.parse(r.content).entries for r in results]
+        parallel_time = time.perf_counter() - started
+
+        # Второй проход идёт по уже открытым keep-alive соединениям
+        started = time.perf_counter()
+        fetch_feeds(urls)
+        warm_time = time.perf_counter() - started
+        trickle_time, exit_time = check_trickle(server, urls[0])
+        close_sessions()
+
+    assert [r.url for r in results] == urls, "порядок результатов должен совпадать с порядком лент"
+    assert all(not r.error for r in results), [r.error for r in results if r.error]
+    assert [len(e) for e in parallel] == [len(e) for e in sequential]
+
+    print(f"лент: {FEEDS}")
+    print(f"сумма задержек:       {sum(latencies):6.2f} с")
+    print(f"самая долгая лента:   {max(latencies):6.2f} с")
+    print(f"последовательно:      {sequential_time:6.2f} с")
+    print(f"fetch_feeds:          {parallel_time:6.2f} с")
+    print(f"fetch_feeds (тёплый): {warm_time:6.2f} с")
+    print(f"ускорение:            {sequential_time / parallel_time:6.1f}x")
+    print(f"лента по байту, таймаут {TRICKLE_TIMEOUT} с: {trickle_time:6.2f} с, выход из процесса {exit_time:6.2f} с")
+
+
+if __name__ == "__main__":
+    main()
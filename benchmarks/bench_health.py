@@ -0,0 +1,96 @@
+# Бенчмарк отключения больных лент: сколько добавляют к запуску зависшая лента, лента
+# с ошибкой 404 и лента с пустым ответом — до отключения, пока они отключены, при пробном
+# опросе и после того, как лента ожила. Запуски идут подряд с общим .cache/health.json.
+#
+#   python benchmarks/bench_health.py
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feedserver import FeedServer, make_rss, run_bot_cycle
+
+FEEDS = 8
+HANG_DELAY = 60.0
+SLACK = 2.0          # Сверх таймаута на разбор, публикацию и запуск потоков
+
+
+def run_once(sites, tmp, health):
+    started = time.perf_counter()
+    _, summary = run_bot_cycle(sites, tmp, health=health)
+    return time.perf_counter() - started, summary
+
+
+def later(health, seconds):
+    """Сдвигает сроки отключения, будто прошло seconds секунд."""
+    for state in health.feeds.values():
+        if state["open_until"] is not None:
+            state["open_until"] -= seconds
+
+
+def main_bench():
+    routes = {f"/f{i}": (make_rss(f"src{i}", 30), 0.05) for i in range(FEEDS)}
+    routes["/hang"] = (make_rss("hang", 30), HANG_DELAY)
+    routes["/empty"] = (b"", 0)
+    with tempfile.TemporaryDirectory() as tmp, FeedServer(routes) as feeds:
+        os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:benchmark")
+        import main
+        from fetcher import FEED_TIMEOUT
+        from health import BASE_BACKOFF, FAILURE_THRESHOLD, PROBE_TIMEOUT, FeedHealth
+        from metrics import setup_logging
+        setup_logging("ERROR")
+
+        sick = [feeds.url("/hang"), feeds.url("/missing"), feeds.url("/empty")]
+        sites = [feeds.url(f"/f{i}") for i in range(FEEDS)] + sick
+        path = os.path.join(tmp, "health.json")
+        rows = []
+
+        def cycle(label):
+            # Каждый запуск — новый процесс: здоровье лент читается из файла
+            elapsed, summary = run_once(sites, tmp, FeedHealth(path))
+            rows.append((label, elapsed, summary))
+            return elapsed, summary
+
+        for i in range(FAILURE_THRESHOLD):
+            elapsed, _ = cycle(f"ошибка {i + 1}")
+            assert elapsed < FEED_TIMEOUT + SLACK, "зависшая лента задержала запуск дольше своего таймаута"
+        elapsed, summary = cycle("отключены")
+        assert summary["counters"]["feeds_skipped"] == len(sick)
+        assert elapsed < SLACK, "отключённые ленты всё ещё задерживают запуск"
+
+        health = FeedHealth(path)
+        later(health, BASE_BACKOFF)
+        health.save()
+        elapsed, summary = cycle("проба")
+        assert summary["counters"].get("feeds_skipped", 0) == 0
+        assert elapsed < PROBE_TIMEOUT + SLACK, "пробный опрос ждал дольше PROBE_TIMEOUT"
+        assert all(summary["health"][url]["state"] == "open" for url in sick)
+
+        # Лента ожила: следующая проба возвращает её в строй
+        routes["/hang"] = (routes["/hang"][0], 0.05)
+        feeds.routes.update(routes)
+        health = FeedHealth(path)
+        later(health, 2 * BASE_BACKOFF)
+        health.save()
+        _, summary = cycle("ожила")
+        assert summary["health"][feeds.url("/hang")]["state"] == "ok"
+        assert summary["health"][feeds.url("/missing")]["state"] == "open"
+
+    print(f"лент: {FEEDS} здоровых + {len(sick)} больных (зависает на {HANG_DELAY:.0f} с, 404, пустой ответ)")
+    print(f"таймаут ленты {FEED_TIMEOUT} с, пробы {PROBE_TIMEOUT} с, отключение после {FAILURE_THRESHOLD} ошибок")
+    print(f"{'запуск':<12} {'время, с':>9} {'пропущено':>10} {'опубликовано':>13}  состояние зависшей ленты")
+    for label, elapsed, summary in rows:
+        counters = summary["counters"]
+        hang = summary["health"][feeds.url("/hang")]
+        print(f"{label:<12} {elapsed:>9.2f} {counters.get('feeds_skipped', 0):>10} "
+              f"{counters.get('published', 0):>13}  {hang['state']}, ошибок подряд {hang['failures']}")
+    healthy = summary["health"][feeds.url("/f0")]
+    print(f"здоровая лента: p50 {healthy['p50_ms']} мс, p90 {healthy['p90_ms']} мс, "
+          f"статей за опрос {healthy['entries_avg']}")
+
+
+if __name__ == "__main__":
+    main_bench()
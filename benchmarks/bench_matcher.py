@@ -0,0 +1,83 @@
+# Бенчмарк поиска ключевых слов: 10k+ синтетических статей, старый any()-поиск
+# против KeywordMatcher. Решения о релевантности обязаны совпасть.
+#
+#   python benchmarks/bench_matcher.py [число статей]
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import load_config
+from matcher import KeywordMatcher
+
+CHANNELS = {name: list(channel.keywords) for name, channel in load_config(cache_path=None).channels.items()}
+
+# Нейтральный текст: ни одно из этих слов само по себе не является ключевым
+FILLER = (
+    "the company said on monday that its new quarterly report shows strong growth "
+    "in revenue and users while analysts expect further results next year market "
+    "компания сообщила что рост выручки продолжится в следующем году по мнению аналитиков"
+).split()
+
+
+def reference_is_relevant(text, channel_keywords):
+    """Прежняя реализация is_relevant_for_channel()."""
+    text = text.lower()
+    return any(keyword.lower() in text for keyword in channel_keywords)
+
+
+def make_texts(count, seed=1):
+    rnd = random.Random(seed)
+    keywords = [keyword for keywords in CHANNELS.values() for keyword in keywords]
+    texts = []
+    for _ in range(count):
+        words = [rnd.choice(FILLER) for _ in range(rnd.randint(60, 400))]
+        # Примерно в трети статей есть настоящие ключевые слова, иногда в другом регистре
+        for _ in range(rnd.choice((0, 0, 1, 3))):
+            keyword = rnd.choice(keywords)
+            words.insert(rnd.randrange(len(words) + 1), keyword.upper() if rnd.random() < 0.2 else keyword)
+        texts.append(" ".join(words))
+    return texts
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    texts = make_texts(count)
+
+    started = time.perf_counter()
+    matcher = KeywordMatcher(CHANNELS)
+    compile_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    expected = [
+        {channel for channel, keywords in CHANNELS.items() if reference_is_relevant(text, keywords)}
+        for text in texts
+    ]
+    reference_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = [set(matcher.match(text)) for text in texts]
+    matcher_time = time.perf_counter() - started
+
+    mismatches = sum(1 for a, b in zip(actual, expected) if a != b)
+    assert mismatches == 0, f"решения расходятся в {mismatches} статьях"
+
+    # Найденные слова тоже должны совпасть с полным перебором
+    for text in texts[:500]:
+        lowered = text.lower()
+        for channel, keywords in matcher.match(text).items():
+            assert keywords == {k.lower() for k in CHANNELS[channel] if k.lower() in lowered}
+
+    relevant = sum(1 for hits in expected if hits)
+    print(f"статей: {count}, релевантных хотя бы одному каналу: {relevant}")
+    print(f"компиляция матчера: {compile_time * 1000:8.1f} мс")
+    print(f"any() по каналам:   {reference_time * 1000:8.1f} мс")
+    print(f"KeywordMatcher:     {matcher_time * 1000:8.1f} мс")
+    print(f"ускорение:          {reference_time / matcher_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
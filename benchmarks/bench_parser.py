@@ -0,0 +1,205 @@
+# Бенчмарк и проверка совпадения разбора лент: feedparser против быстрого разборщика на expat.
+# Берёт сохранённые копии лент из SITES (benchmarks/fixtures/feeds/), а для лент без копии —
+# синтетическую ленту в том же формате. Сохранить свежие копии (нужна сеть):
+#
+#   python benchmarks/bench_parser.py --record
+#   python benchmarks/bench_parser.py
+
+import os
+import random
+import re
+import sys
+import time
+from email.utils import formatdate
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:benchmark")
+
+from feedserver import WORDS
+from dates import entry_timestamp
+from feed_parser import parse_fast, parse_feed, parse_feedparser
+import main
+
+FEEDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "feeds")
+REPEATS = 3
+
+_NS = ('xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+       'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:media="http://search.yahoo.com/mrss/" '
+       'xmlns:atom="http://www.w3.org/2005/Atom"')
+
+
+def fixture_path(url):
+    return os.path.join(FEEDS_DIR, re.sub(r"[^A-Za-z0-9]+", "_", url.split("://", 1)[1]).strip("_") + ".xml")
+
+
+def record():
+    from fetcher import fetch_feeds
+    os.makedirs(FEEDS_DIR, exist_ok=True)
+    for result in fetch_feeds(main.SITES + sorted(main.WEEKLY_SITES - set(main.SITES))):
+        if result.error or not result.content:
+            print(f"  {result.url}: {result.error or 'пусто'}")
+            continue
+        with open(fixture_path(result.url), "wb") as f:
+            f.write(result.content)
+        print(f"  {result.url}: {len(result.content) // 1024} КБ")
+
+
+def words(rnd, count, vocabulary=WORDS):
+    return " ".join(rnd.choice(vocabulary) for _ in range(count))
+
+
+def synthetic_rss(url, entries, seed, html_body=True, dc_date=False, cdata=True, vocabulary=WORDS):
+    """RSS 2.0 в духе WordPress/Хабра: CDATA, content:encoded, dc:creator, HTML-сущности."""
+    rnd = random.Random(seed)
+    now = time.time()
+    items = []
+    for i in range(entries):
+        title = words(rnd, rnd.randint(4, 10), vocabulary).capitalize() + rnd.choice(["", " &amp; co", " — 2026"])
+        body = "".join(f"<p>{words(rnd, rnd.randint(30, 60), vocabulary)}&nbsp;&mdash;</p>" for _ in range(rnd.randint(3, 12)))
+        link = f"{url.rstrip('/')}/post/{seed}-{i}/"
+        stamp = now - i * rnd.randint(300, 3600)
+        date = (f"<dc:date>{time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(stamp))}</dc:date>" if dc_date
+                else f"<pubDate>{formatdate(stamp, usegmt=rnd.random() < 0.5)}</pubDate>")
+        description = f"<![CDATA[{body[:300]}]]>" if cdata else escape(body[:300])
+        items.append(
+            f"<item><title>{title}</title><link>{link}</link>"
+            f'<guid isPermaLink="{rnd.choice(["true", "false"])}">{link if i % 3 else "id-%d-%d" % (seed, i)}</guid>'
+            f"{date}<dc:creator><![CDATA[Автор {i % 5}]]></dc:creator><category>{rnd.choice(WORDS)}</category>"
+            f"<description>{description}</description>"
+            + (f"<content:encoded><![CDATA[{body}]]></content:encoded>" if html_body else "")
+            + f'<media:thumbnail url="{link}cover.jpg" width="640"/></item>'
+        )
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0" {_NS}><channel>'
+            f"<title>{url}</title><link>{url}</link><description>stand-in</description>"
+            f'<atom:link href="{url}" rel="self"/>' + "".join(items) + "</channel></rss>").encode("utf-8")
+
+
+def synthetic_atom(url, entries, seed):
+    rnd = random.Random(seed)
+    now = time.time()
+    items = []
+    for i in range(entries):
+        stamp = now - i * rnd.randint(600, 7200)
+        items.append(
+            f"<entry><title type=\"html\">{escape(words(rnd, 7))}</title>"
+            f'<link rel="alternate" href="/articles/{i}"/><link rel="replies" href="/articles/{i}#comments"/>'
+            f"<id>tag:example.com,2026:{seed}-{i}</id>"
+            f"<published>{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(stamp))}</published>"
+            f"<updated>{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(stamp + 60))}</updated>"
+            f"<summary>{escape(words(rnd, 40))}</summary>"
+            f'<content type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>{words(rnd, 80)}</p></div></content>'
+            "</entry>"
+        )
+    return ('<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+            f'<title>{url}</title><link href="{url}"/><id>{url}</id>'
+            + "".join(items) + "</feed>").encode("utf-8")
+
+
+def synthetic_rdf(url, entries, seed):
+    rnd = random.Random(seed)
+    now = time.time()
+    items = "".join(
+        f'<item rdf:about="{url}item/{i}"><title>{escape(words(rnd, 6))}</title><link>{url}item/{i}</link>'
+        f"<dc:date>{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now - i * 1800))}</dc:date>"
+        f"<description>{escape(words(rnd, 50))}</description></item>"
+        for i in range(entries)
+    )
+    return ('<?xml version="1.0"?><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+            'xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f'<channel rdf:about="{url}"><title>{url}</title><link>{url}</link></channel>'
+            + items + "</rdf:RDF>").encode("utf-8")
+
+
+def stand_in(url, seed, vocabulary=WORDS):
+    """Синтетическая лента в формате, похожем на настоящую ленту url."""
+    if "vc.ru" in url or "habr.com" in url:
+        return synthetic_rss(url, 300 if "vc.ru" in url else 40, seed, vocabulary=vocabulary)
+    if "bbci" in url or "arstechnica" in url or "beehiiv" in url:
+        return synthetic_rss(url, 30, seed, html_body=False, cdata=False, vocabulary=vocabulary)
+    if "rb.ru" in url or "skillbox" in url:
+        return synthetic_rss(url, 20, seed, dc_date=True, vocabulary=vocabulary)
+    return synthetic_rss(url, 20, seed, vocabulary=vocabulary)
+
+
+# Нарочно неудобные ленты: проверяют совпадение полей и переход на feedparser
+EDGE_CASES = {
+    "atom": synthetic_atom("https://atom.example.com/", 25, 1),
+    "rdf": synthetic_rdf("https://rdf.example.com/", 15, 2),
+    "битый XML": synthetic_rss("https://broken.example.com/", 10, 3).replace(b"</item>", b"", 1),
+    "windows-1251": synthetic_rss("https://cp1251.example.com/", 10, 4).decode("utf-8")
+        .replace('encoding="UTF-8"', 'encoding="windows-1251"').encode("cp1251", "replace"),
+    "HTML вместо ленты": b"<html><body><p>502 Bad Gateway</p></body></html>",
+    # Ссылки разрешаются от xml:base ленты и статьи, а не от адреса, с которого лента скачана
+    "xml:base": b'''<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xml:base="http://other.com/blog/"><title>base</title>
+<entry><title>Relative</title><link href="post1"/><id>post1</id><updated>2026-05-01T10:00:00Z</updated></entry>
+<entry xml:base="2026/"><title>Nested base</title><link href="post2"/><id>post2</id>
+<updated>2026-05-01T09:00:00Z</updated></entry>
+<entry><title>Absolute</title><link href="https://third.example.com/post3"/><id>post3</id>
+<updated>2026-05-01T08:00:00Z</updated></entry>
+</feed>''',
+}
+
+
+def fields(entry, source):
+    return (main.get_entry_id(entry), entry.get("title", ""), entry.get("link", ""),
+            entry_timestamp(entry, source))
+
+
+def check_parity(name, url, content):
+    expected = parse_feedparser(content, url)
+    actual = parse_feed(content, url)
+    assert len(actual) == len(expected), f"{name}: {len(actual)} статей вместо {len(expected)}"
+    for got, want in zip(actual, expected):
+        assert fields(got, url) == fields(want, url), f"{name}: {fields(got, url)} != {fields(want, url)}"
+    return len(actual)
+
+
+def best_time(function):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main_bench():
+    if "--record" in sys.argv:
+        record()
+        return
+
+    feeds = []
+    for seed, url in enumerate(main.SITES):
+        path = fixture_path(url)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                feeds.append((url, f.read(), "копия"))
+        else:
+            feeds.append((url, stand_in(url, seed), "синтетика"))
+
+    for name, content in EDGE_CASES.items():
+        url = f"https://{re.sub(r'[^a-z0-9]+', '-', name.encode('ascii', 'ignore').decode() or 'edge')}.example.com/"
+        count = check_parity(name, url, content)
+        print(f"  {name:<20} {count:4d} статей — поля совпадают")
+
+    print(f"{'лента':<55} {'КБ':>6} {'статей':>7} {'feedparser':>11} {'expat':>8} {'cutoff':>8}")
+    cutoff = time.time() - 86400
+    total_old = total_new = 0.0
+    for url, content, kind in feeds:
+        count = check_parity(url, url, content)
+        old = best_time(lambda: parse_feedparser(content, url))
+        new = best_time(lambda: parse_fast(content, url))
+        early = best_time(lambda: parse_fast(content, url, cutoff=cutoff))
+        total_old += old
+        total_new += early
+        print(f"{url[:45] + ' (' + kind + ')':<55} {len(content) // 1024:>6} {count:>7} "
+              f"{old * 1000:>8.1f} мс {new * 1000:>5.1f} мс {early * 1000:>5.1f} мс")
+    print(f"всего: feedparser {total_old * 1000:.0f} мс, expat с cutoff {total_new * 1000:.0f} мс, "
+          f"ускорение {total_old / total_new:.0f}x")
+    assert total_new * 5 < total_old
+
+
+if __name__ == "__main__":
+    main_bench()
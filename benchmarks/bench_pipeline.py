@@ -0,0 +1,91 @@
+# Бенчмарк потокового конвейера: как быстро после последней (медленной) ленты уходит
+# первый пост и сколько памяти нужно конвейеру по сравнению с обработкой стадий целиком
+# (как раньше, через общий список all_entries). Первый пост намеренно ждёт последнюю
+# ленту: лучшие max_posts статей канала и подтверждения новости (ранжирование) можно
+# выбрать только по всем лентам цикла. Поэтому проверяется, что публикация начинается
+# сразу после последней ленты, а склейка копит до конца цикла только лёгкие записи без текста.
+#
+#   python benchmarks/bench_pipeline.py
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_telegram import FakeTelegram
+from feedserver import FeedServer, make_rss, run_bot_cycle
+
+FEEDS = 12
+ENTRIES = 40
+SLOW_DELAY = 3.0
+
+
+def streamed_cycle(main, results, tmp):
+    """Стадии run_cycle без публикации, потоком."""
+    from http_cache import HttpCache
+    from watermarks import WatermarkStore
+
+    channels = [channel for channel, _ in main.CHANNELS]
+    records = main.parse_results(results, HttpCache(os.path.join(tmp, "stage_http.json")),
+                                 WatermarkStore(os.path.join(tmp, "w.json")), {})
+    return main.collapse_clusters(main.route_records(records, channels))
+
+
+def batched_cycle(main, results, tmp):
+    """Прежний путь: статьи всех лент копятся в общем списке all_entries, стадии идут целиком."""
+    channels = [channel for channel, _ in main.CHANNELS]
+    cutoff = time.time() - 86400
+    all_entries = []
+    for result in results:
+        for entry in main.fetch_rss(result.url, result.content, result.headers, cutoff=cutoff):
+            entry["_source_url"] = result.url
+            all_entries.append(entry)
+    records = [main.normalize_entry(entry, entry["_source_url"]) for entry in all_entries]
+    pairs = list(main.route_records(records, channels))
+    return list(main.collapse_clusters(pairs))
+
+
+def peak_memory(cycle, main, results, tmp):
+    tracemalloc.start()
+    count = sum(1 for _ in cycle(main, results, tmp))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, peak
+
+
+def main_bench():
+    routes = {f"/f{i}": (make_rss(f"src{i}", ENTRIES), 0.05) for i in range(FEEDS)}
+    routes["/f0"] = (routes["/f0"][0], SLOW_DELAY)     # Первая в списке лента отвечает дольше всех
+    with tempfile.TemporaryDirectory() as tmp, FeedServer(routes) as feeds, FakeTelegram() as api:
+        os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:benchmark")
+        os.environ["TELEGRAM_API_URL"] = api.api_url
+        os.environ.setdefault("CHANNEL1_USERNAME", "@channel_one")
+        os.environ.setdefault("CHANNEL2_USERNAME", "@channel_two")
+        import main
+        from fetcher import fetch_feeds
+        from metrics import setup_logging
+        setup_logging("WARNING")
+
+        _, summary = run_bot_cycle([feeds.url(f"/f{i}") for i in range(FEEDS)], tmp, main.send_post, rate=25)
+        marks = summary["marks_ms"]
+        print(f"лент: {FEEDS}, статей в ленте: {ENTRIES}, медленная лента: {SLOW_DELAY:.0f} с")
+        print(f"первый пост:           {marks['first_post']:8.0f} мс")
+        print(f"последняя лента:       {marks['last_feed']:8.0f} мс")
+        print(f"опубликовано:          {len(api.messages):8d}")
+        assert marks["first_post"] >= marks["last_feed"], "пост ушёл до того, как склейка завершилась"
+        assert marks["first_post"] - marks["last_feed"] < SLOW_DELAY * 1000 / 2, "первый пост задержался после лент"
+
+        results = fetch_feeds([feeds.url(f"/f{i}") for i in range(1, FEEDS)])
+        streamed, stream_peak = peak_memory(streamed_cycle, main, results, tmp)
+        batched, batch_peak = peak_memory(batched_cycle, main, results, tmp)
+        assert streamed == batched
+        print(f"пик памяти, all_entries:    {batch_peak / 1024:8.0f} КБ")
+        print(f"пик памяти, потоком:        {stream_peak / 1024:8.0f} КБ")
+        assert stream_peak < batch_peak * 0.75, "склейка копит слишком много: записи должны быть без текста"
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,63 @@
+# Бенчмарк публикации: прежний цикл send_message + time.sleep(1) против Publisher
+# на локальном фейковом Bot API с лимитом на чат, ответами 429 и случайными 502.
+#
+#   python benchmarks/bench_publisher.py [постов на канал]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import telebot
+
+from fake_telegram import FakeTelegram
+from publisher import Publisher
+
+CHATS = ["@channel_one", "@channel_two"]
+
+
+def old_loop(bot, posts):
+    """Прежняя публикация: каналы по очереди, пауза 1 с, ошибки только печатаются."""
+    for chat in CHATS:
+        for post in posts:
+            try:
+                bot.send_message(chat, post)
+                time.sleep(1)
+            except Exception:
+                pass
+
+
+def new_publisher(bot, posts):
+    publisher = Publisher(lambda chat, text: bot.send_message(chat, text))
+    publisher.run({chat: (lambda chat=chat: [publisher.send(chat, p) for p in posts]) for chat in CHATS})
+    return publisher
+
+
+def run(name, func, posts):
+    with FakeTelegram(chat_interval=0.5, retry_after=1, fail_every=9) as api:
+        telebot.apihelper.API_URL = api.api_url
+        bot = telebot.TeleBot("123:fake")
+        started = time.perf_counter()
+        result = func(bot, posts)
+        elapsed = time.perf_counter() - started
+    delivered = len(api.messages)
+    print(f"{name:10} время {elapsed:6.1f} с, доставлено {delivered}/{len(posts) * len(CHATS)}, "
+          f"429: {sum(1 for r in api.rejected if r[1] == 429)}, 502: {sum(1 for r in api.rejected if r[1] == 502)}")
+    return api, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    posts = [f"Пост {i}" for i in range(count)]
+    run("старый", old_loop, posts)
+    api, publisher = run("Publisher", new_publisher, posts)
+    print("статистика Publisher:", publisher.stats)
+
+    assert len(api.messages) == count * len(CHATS), "Publisher не должен терять посты"
+    for chat in CHATS:
+        assert [t for c, t, _ in api.messages if c == chat] == posts, "порядок постов в канале сохраняется"
+
+
+if __name__ == "__main__":
+    main()
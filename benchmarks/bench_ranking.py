@@ -0,0 +1,178 @@
+# Бенчмарк ранжирования: сколько стоит выбрать MAX_POSTS лучших статей из тысяч
+# кандидатов по сравнению с поиском ключевых слов, и насколько выбор лучше случайного.
+# Проверка через run_cycle: подтверждения новости считаются по всем лентам цикла,
+# включая медленную, и первым в канал уходит лучший по очкам кандидат.
+#
+#   python benchmarks/bench_ranking.py
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:benchmark")
+os.environ.setdefault("CHANNEL1_USERNAME", "@channel_one")
+os.environ.setdefault("CHANNEL2_USERNAME", "@channel_two")
+
+from feedserver import WORDS, FeedServer, make_feed, run_bot_cycle
+from ranking import RankedQueue, score
+from records import EntryRecord
+import main
+
+SOURCES = 15
+CHANNEL = "channel2"
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "near_duplicates.json")
+STORY = "Veo 3"             # Сюжет из корпуса, который в цикле пересказывают все три ленты
+SLOW_DELAY = 1.0
+
+
+def make_candidates(count, now, seed=5):
+    rnd = random.Random(seed)
+    keywords = sorted(k for k in main.MATCHER.channels_by_keyword if CHANNEL in main.MATCHER.channels_by_keyword[k])
+    records = []
+    for i in range(count):
+        title = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(5, 9)))
+        body = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(60, 200)))
+        # У части статей ключевые слова в заголовке, у остальных — только в тексте
+        if rnd.random() < 0.3:
+            title += " " + rnd.choice(keywords)
+        body += " " + " ".join(rnd.choice(keywords) for _ in range(rnd.randint(1, 3)))
+        source = f"https://src{i % SOURCES if rnd.random() < 0.5 else 0}.example.com/feed"
+        records.append(EntryRecord(id=str(i), title=title, link=f"https://example.com/{i}", source=source,
+                                   published=now - rnd.uniform(0, 86400), text=(title + " " + body).lower(),
+                                   duplicates=rnd.choice((0, 0, 0, 0, 1, 2))))
+    return records
+
+
+def rank(records, limit, now, repeat=0.6):
+    ranked = RankedQueue(limit, repeat=repeat)
+    for record in records:
+        ranked.put(record, score(record, CHANNEL, now))
+    return [record for record, _ in zip(ranked, range(limit))]
+
+
+def best_time(function, repeats=3):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def check_cycle():
+    """
+    Три ленты пересказывают одну новость, одна из них отвечает медленно и весит
+    больше остальных. Очки должны считаться, когда склейка учла все три
+    источника, а публикация — начинаться с лучшего кандидата канала.
+    """
+    from replay import PostCapture
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        groups = json.load(f)["groups"]
+    story = next(group for group in groups if STORY in group[0]["title"])
+    story = [(item["title"], item["summary"]) for item in story + story[:1]][:3]
+    others = [(group[0]["title"], group[0]["summary"]) for group in groups if STORY not in group[0]["title"]]
+    now = time.time()
+    names = ("fast1", "fast2", "slow")
+    feeds_items = {name: [story[n]] + others[n::len(names)] for n, name in enumerate(names)}
+    routes = {f"/{name}": (make_feed(name, items, now), SLOW_DELAY if name == "slow" else 0)
+              for name, items in feeds_items.items()}
+
+    scored = []     # (канал, очки, запись, подтверждений в момент подсчёта)
+    original = main.score
+
+    def recording_score(record, channel, *args, **kwargs):
+        points = original(record, channel, *args, **kwargs)
+        scored.append((channel, points, record, record.duplicates))
+        # Медленный подсчёт очков: публикация, начатая раньше ранжирования, успела бы отправить пост
+        time.sleep(0.005)
+        return points
+
+    sent_after = []     # сколько кандидатов было оценено к моменту каждой отправки
+    capture = PostCapture()
+
+    def send(chat, text):
+        sent_after.append(len(scored))
+        capture(chat, text)
+
+    with tempfile.TemporaryDirectory() as tmp, FeedServer(routes) as server:
+        slow_url = server.url("/slow")
+        main.score = recording_score
+        main.SOURCE_WEIGHTS[slow_url] = 1.5
+        try:
+            run_bot_cycle([server.url(f"/{name}") for name in names], tmp, send, now=now)
+        finally:
+            main.score = original
+            del main.SOURCE_WEIGHTS[slow_url]
+
+    story_scores = [(record, duplicates) for _, _, record, duplicates in scored if STORY in record.title]
+    assert story_scores, "новость не дошла до ранжирования"
+    assert all(duplicates == 2 for _, duplicates in story_scores), \
+        "подтверждения посчитаны до того, как ответили все ленты"
+    assert {record.source for record, _ in story_scores} == {slow_url}, "в канал идёт не самый весомый источник"
+    assert sent_after and min(sent_after) == len(scored), "публикация началась до конца ранжирования"
+    for channel, username in main.CHANNELS:
+        candidates = [(points, record) for scored_channel, points, record, _ in scored if scored_channel == channel]
+        posts = [text for chat, text in capture.posts if chat == username]
+        if not candidates:
+            continue
+        best = max(candidates, key=lambda item: item[0])[1]
+        assert posts and f"({best.link})" in posts[0], f"первый пост в {channel} — не лучший кандидат"
+    print(f"run_cycle: подтверждений у новости {story_scores[0][1]}, постов {len(capture.posts)}, "
+          f"первый пост каждого канала — лучший по очкам")
+
+
+def main_bench():
+    now = time.time()
+    limit = main.CONFIG.channels[CHANNEL].max_posts
+
+    # Один проход находит те же слова, что и прежний match_lower
+    sample = make_candidates(200, now)
+    for record in sample:
+        hits, title_hits = main.MATCHER.match_title(record.text, len(record.title))
+        assert hits == main.MATCHER.match_lower(record.text)
+        record.hits, record.title_hits = hits, title_hits
+
+    # Без штрафа за повтор источника куча выбирает ровно лучшие по очкам
+    by_score = sorted(sample, key=lambda r: -score(r, CHANNEL, now))
+    assert [r.id for r in rank(sample, limit, now, repeat=1.0)] == [r.id for r in by_score[:limit]]
+
+    print(f"{'кандидатов':>10} {'поиск слов, мс':>15} {'ранжирование, мс':>17} {'доля':>6}")
+    for count in (1000, 5000, 20000):
+        records = make_candidates(count, now)
+
+        def scan():
+            for record in records:
+                record.hits, record.title_hits = main.MATCHER.match_title(record.text, len(record.title))
+
+        scan_time = best_time(scan)
+        rank_time = best_time(lambda: rank(records, limit, now))
+        print(f"{count:>10} {scan_time * 1000:>15.1f} {rank_time * 1000:>17.1f} {rank_time / scan_time:>6.1%}")
+        assert rank_time < scan_time / 5, "ранжирование не должно стоить сравнимо с поиском слов"
+
+    # Выбор по очкам против прежнего случайного выбора
+    records = make_candidates(2000, now)
+    for record in records:
+        record.hits, record.title_hits = main.MATCHER.match_title(record.text, len(record.title))
+    chosen = rank(records, limit, now)
+    shuffled = records[:]
+    random.Random(1).shuffle(shuffled)
+    mean = lambda picked: sum(score(r, CHANNEL, now) for r in picked) / len(picked)
+    per_source = lambda picked: max(sum(r.source == s for r in picked) for s in {r.source for r in picked})
+    plain = rank(records, limit, now, repeat=1.0)
+    print(f"средние очки: случайно {mean(shuffled[:limit]):.1f}, по очкам {mean(chosen):.1f}")
+    print(f"больше всего постов из одного источника: без штрафа {per_source(plain)}, со штрафом {per_source(chosen)}")
+    assert mean(chosen) > mean(shuffled[:limit])
+    assert per_source(chosen) < per_source(plain)
+    title_hits = lambda picked: sum(len(r.title_hits.get(CHANNEL, ())) for r in picked)
+    print(f"ключевых слов в заголовках: случайно {title_hits(shuffled[:limit])}, по очкам {title_hits(chosen)}")
+    assert title_hits(chosen) > title_hits(shuffled[:limit])
+    check_cycle()
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,110 @@
+# Бенчмарк памяти: весь список статей feedparser до конца запуска (прежний all_entries)
+# против компактных EntryRecord, извлечённых сразу после разбора каждой ленты.
+#
+#   python benchmarks/bench_records.py [лент] [статей в ленте]
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+from email.utils import formatdate
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:benchmark")
+
+import feedparser
+
+from feedserver import WORDS
+import main
+
+
+def make_rich_rss(name, entries, seed):
+    """Лента «как настоящая»: полный HTML в content:encoded, картинки, категории, автор."""
+    rnd = random.Random(seed)
+    now = time.time()
+    items = []
+    for i in range(entries):
+        title = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(5, 10))).capitalize()
+        paragraphs = "".join(
+            "<p>" + " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(40, 80))) + "</p>"
+            for _ in range(rnd.randint(4, 10))
+        )
+        link = f"https://{name}.example.com/articles/{i}"
+        items.append(
+            f"<item><title>{escape(title)}</title><link>{link}</link><guid>{link}</guid>"
+            f"<pubDate>{formatdate(now - i * 900, usegmt=True)}</pubDate>"
+            f"<dc:creator>Автор {i % 7}</dc:creator>"
+            + "".join(f"<category>{rnd.choice(WORDS)}</category>" for _ in range(4))
+            + f"<description>{escape(paragraphs[:400])}</description>"
+            f"<content:encoded>{escape(paragraphs)}</content:encoded>"
+            f'<media:content url="https://{name}.example.com/img/{i}.jpg" medium="image" width="1200"/>'
+            f'<enclosure url="https://{name}.example.com/img/{i}.jpg" type="image/jpeg" length="1000"/>'
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:media="http://search.yahoo.com/mrss/">'
+        f"<channel><title>{name}</title><link>https://{name}.example.com/</link>"
+        + "".join(items) + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def keep_entries(feeds):
+    """Прежний путь: статьи всех лент копятся в одном списке до конца запуска."""
+    all_entries = []
+    for url, body in feeds:
+        entries = feedparser.parse(body).entries
+        for entry in entries:
+            entry["_source_url"] = url
+        all_entries.extend(entries)
+    records = [main.normalize_entry(entry, entry["_source_url"]) for entry in all_entries]
+    return all_entries, records
+
+
+def keep_records(feeds):
+    """Новый путь: записи извлекаются сразу, объекты feedparser живут только пока разбирается лента."""
+    records = []
+    for url, body in feeds:
+        records.extend(main.normalize_entry(entry, url) for entry in feedparser.parse(body).entries)
+    return records
+
+
+def measure(function, feeds):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = function(feeds)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak, elapsed
+
+
+def main_bench():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    feeds = [(f"https://src{i}.example.com/feed", make_rich_rss(f"src{i}", size, seed=i)) for i in range(count)]
+    total = count * size
+
+    # Записи одинаковы при обоих путях
+    _, old_records = keep_entries(feeds[:2])
+    new_records = keep_records(feeds[:2])
+    assert [(r.id, r.title, r.link, r.source, r.published, r.text) for r in old_records] == \
+           [(r.id, r.title, r.link, r.source, r.published, r.text) for r in new_records]
+
+    old_current, old_peak, old_time = measure(keep_entries, feeds)
+    new_current, new_peak, new_time = measure(keep_records, feeds)
+    print(f"лент: {count}, статей: {total}, байт XML: {sum(len(b) for _, b in feeds) // 1024} КБ")
+    print(f"{'':24} {'удерживается':>14} {'пик':>10} {'время':>9}")
+    print(f"{'feedparser до конца':24} {old_current / 2**20:11.1f} МБ {old_peak / 2**20:7.1f} МБ {old_time:7.2f} с")
+    print(f"{'EntryRecord сразу':24} {new_current / 2**20:11.1f} МБ {new_peak / 2**20:7.1f} МБ {new_time:7.2f} с")
+    print(f"на статью: {old_current / total / 1024:.1f} КБ -> {new_current / total / 1024:.1f} КБ")
+    assert new_current * 2 < old_current, "записи должны занимать хотя бы вдвое меньше"
+    assert new_peak < old_peak
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,187 @@
+# Бенчмарк оформления постов: заголовок, который считается один раз на статью, а не на
+# каждый канал; проверка экранирования MarkdownV2 на заголовках со всеми спецсимволами;
+# и публикация в канал дайджестами против поста на статью через Telegram-заглушку
+# с настоящими лимитами Publisher.
+#
+#   python benchmarks/bench_render.py
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:benchmark")
+
+from fake_telegram import FakeTelegram
+from feedserver import WORDS
+
+RECORDS = 5000
+CHANNELS = 2
+REPEATS = 5
+POSTS = 20
+SPECIAL = "_*[]()~`>#+-=|{}.!\\"
+TITLE_EXTRAS = ["&amp;", "&quot;", "&#8212;", "C++", "v2.0", "[видео]", "(обзор)", "n8n_bot", "*NEW*",
+                "50% скидка!", "\\путь", "#ai", "a|b", "x=y", "{шаблон}", "~100", "`код`", "👍"]
+
+
+def make_records(count, seed=7):
+    from records import EntryRecord
+
+    rnd = random.Random(seed)
+    records = []
+    for i in range(count):
+        words = [rnd.choice(WORDS) for _ in range(rnd.randint(4, 10))]
+        for _ in range(rnd.randint(0, 3)):
+            words.insert(rnd.randrange(len(words) + 1), rnd.choice(TITLE_EXTRAS))
+        link = f"https://example.com/{i}/post_(draft){'' if i % 2 else '?a=1&b=2'}"
+        records.append(EntryRecord(id=link, title=" ".join(words).capitalize(), link=link,
+                                   source="https://example.com/feed", published=None, text=""))
+    return records
+
+
+def parse_markdown_v2(text):
+    """
+    Разбирает сообщение MarkdownV2 из наших постов (жирный текст и ссылки) так же
+    строго, как Telegram: неэкранированный спецсимвол вне разметки — ошибка.
+    Возвращает видимый текст и список адресов ссылок.
+    """
+    visible, links = [], []
+    i = 0
+    bold = link = False
+    while i < len(text):
+        char = text[i]
+        if char == "\\":
+            assert i + 1 < len(text) and text[i + 1] in SPECIAL, f"лишний \\ в позиции {i}: {text!r}"
+            visible.append(text[i + 1])
+            i += 2
+            continue
+        if char == "*":
+            bold = not bold
+        elif char == "[" and not link:
+            link = True
+        elif char == "]" and link and text[i + 1:i + 2] == "(":
+            link = False
+            url = []
+            i += 2
+            while text[i] != ")":
+                if text[i] == "\\":
+                    assert text[i + 1] in ")\\", f"лишний \\ в адресе: {text!r}"
+                    i += 1
+                url.append(text[i])
+                i += 1
+            links.append("".join(url))
+        else:
+            assert char not in SPECIAL, f"неэкранированный {char!r} в позиции {i}: {text!r}"
+            visible.append(char)
+        i += 1
+    assert not bold and not link, f"незакрытая разметка: {text!r}"
+    return "".join(visible), links
+
+
+def check_escaping(main, records):
+    for record in records:
+        visible, links = parse_markdown_v2(main.create_post(record))
+        assert main.clean_text(record.title) in visible and links == [record.link]
+    visible, links = parse_markdown_v2(main.create_digest(records[:30]))
+    assert links == [record.link for record in records[:30]]
+
+
+def check_packing(main, records, tmp):
+    """Длинные заголовки: дайджесты делятся по MESSAGE_LIMIT, и ни один не влезает в предыдущий."""
+    from dedup_store import PublishedStore
+    from publisher import Publisher
+    from replay import PostCapture
+
+    for record in records:
+        record.title = (record.title + " ") * 8
+    capture = PostCapture()
+    publisher = Publisher(capture, global_rate=main.DRY_RUN_RATE, chat_rate=main.DRY_RUN_RATE,
+                          chat_burst=main.DRY_RUN_RATE)
+    count = main.publish_entries(records, "channel1", "@c", PublishedStore(os.path.join(tmp, "packing.log")),
+                                 publisher, max_posts=len(records), digest=True)
+    texts = [text for _, text in capture.posts]
+    assert count == len(records) and len(texts) > 1
+    assert sum(len(parse_markdown_v2(text)[1]) for text in texts) == len(records)
+    for text, following in zip(texts, texts[1:]):
+        first_line = following.split("\n\n", 1)[0]
+        assert main.message_length(text) + 2 + main.message_length(first_line) > main.MESSAGE_LIMIT
+    assert all(main.message_length(text) <= main.MESSAGE_LIMIT for text in texts)
+    return len(texts)
+
+
+def create_post_uncached(main, title, link):
+    """Тот же пост, но заголовок чистится и экранируется заново для каждого канала."""
+    title = main.escape_markdown(main.clean_text(title))
+    return f"\U0001F4C8 *{title}*\n\n[Читать статью]({main.escape_link(link)})"
+
+
+def best_time(function):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def render_all(main, records):
+    for record in records:
+        record.markup = None
+    for _ in range(CHANNELS):
+        for record in records:
+            main.create_post(record)
+
+
+def publish(main, records, digest, tmp):
+    from dedup_store import PublishedStore
+    from publisher import Publisher
+
+    with FakeTelegram() as api:
+        main.TELEGRAM_API_URL = api.api_url
+        main._bot = None
+        store = PublishedStore(os.path.join(tmp, f"published-{digest}.log"))
+        started = time.perf_counter()
+        count = main.publish_entries(records, "channel1", "@channel_one", store, Publisher(main.send_post),
+                                     max_posts=len(records), digest=digest)
+        elapsed = time.perf_counter() - started
+        return count, elapsed, [text for _, text, _ in api.messages]
+
+
+def main_bench():
+    import main
+    from metrics import setup_logging
+    setup_logging("WARNING")
+
+    records = make_records(RECORDS)
+    check_escaping(main, records)
+
+    old = best_time(lambda: [create_post_uncached(main, r.title, r.link) for _ in range(CHANNELS) for r in records])
+    new = best_time(lambda: render_all(main, records))
+    print(f"оформление {RECORDS} статей для {CHANNELS} каналов:")
+    print(f"  заголовок для каждого канала заново: {old * 1000:7.1f} мс")
+    print(f"  заголовок один раз на статью:        {new * 1000:7.1f} мс ({old / new:.1f}x)")
+    assert new * 1.5 < old
+
+    with tempfile.TemporaryDirectory() as tmp:
+        posts = make_records(POSTS, seed=11)
+        single_count, single_time, single = publish(main, posts, False, tmp)
+        digest_count, digest_time, digests = publish(main, make_records(POSTS, seed=11), True, tmp)
+        packed = check_packing(main, make_records(100, seed=13), tmp)
+    assert single_count == digest_count == POSTS and len(single) == POSTS
+    for text in digests:
+        assert main.message_length(text) <= main.MESSAGE_LIMIT
+        parse_markdown_v2(text)
+    assert sum(len(parse_markdown_v2(text)[1]) for text in digests) == POSTS
+
+    print(f"публикация {POSTS} статей в канал (лимит Telegram {main.MESSAGE_LIMIT} символов):")
+    print(f"  пост на статью: {len(single):3d} сообщений за {single_time:6.2f} с")
+    print(f"  дайджестом:     {len(digests):3d} сообщений за {digest_time:6.2f} с "
+          f"(самое длинное {max(map(main.message_length, digests))} символов)")
+    print(f"  100 статей с длинными заголовками: {packed} дайджестов, каждый до {main.MESSAGE_LIMIT} символов")
+    assert len(digests) * 4 <= len(single) and digest_time * 4 < single_time
+
+
+if __name__ == "__main__":
+    main_bench()
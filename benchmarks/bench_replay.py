@@ -0,0 +1,121 @@
+# Сквозной бенчмарк без сети и Telegram: весь цикл бота по архиву лент (main.py --replay)
+# на 1×, 10× и 100× лент и статей. Для каждого масштаба — время стадий, пик памяти
+# и статей в секунду. По умолчанию архив синтетический, в формате лент из config.toml;
+# можно взять свой, записанный командой `python main.py --record ARCHIVE`:
+#
+#   python benchmarks/bench_replay.py [ARCHIVE]
+
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:benchmark")
+
+from feedserver import WORDS
+from fetcher import FetchResult
+from replay import FeedArchive
+
+SCALES = (1, 10, 100)
+STAGES = ("fetch", "parse", "route", "cluster", "rank", "publish")
+# Ключевые слова вперемешку с обычными: на словаре из одних ключевых слов все
+# статьи похожи друг на друга, и склейка дубликатов работает не как на живых лентах
+VOCABULARY = WORDS + [f"слово{i}" for i in range(3000)]
+
+
+def scaled_results(base, scale, now):
+    """scale копий каждой ленты base; у копий свои адреса и статьи."""
+    from bench_parser import stand_in
+
+    for copy in range(scale):
+        for i, result in enumerate(base):
+            if copy == 0:
+                yield result
+                continue
+            url = result.url.replace("://", f"://copy{copy}.", 1)
+            yield FetchResult(url=url, content=stand_in(url, copy * 1000 + i, VOCABULARY), headers={},
+                              status=200, elapsed=result.elapsed)
+
+
+def base_results(archive_path):
+    if archive_path:
+        return list(FeedArchive(archive_path).replay())
+    from bench_parser import stand_in
+    import main
+    return [FetchResult(url=url, content=stand_in(url, i, VOCABULARY), headers={}, status=200,
+                        elapsed=0.1)
+            for i, url in enumerate(main.SITES)]
+
+
+def child(archive_path):
+    """Один прогон в отдельном процессе, чтобы пик памяти не смешивался между масштабами."""
+    import main
+    from metrics import setup_logging, stats
+    setup_logging("WARNING")
+    started = time.perf_counter()
+    capture = main.replay(archive_path)
+    elapsed = time.perf_counter() - started
+    summary = stats.summary()
+    print("RESULT " + json.dumps({
+        "elapsed": elapsed,
+        "summary": summary,
+        "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "posts": len(capture.posts),
+        "posts_hash": hashlib.sha256(repr(capture.posts).encode()).hexdigest(),
+    }))
+
+
+def run_child(archive_path, tmp):
+    env = dict(os.environ, LOG_LEVEL="WARNING", CONFIG_CACHE_PATH=os.path.join(tmp, "config.pickle"))
+    done = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", archive_path],
+                          cwd=tmp, env=env, capture_output=True, text=True)
+    assert done.returncode == 0, done.stderr
+    line = next(line for line in done.stdout.splitlines() if line.startswith("RESULT "))
+    return json.loads(line[len("RESULT "):])
+
+
+def main_bench():
+    archive_path = sys.argv[1] if len(sys.argv) > 1 else None
+    base = base_results(archive_path)
+    now = FeedArchive(archive_path).recorded_at if archive_path else time.time()
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in SCALES:
+            path = os.path.join(tmp, f"x{scale}.zip")
+            for _ in FeedArchive(path).record(scaled_results(base, scale, now), recorded_at=now):
+                pass
+            result = run_child(path, tmp)
+            if scale == 1:
+                # Воспроизведение повторяемо: тот же архив — те же посты
+                assert run_child(path, tmp)["posts_hash"] == result["posts_hash"]
+            rows.append((scale, len(base) * scale, result))
+
+    print(f"{'масштаб':>7} {'лент':>6} {'статей':>7} {'постов':>6} {'время, с':>9} "
+          + " ".join(f"{stage:>8}" for stage in STAGES) + f" {'пик, МБ':>8} {'статей/с':>9}")
+    speeds = []
+    for scale, feeds, result in rows:
+        summary = result["summary"]
+        entries = summary["counters"].get("entries_parsed", 0)
+        speed = entries / result["elapsed"]
+        speeds.append(speed)
+        stages = summary["stages_ms"]
+        print(f"{scale:>6}× {feeds:>6} {entries:>7} {result['posts']:>6} {result['elapsed']:>9.2f} "
+              + " ".join(f"{stages.get(stage, 0):>8.0f}" for stage in STAGES)
+              + f" {result['maxrss_kb'] / 1024:>8.1f} {speed:>9.0f}")
+        assert result["posts"] > 0, "в воспроизведении не нашлось ни одного поста"
+    print("время стадий — в мс")
+    # Пропускная способность не должна проседать с ростом числа лент и статей
+    assert speeds[-1] > speeds[0] / 2, "на 100× статей в секунду вдвое меньше, чем на 1×"
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2])
+    else:
+        main_bench()
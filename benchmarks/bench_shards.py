@@ -0,0 +1,116 @@
+# Бенчмарк режима шардов: один и тот же большой список лент на 1, 2, 4 и 8 процессах-шардах
+# с координатором, который склеивает дубликаты и публикует в Telegram-заглушку.
+# Часть лент повторяется под другими адресами, поэтому одна статья приходит из разных
+# шардов — проверяем, что ни одна не опубликована дважды и что посты не зависят от числа шардов.
+# Ленты отдаёт отдельный процесс с задержкой ответа, как у настоящих сайтов.
+#
+#   python benchmarks/bench_shards.py
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:benchmark")
+os.environ.setdefault("CHANNEL1_USERNAME", "@channel_one")
+os.environ.setdefault("CHANNEL2_USERNAME", "@channel_two")
+
+from fake_telegram import FakeTelegram
+from feedserver import FeedServer, make_rss, run_bot_cycle
+from shards import partition
+
+WORKERS = (1, 2, 4, 8)
+FEEDS = 240
+COPIES = 20          # Столько лент повторяются под вторым адресом
+ENTRIES = 30
+LATENCY = 0.3        # Задержка ответа ленты, с
+
+
+def routes(now):
+    result = {f"/f{i}": (make_rss(f"src{i}", ENTRIES, now=now), LATENCY) for i in range(FEEDS)}
+    for i in range(COPIES):
+        result[f"/copy{i}"] = result[f"/f{i}"]
+    return result
+
+
+def serve(now, conn):
+    """Сервер лент в отдельном процессе, чтобы он не делил GIL с координатором."""
+    with FeedServer(routes(now)) as feeds:
+        conn.send(feeds.base_url)
+        conn.recv()
+
+
+def run(main, sites, workers, tmp):
+    from health import FeedHealth
+
+    directory = os.path.join(tmp, f"w{workers}")
+    with FakeTelegram() as api:
+        main.TELEGRAM_API_URL = api.api_url
+        main._bot = None
+        started = time.perf_counter()
+        _, summary = run_bot_cycle(sites, directory, main.send_post, rate=1000,
+                                   health=FeedHealth(os.path.join(directory, "health.json")), workers=workers)
+        elapsed = time.perf_counter() - started
+        return elapsed, summary, [(chat, text) for chat, text, _ in api.messages]
+
+
+def check_partition(sites):
+    """Rendezvous-хэш: при добавлении шарда переезжает примерно каждая (n+1)-я лента."""
+    for shards in (2, 4, 8):
+        before = {url: shard for shard, urls in enumerate(partition(sites, shards)) for url in urls}
+        after = {url: shard for shard, urls in enumerate(partition(sites, shards + 1)) for url in urls}
+        moved = sum(before[url] != after[url] for url in sites)
+        assert moved <= 2 * len(sites) / (shards + 1), f"{shards}→{shards + 1}: переехало {moved} лент"
+        assert partition(sites, shards) == partition(list(sites), shards)
+
+
+def main_bench():
+    import main
+    from metrics import setup_logging
+    setup_logging("ERROR")
+
+    now = time.time()
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve, args=(now, child), daemon=True)
+    server.start()
+    base_url = parent.recv()
+    sites = [f"{base_url}/f{i}" for i in range(FEEDS)] + [f"{base_url}/copy{i}" for i in range(COPIES)]
+    check_partition(sites)
+
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for workers in WORKERS:
+                rows.append((workers, *run(main, sites, workers, tmp)))
+    finally:
+        parent.send("stop")
+        server.join(5)
+
+    cpus = os.cpu_count() or 1
+    print(f"лент: {len(sites)} ({COPIES} повторяются), статей в ленте: {ENTRIES}, "
+          f"задержка ответа: {LATENCY} с, ядер: {cpus}")
+    print(f"{'шардов':>6} {'время, с':>9} {'ускорение':>9} {'лент в шарде':>13} {'статей':>7} "
+          f"{'дубликатов':>10} {'постов':>6}")
+    base_time = rows[0][1]
+    reference = sorted(rows[0][3])
+    for workers, elapsed, summary, posts in rows:
+        sizes = [len(urls) for urls in partition(sites, workers)]
+        counters = summary["counters"]
+        print(f"{workers:>6} {elapsed:>9.2f} {base_time / elapsed:>8.1f}x {min(sizes):>6}–{max(sizes):<6} "
+              f"{counters.get('entries_parsed', 0):>7} {counters.get('entries_duplicate', 0):>10} {len(posts):>6}")
+        assert len(posts) == len(set(posts)), f"{workers} шардов: статья опубликована дважды"
+        assert sorted(posts) == reference, f"{workers} шардов: посты отличаются от запуска в одном процессе"
+        assert counters.get("entries_parsed") == rows[0][2]["counters"].get("entries_parsed")
+        assert not counters.get("shard_errors")
+    # Загрузка упирается в задержку лент и число потоков, разбор — в ядра: без нескольких
+    # ядер ускоряется только ожидание ответов, а процессы шардов ещё и стоят времени на запуск
+    speedups = {workers: base_time / elapsed for workers, elapsed, _, _ in rows}
+    if cpus >= 4:
+        assert speedups[4] > 1.5, "4 шарда на 4+ ядрах не быстрее одного процесса"
+    assert speedups[8] > 0.7, "накладные расходы шардов съели больше трети времени"
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,81 @@
+# Бенчмарк запуска: сколько стоит import main и разовый запуск, которому нечего делать
+# (все ленты недавно опрошены), по сравнению с прежним запуском, который сразу загружал
+# telebot и feedparser. Бюджеты ниже — порог регрессии.
+#
+#   python benchmarks/bench_startup.py
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import load_config
+from scheduler import NEWS_INTERVAL, FeedScheduler
+
+RUNS = 5
+IMPORT_BUDGET_MS = 120      # import main целиком, без запуска интерпретатора
+IDLE_RUN_BUDGET = 0.6       # Запуск без лент к опросу — не дольше этой доли прежнего
+# Эти модули не должны загружаться, пока боту нечего скачивать, разбирать и публиковать
+LAZY_MODULES = ("telebot", "requests", "urllib3", "feedparser", "tomllib", "email.utils")
+
+EAGER_RUN = ("import telebot, feedparser, runpy; "
+             "runpy.run_path('main.py', run_name='__main__')")
+
+
+def run(args, env):
+    started = time.perf_counter()
+    done = subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    assert done.returncode == 0, done.stderr
+    return elapsed, done
+
+
+def import_time_ms(env):
+    """Время import main по -X importtime (накопленное, в мс) и загруженные «ленивые» модули."""
+    check = f"import sys, main; print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    _, done = run(["-X", "importtime", "-c", check], env)
+    for line in done.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == "main":
+            return int(parts[1]) / 1000, done.stdout.split()
+    raise AssertionError("нет строки main в выводе -X importtime")
+
+
+def main_bench():
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, TELEGRAM_BOT_TOKEN="1:benchmark", LOG_LEVEL="WARNING",
+                   CONFIG_CACHE_PATH=os.path.join(tmp, "config.pickle"),
+                   SCHEDULE_PATH=os.path.join(tmp, "schedule.json"),
+                   HTTP_CACHE_PATH=os.path.join(tmp, "http_cache.json"),
+                   PUBLISHED_STORE_PATH=os.path.join(tmp, "published.log"),
+                   WATERMARK_PATH=os.path.join(tmp, "watermarks.json"))
+
+        # Все ленты только что опрошены: запуску по cron нечего делать
+        scheduler = FeedScheduler({url: NEWS_INTERVAL for url in load_config(cache_path=None).sites}, jitter=0)
+        for url in scheduler.intervals:
+            scheduler.mark_polled(url)
+        scheduler.save(env["SCHEDULE_PATH"])
+
+        run(["-c", "import main"], env)    # Первый запуск компилирует config.toml в кэш
+        import_ms, loaded = min(import_time_ms(env) for _ in range(RUNS))
+        idle = min(run(["main.py"], env)[0] for _ in range(RUNS))
+        eager = min(run(["-c", EAGER_RUN], env)[0] for _ in range(RUNS))
+        bare = min(run(["-c", "pass"], env)[0] for _ in range(RUNS))
+
+    print(f"import main:                   {import_ms:7.1f} мс (бюджет {IMPORT_BUDGET_MS} мс)")
+    print(f"загружено лишнего при импорте: {', '.join(loaded) or 'ничего'}")
+    print(f"пустой интерпретатор:          {bare * 1000:7.1f} мс")
+    print(f"запуск без лент, как раньше:   {eager * 1000:7.1f} мс")
+    print(f"запуск без лент, сейчас:       {idle * 1000:7.1f} мс "
+          f"(сверх интерпретатора {(eager - bare) / max(idle - bare, 1e-3):.1f}x быстрее)")
+    assert not loaded, f"при импорте загружены {loaded}"
+    assert import_ms < IMPORT_BUDGET_MS
+    assert idle < eager * IDLE_RUN_BUDGET
+
+
+if __name__ == "__main__":
+    main_bench()
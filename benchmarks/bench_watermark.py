@@ -0,0 +1,195 @@
+# Бенчмарк водяных знаков лент: сколько стоит повторный разбор уже виденных статей.
+# В установившемся режиме в ленте появляется пара новых статей, а остальные
+# уже разбирались в прошлый запуск. Без водяных знаков каждая статья заново
+# проходит нормализацию, разбор даты и поиск ключевых слов; с ними — только новые.
+# Заодно проверяется, что статьи, которые не удалось опубликовать, уходят в следующий
+# запуск, хотя лента не изменилась и стоят они ниже уже разобранных, что статьи сверх
+# max_posts канала не возвращаются в следующий запуск, и что у еженедельной
+# ленты старыми считаются только статьи старше её окна свежести.
+#
+#   python benchmarks/bench_watermark.py
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:benchmark")
+
+import feedparser
+
+from feedserver import WORDS, FeedServer, make_feed, make_rss, run_bot_cycle
+import main
+from metrics import setup_logging, stats
+from watermarks import WatermarkStore
+
+NEW_PER_RUN = 2
+REPEATS = 20
+RETRY_ENTRIES = 10
+OVERFLOW_ENTRIES = 120   # Столько статей в ленте, что лимит max_posts каналов заведомо превышен
+RETRY_FAILED = 5         # Столько самых старых статей ленты не удаётся опубликовать в первый запуск
+WEEKLY_URL = "https://www.deeplearning.ai/the-batch/feed/"     # Лента с окном свежести 7 дней
+NEWS_URL = "https://news.example.com/feed"                     # Лента с окном по умолчанию, сутки
+
+
+def parse_feed(size, now):
+    return feedparser.parse(make_rss("steady", size, seed=1, now=now)).entries
+
+
+def run_once(entries, url, watermarks):
+    channels = [channel for channel, _ in main.CHANNELS]
+    if watermarks is not None:
+        entries = watermarks.unseen(url, entries, main.get_entry_id)
+    records = [main.normalize_entry(entry, url) for entry in entries]
+    return main.route_entries(records, channels, watermarks=watermarks)
+
+
+def measure(size, tmp):
+    url = f"https://steady.example.com/{size}"
+    now = time.time()
+    entries = parse_feed(size + NEW_PER_RUN, now)
+
+    # Прошлый запуск видел все статьи, кроме NEW_PER_RUN самых свежих
+    watermarks = WatermarkStore(os.path.join(tmp, f"{size}.json"))
+    for entry in entries[NEW_PER_RUN:]:
+        watermarks.add(url, main.get_entry_id(entry), main.get_published_time(entry, url))
+
+    new_ids = {main.get_entry_id(entry) for entry in entries[:NEW_PER_RUN]}
+    assert {main.get_entry_id(e) for e in watermarks.unseen(url, entries, main.get_entry_id)} == new_ids
+
+    # Очереди с водяными знаками — подмножество полных, и в них только новые статьи
+    full = run_once(entries, url, None)
+    delta = run_once(entries, url, watermarks)
+    for channel, queue in delta.items():
+        assert {r.id for r in queue} <= new_ids & {r.id for r in full[channel]}
+
+    timings = []
+    for marks in (None, watermarks):
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            # Отмеченные в прошлом повторе статьи не должны влиять на замер
+            if marks is not None:
+                for entry_id in new_ids:
+                    marks.feeds[url]["ids"].pop(entry_id, None)
+            run_once(entries, url, marks)
+        timings.append((time.perf_counter() - started) / REPEATS * 1000)
+    return timings
+
+
+def check_retry(tmp):
+    """Запуск с ошибками отправки, повторный запуск и запуск, когда всё уже решено."""
+    from http_cache import HttpCache
+    from replay import PostCapture
+
+    failing = {f"https://retry.example.com/articles/{i}" for i in range(RETRY_ENTRIES - RETRY_FAILED,
+                                                                        RETRY_ENTRIES)}
+
+    def flaky(chat, text):
+        if any(f"({link})" in text for link in failing):
+            raise ValueError("канал недоступен")
+        capture(chat, text)
+
+    with FeedServer({"/retry": (make_rss("retry", RETRY_ENTRIES, seed=3), 0)}) as feeds:
+        runs = []
+        for send in ("flaky", "ok", "ok"):
+            capture = PostCapture()
+            _, summary = run_bot_cycle([feeds.url("/retry")], os.path.join(tmp, "retry"),
+                                       flaky if send == "flaky" else capture)
+            runs.append((capture.posts, summary["counters"]))
+
+    (first, first_counters), (second, second_counters), (third, third_counters) = runs
+    failed = first_counters.get("publish_errors", 0)
+    assert failed, "в первом запуске должны быть ошибки отправки"
+    retried = [text for _, text in second if any(f"({link})" in text for link in failing)]
+    assert len(retried) == len(second) == failed, "отложенные статьи не опубликованы повторно"
+    assert not second_counters.get("feeds_not_modified"), "лента с отложенными статьями пришла ответом 304"
+    assert third_counters.get("feeds_not_modified") == 1 and not third, "после повтора лента должна быть решена"
+
+    # Лента с отложенными статьями теряет и прежние валидаторы, а не только новые
+    cache = HttpCache(None)
+    cache.store("https://retry.example.com/feed", {"etag": '"old"'})
+    cache.defer("https://retry.example.com/feed", {"etag": '"new"'})
+    cache.commit(skip={"https://retry.example.com/feed"})
+    assert "https://retry.example.com/feed" not in cache.feeds, "прежний ETag ленты с отложенными статьями остался"
+    print(f"ошибок отправки: {failed}, опубликовано при повторе: {len(retried)}, "
+          f"третий запуск: ответ 304, постов {len(third)}")
+
+
+def check_overflow(tmp):
+    """Статьи, не вошедшие в max_posts, не публикуются в следующий запуск по той же ленте."""
+    # Статьи выходят раз в 10 минут, так что вся лента укладывается в окно свежести
+    rnd = random.Random(4)
+    items = [(" ".join(rnd.choice(WORDS) for _ in range(8)), " ".join(rnd.choice(WORDS) for _ in range(60)))
+             for _ in range(OVERFLOW_ENTRIES)]
+    with FeedServer({"/many": (make_feed("many", items), 0)}) as feeds:
+        runs = []
+        for _ in range(2):
+            capture, summary = run_bot_cycle([feeds.url("/many")], os.path.join(tmp, "many"))
+            runs.append((capture.posts, summary["counters"], summary["channels"]))
+
+    (first, _, candidates), (second, counters, _) = runs
+    limit = sum(main.CONFIG.channels[channel].max_posts for channel in candidates)
+    assert sum(candidates.values()) > limit, "кандидатов должно быть больше, чем max_posts каналов"
+    assert len(first) == limit, "в первый запуск каналы должны заполниться до max_posts"
+    assert not second and counters.get("feeds_not_modified") == 1, "статьи сверх max_posts вернулись"
+    print(f"кандидатов: {sum(candidates.values())}, опубликовано: {len(first)}, во второй запуск: {len(second)}")
+
+
+def check_window():
+    """
+    Отложенная статья еженедельной ленты трёхдневной давности и статья с новым id
+    той же давности проходят маршрутизацию, хотя после них вышел свежий выпуск;
+    у ленты с суточным окном такая статья с новым id считается старой.
+    """
+    from records import EntryRecord
+
+    stats.reset()
+    now = time.time()
+    channels = [channel for channel, _ in main.CHANNELS]
+    text = "zapier adds ai agents that run workflows across apps with automation"
+
+    def record(url, entry_id):
+        return EntryRecord(id=entry_id, title="Zapier adds AI agents", link=f"{url}/{entry_id}", source=url,
+                           published=now - 3 * 86400, text=text)
+
+    watermarks = WatermarkStore(None)
+    for url in (WEEKLY_URL, NEWS_URL):
+        watermarks.add(url, "issue", now)       # Свежий выпуск уже разобран
+    watermarks.hold(WEEKLY_URL, "held")
+    watermarks.export([WEEKLY_URL, NEWS_URL])   # Дата выпуска вступает в силу, как после прошлого запуска
+    routed = {record.link for record, _ in main.route_records(
+        [record(WEEKLY_URL, "held"), record(WEEKLY_URL, "new"), record(NEWS_URL, "news-new")],
+        channels, watermarks=watermarks, now=now)}
+    assert f"{WEEKLY_URL}/held" in routed, "отложенная статья еженедельной ленты отброшена как старая"
+    assert f"{WEEKLY_URL}/new" in routed, "статья в окне свежести еженедельной ленты отброшена как старая"
+    assert f"{NEWS_URL}/news-new" not in routed and stats.summary()["counters"].get("entries_old") == 1
+    print("окно старых статей: по окну свежести ленты, отложенные статьи не отбрасываются")
+
+
+def main_bench():
+    setup_logging("ERROR")
+    stats.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"новых статей за запуск: {NEW_PER_RUN}")
+        print(f"{'статей в ленте':>15} {'без знаков, мс':>15} {'со знаками, мс':>15}")
+        results = []
+        for size in (50, 200, 1000):
+            full_ms, delta_ms = measure(size, tmp)
+            results.append((size, full_ms, delta_ms))
+            print(f"{size:>15} {full_ms:>15.2f} {delta_ms:>15.2f}")
+        check_retry(tmp)
+        check_overflow(tmp)
+    check_window()
+
+    # Без водяных знаков время растёт с размером ленты, с ними — почти нет
+    (_, small_full, small_delta), (_, big_full, big_delta) = results[0], results[-1]
+    assert big_full > small_full * 5
+    assert big_delta < big_full / 10
+    assert big_delta < small_delta * 5, "со знаками время растёт с размером ленты"
+    print(f"ускорение на ленте в {results[-1][0]} статей: {big_full / big_delta:.0f}x")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,96 @@
+# Локальный сервер, имитирующий Telegram Bot API: записывает время каждого сообщения
+# и умеет отвечать 429 (retry_after) и 502, как настоящий API под нагрузкой
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class FakeTelegram:
+    """
+    Сервер на 127.0.0.1. Адрес для telebot.apihelper.API_URL — api_url.
+    chat_interval: если в чат пишут чаще, отвечаем 429 с retry_after.
+    fail_every: каждый N-й запрос завершается ошибкой 502.
+    """
+
+    def __init__(self, chat_interval=0.0, retry_after=1, fail_every=0):
+        self.chat_interval = chat_interval
+        self.retry_after = retry_after
+        self.fail_every = fail_every
+        self.messages = []        # (chat_id, text, время)
+        self.rejected = []        # (chat_id, код ответа, время)
+        self._last = {}
+        self._requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self.do_POST()
+
+            def do_POST(self):
+                parts = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    params.update({k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()})
+                status, body = server.handle(parts.path.rsplit("/", 1)[-1], params)
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json" if status != 502 else "text/html")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def api_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/bot{{0}}/{{1}}"
+
+    def handle(self, method, params):
+        now = time.monotonic()
+        chat = params.get("chat_id", "")
+        with self._lock:
+            self._requests += 1
+            if self.fail_every and self._requests % self.fail_every == 0:
+                self.rejected.append((chat, 502, now))
+                return 502, b"<html>Bad Gateway</html>"
+            if method != "sendMessage":
+                return 200, {"ok": True, "result": True}
+            last = self._last.get(chat)
+            if self.chat_interval and last is not None and now - last < self.chat_interval:
+                self.rejected.append((chat, 429, now))
+                return 429, {"ok": False, "error_code": 429,
+                             "description": f"Too Many Requests: retry after {self.retry_after}",
+                             "parameters": {"retry_after": self.retry_after}}
+            self._last[chat] = now
+            self.messages.append((chat, params.get("text", ""), now))
+            message_id = len(self.messages)
+        return 200, {"ok": True, "result": {
+            "message_id": message_id, "date": int(time.time()),
+            "chat": {"id": -100, "type": "channel", "username": chat.lstrip("@")},
+            "text": params.get("text", ""),
+        }}
+
+    def intervals(self, chat):
+        """Паузы между соседними сообщениями в чат, с."""
+        times = [t for c, _, t in self.messages if c == chat]
+        return [b - a for a, b in zip(times, times[1:])]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,158 @@
+# Локальная замена RSS-источников для бенчмарков: отдаёт синтетические ленты с задержкой
+
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+WORDS = (
+    "ai model agent automation workflow image video music voice startup release "
+    "update research benchmark open source api telegram bot n8n zapier midjourney "
+    "sora runway suno elevenlabs github llm chatgpt claude gemini robot data cloud "
+    "нейросеть генерация изображений автоматизация агент бот обновление релиз"
+).split()
+
+
+def make_rss(name, entries=30, seed=None, now=None):
+    """Собирает RSS 2.0 ленту с entries статьями, новые сверху."""
+    rnd = random.Random(seed if seed is not None else name)
+    now = time.time() if now is None else now
+    items = []
+    for i in range(entries):
+        title = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(5, 10))).capitalize()
+        body = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(40, 120)))
+        link = f"https://{name}.example.com/articles/{i}"
+        pub = formatdate(now - i * rnd.randint(600, 7200), usegmt=True)
+        items.append(
+            f"<item><title>{escape(title)}</title><link>{link}</link>"
+            f"<guid>{link}</guid><pubDate>{pub}</pubDate>"
+            f"<description>{escape(body)}</description></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{name}</title><link>https://{name}.example.com/</link>"
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def make_feed(name, items, now=None):
+    """Собирает RSS 2.0 ленту из пар (заголовок, текст), новые сверху."""
+    now = time.time() if now is None else now
+    body = "".join(
+        f"<item><title>{escape(title)}</title><link>https://{name}.example.com/{i}</link>"
+        f"<guid>https://{name}.example.com/{i}</guid><pubDate>{formatdate(now - 600 * (i + 1), usegmt=True)}</pubDate>"
+        f"<description>{escape(summary)}</description></item>"
+        for i, (title, summary) in enumerate(items))
+    return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>{name}</title>'
+            f"{body}</channel></rss>").encode("utf-8")
+
+
+def run_bot_cycle(sites, directory, send=None, rate=None, **kwargs):
+    """
+    Один цикл бота (main.run_cycle) с состоянием в каталоге directory: HTTP-кэш,
+    журнал опубликованного и водяные знаки лент лежат там и переживают повторные
+    вызовы с тем же каталогом, как между запусками по cron.
+    send(chat, text) отправляет посты (по умолчанию они складываются в PostCapture),
+    rate — лимит сообщений в секунду (по умолчанию без ограничений).
+    Остальные аргументы передаются run_cycle (health, stories, workers, now).
+    Возвращает (send, сводка цикла из stats.summary()).
+    """
+    import main
+    from dedup_store import PublishedStore
+    from http_cache import HttpCache
+    from metrics import stats
+    from publisher import Publisher
+    from replay import PostCapture
+    from watermarks import WatermarkStore
+
+    os.makedirs(directory, exist_ok=True)
+    send = PostCapture() if send is None else send
+    rate = main.DRY_RUN_RATE if rate is None else rate
+    main.run_cycle(sites, HttpCache(os.path.join(directory, "http.json")),
+                   PublishedStore(os.path.join(directory, "published.log")),
+                   Publisher(send, global_rate=rate, chat_rate=rate, chat_burst=rate),
+                   WatermarkStore(os.path.join(directory, "watermarks.json")), **kwargs)
+    return send, stats.summary()
+
+
+class FeedServer:
+    """
+    HTTP-сервер на 127.0.0.1, отдающий заранее подготовленные ленты.
+    routes: {путь: (тело, задержка в секундах)} или (тело, задержка, пауза между байтами) —
+    такая лента отдаётся по байту, как у сервера, который тянет ответ.
+    """
+
+    def __init__(self, routes):
+        self.routes = dict(routes)
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                route = server.routes.get(self.path)
+                server.requests.append((self.path, dict(self.headers), time.monotonic()))
+                if route is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, delay = route[0], route[1]
+                trickle = route[2] if len(route) > 2 else 0
+                if delay:
+                    time.sleep(delay)
+                etag = '"%x"' % zlib.crc32(body)
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not trickle:
+                    self.wfile.write(body)
+                    return
+                try:
+                    for i in range(len(body)):
+                        self.wfile.write(body[i:i + 1])
+                        self.wfile.flush()
+                        time.sleep(trickle)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
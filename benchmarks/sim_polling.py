@@ -0,0 +1,235 @@
+# Симуляция опроса лент: ежечасный опрос (так бот работал раньше) против адаптивного
+# FeedScheduler. Адаптивный должен делать меньше запросов и доставлять статьи быстрее —
+# и в среднем, и по p95 задержки. Истории публикаций синтетические (пуассоновские потоки
+# с дневным ритмом), время подставляется в планировщик явно, поэтому две недели опроса
+# считаются за секунды. Кроме основной истории сравнение повторяется на SEEDS других.
+#
+# Те же проверки можно прогнать на записанных историях: архивах `main.py --record`
+# (даты статей в записанных лентах; архивы, записанные в разные дни, склеиваются)
+# или JSON вида {"feeds": {лента: {"weekly": false, "arrivals": [секунды эпохи, ...]}}}.
+# Один архив покрывает только последние статьи каждой ленты, поэтому сравнение идёт
+# на отрезке, за который записаны все ленты: для активных лент это часы, так что
+# архивы стоит записывать по cron хотя бы раз в несколько часов. Отрезок нужен не
+# короче MIN_RECORDED_DAYS: первые сутки адаптивный опрос только узнаёт ритм лент.
+#
+#   python benchmarks/sim_polling.py [feeds-1.zip feeds-2.zip ... | arrivals.json]
+
+import json
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import FeedScheduler, NEWS_INTERVAL, WEEKLY_INTERVAL
+
+HOUR = 3600
+DAY = 24 * HOUR
+DAYS = 14
+FEED_SIZE = 20          # Сколько последних статей отдаёт лента
+FRESH_WINDOW = DAY      # Окно свежести новостей в main.is_fresh
+SEEDS = range(1, 11)
+MIN_RECORDED_DAYS = 7
+
+# Имя ленты: (статей в час в среднем, еженедельная ли лента)
+FEEDS = {
+    "habr": (2.0, False),
+    "vc": (1.2, False),
+    "arstechnica": (0.4, False),
+    "neurohive": (0.08, False),
+    "letaibe": (0.03, False),
+    "the-batch": (1 / (7 * 24), True),
+}
+WEEKLY = {name for name, (_, weekly) in FEEDS.items() if weekly}
+
+
+def arrivals(rate, days, rnd):
+    """Пуассоновский поток с дневным ритмом: днём статей втрое больше, чем ночью."""
+    stamps, t = [], 0.0
+    peak = rate * 1.5
+    while True:
+        t += rnd.expovariate(peak / HOUR)
+        if t >= days * DAY:
+            return stamps
+        # Прореживание: интенсивность в момент t от rate/2 до rate*1.5
+        if rnd.random() < (1 + 0.5 * math.sin(2 * math.pi * t / DAY)) / 1.5:
+            stamps.append(t)
+
+
+def visible(history, now):
+    """Статьи, которые лента отдаёт в момент now (последние FEED_SIZE)."""
+    count = 0
+    while count < len(history) and history[count] <= now:
+        count += 1
+    return history[max(0, count - FEED_SIZE):count]
+
+
+def delays(history, polls):
+    """Задержка каждой статьи до первого опроса после её выхода; None — статья не попала в ленту."""
+    result, i = [], 0
+    for stamp in history:
+        while i < len(polls) and polls[i] < stamp:
+            i += 1
+        result.append(polls[i] - stamp if i < len(polls) else None)
+    return result
+
+
+def load_recorded(paths):
+    """
+    Истории публикаций из архивов FeedArchive или JSON с моментами выхода статей.
+    Возвращает (истории, еженедельные ленты, дней): время в историях отсчитывается
+    от начала отрезка, за который записаны все ленты, статьи раньше него отброшены.
+    В JSON отрезок задают ключи start и end, по умолчанию — от первой статьи до последней.
+    """
+    import main
+    from dates import entry_timestamp
+    from feed_parser import parse_feed
+    from replay import FeedArchive
+
+    feeds, weekly, starts, end = {}, set(), [], 0.0
+    for path in paths:
+        if path.endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                recorded = json.load(f)
+            moments = [stamp for feed in recorded["feeds"].values() for stamp in feed["arrivals"]]
+            starts.append(recorded.get("start", min(moments, default=0.0)))
+            end = max(end, recorded.get("end", max(moments, default=0.0)))
+            for name, feed in recorded["feeds"].items():
+                feeds.setdefault(name, {}).update((stamp, stamp) for stamp in feed["arrivals"])
+                if feed.get("weekly"):
+                    weekly.add(name)
+    # Архивы — от ранних к поздним, чтобы «первый архив» ленты был самым ранним
+    archives = sorted((FeedArchive(path) for path in paths if not path.endswith(".json")),
+                      key=lambda archive: archive.recorded_at)
+    for archive in archives:
+        end = max(end, archive.recorded_at)
+        for result in archive.replay():
+            if not result.content:
+                continue
+            # Ленту видно целиком с самой старой статьи в первом архиве, где она есть
+            first = not feeds.get(result.url)
+            stamps = feeds.setdefault(result.url, {})
+            for entry in parse_feed(result.content, result.url, result.headers):
+                published = entry_timestamp(entry, result.url)
+                if published is not None:
+                    stamps[main.get_entry_id(entry)] = published
+            if first and stamps:
+                starts.append(min(stamps.values()))
+            if result.url in main.WEEKLY_SITES:
+                weekly.add(result.url)
+    feeds = {name: sorted(stamps.values()) for name, stamps in feeds.items() if stamps}
+    if not feeds:
+        raise ValueError("в записях нет ни одной статьи с датой")
+    start = max(starts)
+    days = (end - start) / DAY
+    if days < MIN_RECORDED_DAYS:
+        raise ValueError(f"записи покрывают {max(days, 0) * 24:.1f} ч, нужно хотя бы {MIN_RECORDED_DAYS} дней")
+    histories = {name: [stamp - start for stamp in history if start <= stamp <= end]
+                 for name, history in feeds.items()}
+    return histories, weekly & set(histories), days
+
+
+def simulate_fixed(histories, interval, days=DAYS):
+    horizon = days * DAY
+    polls = [k * interval for k in range(int(horizon // interval) + 1)]
+    return {name: polls for name in histories}
+
+
+def simulate_adaptive(histories, seed=1, weekly=WEEKLY, days=DAYS):
+    intervals = {name: WEEKLY_INTERVAL if name in weekly else NEWS_INTERVAL for name in histories}
+    scheduler = FeedScheduler(intervals, now=0.0, rng=random.Random(seed))
+    polls = {name: [] for name in histories}
+    now = 0.0
+    while now <= days * DAY:
+        for name in scheduler.due(now):
+            polls[name].append(now)
+            scheduler.observe(name, visible(histories[name], now), now)
+            scheduler.mark_polled(name, now)
+        now = scheduler.next_wakeup()
+    return polls
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def measure(histories, polls, weekly=WEEKLY):
+    """(запросов, средняя задержка, p95 задержки, статей позже окна свежести)."""
+    requests = sum(len(p) for p in polls.values())
+    lags, missed = [], 0
+    for name, history in histories.items():
+        for lag in delays(history, polls[name]):
+            if lag is None:
+                continue
+            lags.append(lag)
+            if lag > FRESH_WINDOW and name not in weekly:
+                missed += 1
+    return requests, sum(lags) / len(lags), percentile(lags, 0.95), missed
+
+
+def report(title, result):
+    requests, mean, p95, missed = result
+    print(f"{title:<22} запросов: {requests:6d}  задержка: средняя {mean / 60:6.1f} мин, "
+          f"p95 {p95 / 60:6.1f} мин, устарело: {missed}")
+
+
+def make_histories(seed):
+    rnd = random.Random(seed)
+    return {name: arrivals(rate, DAYS, rnd) for name, (rate, _) in FEEDS.items()}
+
+
+def check(hourly, adaptive, label):
+    """Адаптивный опрос лучше ежечасного сразу по запросам, средней задержке и p95."""
+    for index, name in enumerate(("запросов", "средняя задержка", "p95 задержки")):
+        assert adaptive[index] < hourly[index], f"{label}: {name} не меньше, чем при ежечасном опросе"
+    assert adaptive[3] == 0, f"{label}: часть статей дошла позже окна свежести"
+
+
+def compare_recorded(paths):
+    histories, weekly, days = load_recorded(paths)
+    print(f"записано лент: {len(histories)}, на общем отрезке {days * 24:.1f} ч "
+          f"статей: {sum(map(len, histories.values()))}")
+    hourly = measure(histories, simulate_fixed(histories, HOUR, days), weekly)
+    polls = simulate_adaptive(histories, weekly=weekly, days=days)
+    adaptive = measure(histories, polls, weekly)
+    report("каждый час", hourly)
+    report("адаптивно", adaptive)
+    for name, history in histories.items():
+        print(f"  {name[:60]:<60} статей: {len(history):4d}, опросов: {len(polls[name]):4d}")
+    check(hourly, adaptive, "записанная история")
+
+
+def main():
+    if len(sys.argv) > 1:
+        compare_recorded(sys.argv[1:])
+        return
+    histories = make_histories(42)
+    print(f"лент: {len(FEEDS)}, дней: {DAYS}, статей: {sum(map(len, histories.values()))}")
+
+    hourly = measure(histories, simulate_fixed(histories, HOUR))
+    polls = simulate_adaptive(histories)
+    adaptive = measure(histories, polls)
+    report("каждый час", hourly)
+    report("адаптивно", adaptive)
+    for name in FEEDS:
+        print(f"  {name:<12} опросов в сутки: {len(polls[name]) / DAYS:5.1f}")
+    check(hourly, adaptive, "основная история")
+    print(f"против ежечасного опроса: запросов {adaptive[0] / hourly[0] - 1:+.0%}, "
+          f"средняя задержка {adaptive[1] / hourly[1] - 1:+.0%}, p95 {adaptive[2] / hourly[2] - 1:+.0%}")
+
+    ratios = []
+    for seed in SEEDS:
+        histories = make_histories(seed)
+        hourly = measure(histories, simulate_fixed(histories, HOUR))
+        adaptive = measure(histories, simulate_adaptive(histories))
+        check(hourly, adaptive, f"история {seed}")
+        ratios.append([adaptive[i] / hourly[i] for i in range(3)])
+    worst = [max(ratio[i] for ratio in ratios) for i in range(3)]
+    print(f"ещё {len(SEEDS)} историй, худший случай: запросов {worst[0] - 1:+.0%}, "
+          f"средняя задержка {worst[1] - 1:+.0%}, p95 {worst[2] - 1:+.0%}")
+
+
+if __name__ == "__main__":
+    main()
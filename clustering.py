@@ -0,0 +1,267 @@
+# Склейка почти одинаковых новостей из разных источников (SimHash + LSH)
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import defaultdict
+
+from metrics import log
+
+SIMHASH_BITS = 64
+MAX_DISTANCE = 4          # Максимальное расстояние Хэмминга между отпечатками дубликатов
+BANDS = MAX_DISTANCE + 1  # По принципу Дирихле дубликаты совпадут хотя бы в одной полосе
+TITLE_WEIGHT = 3          # Слова заголовка весят больше слов описания
+BODY_WORDS = 40           # Сколько первых слов описания учитываем
+BODY_CHARS = 600          # Дальше этого символа описание даже не токенизируем
+STORIES_PATH = os.getenv("STORIES_PATH", os.path.join(".cache", "stories.json"))
+STORY_TTL = 3 * 24 * 3600  # Сколько помним опубликованную новость: пересказы дольше не ходят по лентам
+MAX_STORIES = 5000         # Больше стольких последних новостей не храним
+
+_MASK = (1 << SIMHASH_BITS) - 1
+_BAND_BITS = SIMHASH_BITS // BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+_WORD_RE = re.compile(r"\w{3,}")
+
+# Служебные слова не говорят ничего о сюжете и только сближают разные новости
+STOP_WORDS = frozenset(
+    "the and for with that this from are was were has have its into about after over new "
+    "how why what will can just more than you your our their they his her not but all "
+    "read article source feed news story says said "
+    "для что это как его она они при или так уже все был была были нас вас под над "
+    "читать статью статья новость новости также может будет есть".split()
+)
+
+
+def _tokens(text, limit=None):
+    words = [w for w in _WORD_RE.findall(text) if w not in STOP_WORDS]
+    return words[:limit] if limit else words
+
+
+# Для SimHash нужно по каждому из 64 бит посчитать, у скольких слов он равен 1.
+# Каждое слово превращается в 512-битное число, где бит i хэша занимает
+# отдельный 8-битный «счётчик», — тогда сумма таких чисел по всем словам
+# даёт все 64 счётчика сразу одним sum() без цикла по битам.
+_LANE_BITS = 8
+_MAX_WORDS = (1 << _LANE_BITS) - 1
+_BYTE_SPREAD = [
+    sum(1 << (bit * _LANE_BITS) for bit in range(8) if value >> bit & 1)
+    for value in range(256)
+]
+_spread_cache = {}
+_threshold_tables = {}
+
+
+def _spread(word):
+    spread = _spread_cache.get(word)
+    if spread is None:
+        h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+        spread = 0
+        for k in range(SIMHASH_BITS // 8):
+            spread |= _BYTE_SPREAD[(h >> (8 * k)) & 0xFF] << (k * 8 * _LANE_BITS)
+        if len(_spread_cache) < 200_000:
+            _spread_cache[word] = spread
+    return spread
+
+
+def _spread_sum(words):
+    """Сумма разложенных хэшей слов; слова из кэша берутся без вызова _spread на каждое."""
+    try:
+        return sum(map(_spread_cache.__getitem__, words))
+    except KeyError:
+        return sum(map(_spread, words))
+
+
+def _threshold_table(count):
+    """Таблица для bytes.translate: счётчик -> b'1', если бит установлен у большинства слов."""
+    table = _threshold_tables.get(count)
+    if table is None:
+        table = bytes(ord("1") if value * 2 > count else ord("0") for value in range(256))
+        _threshold_tables[count] = table
+    return table
+
+
+def fingerprint(title, text):
+    """
+    64-битный SimHash заголовка и начала текста (всё в нижнем регистре).
+    Хэши слов стабильны между запусками и процессами.
+    """
+    title_words = _tokens(title)
+    body = text[len(title):len(title) + BODY_CHARS] if text.startswith(title) else text[:BODY_CHARS]
+    body_words = _tokens(body, BODY_WORDS)
+    count = len(title_words) * TITLE_WEIGHT + len(body_words)
+    if count > _MAX_WORDS:
+        # Очень длинный заголовок: счётчики не должны переполниться, лишние слова отбрасываем
+        words = (title_words * TITLE_WEIGHT + body_words)[:_MAX_WORDS]
+        total, count = _spread_sum(words), len(words)
+    else:
+        # Слова заголовка входят с весом TITLE_WEIGHT умножением суммы, а не повтором
+        total = _spread_sum(title_words) * TITLE_WEIGHT + _spread_sum(body_words)
+    if not count:
+        return 0
+    counters = total.to_bytes(SIMHASH_BITS * _LANE_BITS // 8, "little")
+    return int(counters.translate(_threshold_table(count))[::-1], 2)
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class _DisjointSet:
+    def __init__(self, size=0):
+        self.parent = list(range(size))
+
+    def append(self):
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+class ClusterIndex:
+    """
+    Группирует почти одинаковые статьи. Отпечаток каждой статьи раскладывается
+    по корзинам для каждой из BANDS полос, и статья сравнивается только с уже
+    добавленными статьями из тех же корзин, поэтому стоимость близка
+    к линейной, а не квадратичной. Статьи добавляются по одной;
+    порядок добавления не влияет на итоговые кластеры.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.prints = []
+        self.buckets = [defaultdict(list) for _ in range(BANDS)]
+        self.groups = _DisjointSet()
+        self.members = {}           # {корень кластера: [номера статей]}
+
+    def add(self, record):
+        """Добавляет статью; возвращает список статей её кластера (вместе с ней)."""
+        value = record.fingerprint = fingerprint(record.title.lower(), record.text)
+        i = self.groups.append()
+        self.records.append(record)
+        self.prints.append(value)
+        self.members[i] = [i]
+        if value:
+            for band, buckets in enumerate(self.buckets):
+                bucket = buckets[(value >> (band * _BAND_BITS)) & _BAND_MASK]
+                for j in bucket:
+                    if hamming(value, self.prints[j]) <= MAX_DISTANCE:
+                        self._union(i, j)
+                bucket.append(i)
+        return [self.records[j] for j in self.members[self.groups.find(i)]]
+
+    def clusters(self):
+        """Все кластеры — списки статей в порядке добавления — в порядке первой статьи."""
+        return [[self.records[j] for j in sorted(self.members[root])] for root in sorted(self.members)]
+
+    def _union(self, a, b):
+        a, b = self.groups.find(a), self.groups.find(b)
+        if a == b:
+            return
+        self.groups.union(a, b)
+        root, other = (a, b) if self.groups.find(a) == a else (b, a)
+        self.members[root].extend(self.members.pop(other))
+
+
+def representative(records, weights):
+    """
+    Статья, которая пойдёт в канал от кластера: из источника с наибольшим весом
+    weights[источник] (по умолчанию 1.0), при равенстве — более ранняя,
+    а при равных датах — добавленная раньше.
+    """
+    return min(records, key=lambda r: (-weights.get(r.source, 1.0), r.published is None, r.published or 0))
+
+
+class StoryLog:
+    """
+    Отпечатки новостей, опубликованных в прошлые циклы, по каналам. ClusterIndex
+    живёт один цикл, и без журнала та же новость из другого источника, пришедшая
+    циклом позже, ушла бы в канал ещё раз. Новость помнится не дольше ttl,
+    и хранятся только max_stories последних; поиск похожих идёт по тем же
+    полосам отпечатка, что и в ClusterIndex.
+    path=None — журнал только в памяти.
+    """
+
+    def __init__(self, path=STORIES_PATH, ttl=STORY_TTL, max_stories=MAX_STORIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_stories = max_stories
+        self.stories = []            # [отпечаток, канал, время публикации] в порядке публикации
+        self.buckets = [defaultdict(list) for _ in range(BANDS)]
+        self._dirty = False
+        if path is None:
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.stories = [[int(value), channel, float(stamp)] for value, channel, stamp in json.load(f)]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            log.warning("❗ Не удалось прочитать журнал новостей %s: %s", path, e)
+        self._prune(time.time())
+
+    def __len__(self):
+        return len(self.stories)
+
+    def channels(self, value, now=None):
+        """Каналы, в которые за последние ttl секунд ушла новость с похожим отпечатком value."""
+        if not value:
+            return set()
+        oldest = (now if now is not None else time.time()) - self.ttl
+        found = set()
+        for band, buckets in enumerate(self.buckets):
+            for story in buckets.get((value >> (band * _BAND_BITS)) & _BAND_MASK, ()):
+                if story[2] >= oldest and hamming(value, story[0]) <= MAX_DISTANCE:
+                    found.add(story[1])
+        return found
+
+    def add(self, channel, value, now=None):
+        """Запоминает, что новость с отпечатком value опубликована в канале channel."""
+        if not value:
+            return
+        story = [value, channel, now if now is not None else time.time()]
+        self.stories.append(story)
+        self._index(story)
+        self._dirty = True
+        if len(self.stories) > self.max_stories * 2:
+            self._prune(story[2])
+
+    def _index(self, story):
+        for band, buckets in enumerate(self.buckets):
+            buckets[(story[0] >> (band * _BAND_BITS)) & _BAND_MASK].append(story)
+
+    def _prune(self, now):
+        # Забываем устаревшие новости и самые старые сверх max_stories, корзины строим заново
+        oldest = now - self.ttl
+        kept = [story for story in self.stories if story[2] >= oldest][-self.max_stories:]
+        if len(kept) != len(self.stories):
+            self._dirty = True
+        self.stories = kept
+        self.buckets = [defaultdict(list) for _ in range(BANDS)]
+        for story in kept:
+            self._index(story)
+
+    def save(self):
+        """Атомарно записывает журнал на диск."""
+        if self.path is None or not self._dirty:
+            return
+        self._prune(time.time())
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.stories, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
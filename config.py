@@ -0,0 +1,227 @@
+# Настройки лент и каналов из config.toml с кэшем скомпилированного вида
+
+import hashlib
+import os
+import pickle
+from typing import NamedTuple
+
+from matcher import KeywordMatcher
+from metrics import log
+
+CONFIG_PATH = os.getenv("CONFIG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.toml"))
+CONFIG_CACHE_PATH = os.getenv("CONFIG_CACHE_PATH", os.path.join(".cache", "config.pickle"))
+CACHE_VERSION = 3          # Увеличивать при изменении Config, Feed, Channel или KeywordMatcher
+
+CADENCES = ("news", "weekly")
+DEFAULT_MAX_POSTS = 20
+DEFAULT_FRESH_DAYS = 1
+WEEKLY_FRESH_DAYS = 7
+
+
+class ConfigError(ValueError):
+    """Ошибка в файле настроек: путь к полю и что с ним не так."""
+
+
+class Feed(NamedTuple):
+    url: str
+    cadence: str = "news"            # news — опрос раз в час, weekly — раз в сутки
+    weight: float = 1.0              # Вес источника при ранжировании
+    fresh_days: float | None = None  # Окно свежести; None — окно канала
+
+
+class Channel(NamedTuple):
+    name: str
+    chat: str                        # @username канала или $ПЕРЕМЕННАЯ окружения с ним
+    keywords: tuple
+    max_posts: int = DEFAULT_MAX_POSTS
+    fresh_days: float = DEFAULT_FRESH_DAYS
+    digest: bool = False             # Публиковать статьи дайджестами по несколько в сообщении
+
+    @property
+    def username(self):
+        """Username канала в Telegram; переменная окружения читается при каждом обращении."""
+        if self.chat.startswith("$"):
+            return os.getenv(self.chat[1:])
+        return self.chat
+
+
+class Config:
+    """
+    Проверенные настройки: ленты, каналы и скомпилированный поиск ключевых слов.
+    Ленты и каналы хранятся в словарях по url и имени в порядке из файла.
+    """
+
+    def __init__(self, feeds, channels, digest=""):
+        self.feeds = {feed.url: feed for feed in feeds}
+        self.channels = {channel.name: channel for channel in channels}
+        self.digest = digest
+        self.matcher = KeywordMatcher({channel.name: channel.keywords for channel in channels})
+
+    @property
+    def sites(self):
+        return list(self.feeds)
+
+    def feed(self, url):
+        """Настройки ленты; для лент не из файла (тесты, бенчмарки) — значения по умолчанию."""
+        feed = self.feeds.get(url)
+        return feed if feed is not None else Feed(url)
+
+    def fresh_days(self, url, channel):
+        """Окно свежести в днях для статей ленты url в канале channel."""
+        feed = self.feed(url)
+        if feed.fresh_days is not None:
+            return feed.fresh_days
+        return self.channels[channel].fresh_days
+
+
+def _check_keys(table, allowed, where):
+    if not isinstance(table, dict):
+        raise ConfigError(f"{where}: ожидалась таблица")
+    unknown = set(table) - set(allowed)
+    if unknown:
+        raise ConfigError(f"{where}: неизвестные поля {', '.join(sorted(unknown))}")
+
+
+def _string(table, key, where, default=None):
+    value = table.get(key, default)
+    if not isinstance(value, str) or not value.strip():
+        raise ConfigError(f"{where}.{key}: нужна непустая строка")
+    return value.strip()
+
+
+def _number(table, key, where, default, kind=(int, float)):
+    value = table.get(key, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, kind) or value <= 0:
+        raise ConfigError(f"{where}.{key}: нужно положительное число, а не {value!r}")
+    return value
+
+
+def _flag(table, key, where, default=False):
+    value = table.get(key, default)
+    if not isinstance(value, bool):
+        raise ConfigError(f"{where}.{key}: нужно true или false, а не {value!r}")
+    return value
+
+
+def _keywords(table, where):
+    """Ключевые слова канала в нижнем регистре без повторов, в порядке из файла."""
+    keywords = table.get("keywords")
+    if not isinstance(keywords, list) or not keywords:
+        raise ConfigError(f"{where}.keywords: нужен непустой список строк")
+    result = {}
+    repeated = []
+    for i, keyword in enumerate(keywords):
+        if not isinstance(keyword, str) or not keyword.strip():
+            raise ConfigError(f"{where}.keywords[{i}]: нужна непустая строка")
+        keyword = keyword.strip().lower()
+        if keyword in result:
+            repeated.append(keyword)
+        result[keyword] = None
+    if repeated:
+        log.warning("⚠️ %s: повторяющиеся ключевые слова пропущены: %s", where, ", ".join(repeated))
+    return tuple(result)
+
+
+def parse_config(data, digest=""):
+    """
+    Проверяет разобранный TOML и собирает Config. Ошибки — ConfigError с путём
+    к полю; повторы лент и ключевых слов пропускаются с предупреждением.
+    """
+    _check_keys(data, ("feeds", "channels"), "config")
+    feeds = {}
+    for i, table in enumerate(data.get("feeds", [])):
+        where = f"feeds[{i}]"
+        _check_keys(table, Feed._fields, where)
+        url = _string(table, "url", where)
+        if not url.startswith(("http://", "https://")):
+            raise ConfigError(f"{where}.url: нужен адрес http(s), а не {url!r}")
+        if url in feeds:
+            log.warning("⚠️ %s: лента %s уже есть в настройках — повтор пропущен", where, url)
+            continue
+        cadence = table.get("cadence", "news")
+        if cadence not in CADENCES:
+            raise ConfigError(f"{where}.cadence: ожидалось одно из {', '.join(CADENCES)}, а не {cadence!r}")
+        feeds[url] = Feed(
+            url=url,
+            cadence=cadence,
+            weight=float(_number(table, "weight", where, 1.0)),
+            fresh_days=_number(table, "fresh_days", where,
+                               WEEKLY_FRESH_DAYS if cadence == "weekly" else None),
+        )
+
+    channels = {}
+    for i, table in enumerate(data.get("channels", [])):
+        where = f"channels[{i}]"
+        _check_keys(table, Channel._fields, where)
+        name = _string(table, "name", where)
+        if name in channels:
+            raise ConfigError(f"{where}.name: канал {name!r} уже описан")
+        channels[name] = Channel(
+            name=name,
+            chat=_string(table, "chat", where),
+            keywords=_keywords(table, where),
+            max_posts=_number(table, "max_posts", where, DEFAULT_MAX_POSTS, kind=int),
+            fresh_days=_number(table, "fresh_days", where, DEFAULT_FRESH_DAYS),
+            digest=_flag(table, "digest", where),
+        )
+
+    if not feeds:
+        raise ConfigError("config: не описано ни одной ленты [[feeds]]")
+    if not channels:
+        raise ConfigError("config: не описано ни одного канала [[channels]]")
+    return Config(feeds.values(), channels.values(), digest)
+
+
+def _read_cache(cache_path, digest):
+    try:
+        with open(cache_path, "rb") as f:
+            version, cached_digest, config = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError, ImportError):
+        return None
+    if version != CACHE_VERSION or cached_digest != digest:
+        return None
+    return config
+
+
+def _write_cache(cache_path, config):
+    """Атомарно сохраняет скомпилированные настройки; ошибка записи не мешает работе."""
+    try:
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((CACHE_VERSION, config.digest, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        log.warning("⚠️ Не удалось сохранить кэш настроек %s: %s", cache_path, e)
+
+
+def load_config(path=CONFIG_PATH, cache_path=CONFIG_CACHE_PATH):
+    """
+    Читает настройки из path. Скомпилированный вид (с деревом ключевых слов
+    KeywordMatcher) кэшируется в cache_path под SHA-256 содержимого файла,
+    поэтому пока файл не меняется, запуск не перекомпилирует ключевые слова.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if cache_path:
+        config = _read_cache(cache_path, digest)
+        if config is not None:
+            log.debug("Настройки %s загружены из кэша %s", path, cache_path)
+            return config
+    # tomllib нужен только при перекомпиляции, запуск из кэша его не загружает
+    import tomllib
+
+    try:
+        data = tomllib.loads(content.decode("utf-8"))
+    except (tomllib.TOMLDecodeError, UnicodeDecodeError) as e:
+        raise ConfigError(f"{path}: {e}") from e
+    config = parse_config(data, digest)
+    log.debug("Настройки %s скомпилированы: лент %d, каналов %d", path, len(config.feeds), len(config.channels))
+    if cache_path:
+        _write_cache(cache_path, config)
+    return config
@@ -0,0 +1,121 @@
+# Быстрое приведение дат из RSS к UTC (секунды эпохи) с памятью форматов по источникам
+
+import calendar
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# Форматы, которые встречаются в лентах помимо RFC 2822 и ISO 8601
+DATE_FORMATS = (
+    "%a, %d %b %Y %H:%M:%S %z",  # RFC 822 / RFC 1123
+    "%a, %d %b %Y %H:%M:%S %Z",  # Вариация RFC 822 с текстовой временной зоной
+    "%Y-%m-%dT%H:%M:%S%z",       # ISO 8601
+    "%Y-%m-%dT%H:%M:%SZ",        # ISO 8601 (UTC)
+    "%Y-%m-%dT%H:%M:%S.%f%z",    # ISO 8601 с миллисекундами
+    "%Y-%m-%dT%H:%M:%S.%fZ",     # ISO 8601 с миллисекундами (UTC)
+    "%Y-%m-%d %H:%M:%S",         # Простой формат
+    "%d %b %Y %H:%M:%S",         # Еще один распространенный формат
+    "%d %b %Y",                  # Только дата
+    "%Y-%m-%d",                  # Только дата (ISO)
+)
+
+# Индекс формата, который сработал для источника в прошлый раз
+_source_formats = {}
+
+# Специальные значения для _source_formats помимо индексов DATE_FORMATS
+_RFC2822 = -1
+_ISO = -2
+
+
+def _to_epoch(value):
+    """datetime -> секунды эпохи; дата без часового пояса считается UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _try_rfc2822(date_str):
+    # email.utils тянет за собой половину пакета email — загружаем при первой дате
+    import email.utils
+
+    # parsedate_tz не бросает исключений, а возвращает None
+    parsed = email.utils.parsedate_tz(date_str)
+    if parsed is None:
+        return None
+    if parsed[9] is None:
+        # Без смещения: считаем время указанным в UTC
+        parsed = parsed[:9] + (0,)
+    return float(email.utils.mktime_tz(parsed))
+
+
+def _try_iso(date_str):
+    if not date_str[:4].isdigit():
+        return None
+    try:
+        return _to_epoch(datetime.fromisoformat(date_str))
+    except ValueError:
+        return None
+
+
+def _try_format(date_str, index):
+    try:
+        return _to_epoch(datetime.strptime(date_str, DATE_FORMATS[index]))
+    except ValueError:
+        return None
+
+
+def _attempt(date_str, kind):
+    if kind == _RFC2822:
+        return _try_rfc2822(date_str)
+    if kind == _ISO:
+        return _try_iso(date_str)
+    return _try_format(date_str, kind)
+
+
+@lru_cache(maxsize=8192)
+def _parse(date_str, preferred):
+    """Разбирает строку, начиная с формата preferred; возвращает (секунды, формат)."""
+    order = [_RFC2822, _ISO] + list(range(len(DATE_FORMATS)))
+    if preferred is not None:
+        order.remove(preferred)
+        order.insert(0, preferred)
+    for kind in order:
+        value = _attempt(date_str, kind)
+        if value is not None:
+            return value, kind
+    return None, None
+
+
+def parse_date(date_str, source=None):
+    """
+    Превращает строку даты из ленты в секунды эпохи UTC или None.
+    Для каждого источника запоминается сработавший формат, и следующие даты
+    этого источника сначала пробуются именно им. Повторяющиеся строки
+    разбираются один раз.
+    """
+    if not date_str:
+        return None
+    date_str = date_str.strip()
+    value, kind = _parse(date_str, _source_formats.get(source))
+    if kind is not None and source is not None:
+        _source_formats[source] = kind
+    return value
+
+
+def entry_timestamp(entry, source=None):
+    """
+    Время публикации статьи feedparser в секундах эпохи UTC или None.
+    Поля *_parsed у feedparser уже приведены к UTC, поэтому переводим их
+    через calendar.timegm, а не через локальный time.mktime.
+    """
+    for field in ('published_parsed', 'updated_parsed'):
+        parsed = entry.get(field)
+        if parsed:
+            try:
+                return float(calendar.timegm(parsed))
+            except (TypeError, ValueError, OverflowError):
+                pass
+    for field in ('published', 'updated', 'pubDate'):
+        value = parse_date(entry.get(field), source)
+        if value is not None:
+            return value
+    return None
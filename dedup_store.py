@@ -0,0 +1,124 @@
+# Постоянное хранилище уже опубликованных статей: журнал на диске + индекс в памяти
+
+import os
+import time
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+STORE_PATH = os.getenv("PUBLISHED_STORE_PATH", os.path.join(".cache", "published.log"))
+TTL_DAYS = 30            # Сколько дней помним опубликованную статью
+
+# Параметры ссылок, которые не меняют статью, а только метят трафик
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "ref", "ref_src"}
+
+
+@lru_cache(maxsize=8192)
+def normalize_url(url):
+    """Приводит ссылку к каноничному виду, чтобы одна статья не публиковалась дважды."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = parts.query
+    if query:
+        query = urlencode(sorted(
+            (k, v) for k, v in parse_qsl(query, keep_blank_values=True)
+            if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+        ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme, host, path, query, ""))
+
+
+class PublishedStore:
+    """
+    Журнал опубликованных статей в формате `канал<TAB>ключ<TAB>время` по строке
+    на запись. При старте журнал целиком читается в словарь одним проходом,
+    поэтому проверка «уже публиковали?» — это O(1) поиск. Записи старше ttl
+    считаются отсутствующими, а при сохранении журнал переписывается без них,
+    когда мусора набирается больше половины живых записей.
+    """
+
+    def __init__(self, path=STORE_PATH, ttl=TTL_DAYS * 86400, now=None):
+        self.path = path
+        self.ttl = ttl
+        self.now = now
+        self._index = {}
+        self._pending = []
+        self._file_lines = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+        # "канал\tключ" -> время строкой; число разбираем только при проверке
+        self._index = dict(line.rpartition("\t")[::2] for line in lines)
+        self._file_lines = len(lines)
+
+    @staticmethod
+    def _keys(record):
+        keys = []
+        url = normalize_url(record.link)
+        if url:
+            keys.append(url)
+        if record.id and record.id not in (record.link, url):
+            keys.append(record.id)
+        # Табуляция и перевод строки — разделители журнала
+        return [key.replace("\t", " ").replace("\n", " ") for key in keys]
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def cutoff(self):
+        # В режиме демона хранилище живёт долго, поэтому граница TTL сдвигается со временем
+        return (time.time() if self.now is None else self.now) - self.ttl
+
+    def _is_alive(self, stamp):
+        try:
+            return float(stamp) >= self.cutoff
+        except ValueError:
+            return False
+
+    def contains(self, channel, record):
+        """Проверяет, публиковалась ли статья (по ссылке или id) в канале за последние ttl секунд."""
+        index = self._index
+        for key in self._keys(record):
+            stamp = index.get(channel + "\t" + key)
+            if stamp is not None and self._is_alive(stamp):
+                return True
+        return False
+
+    def add(self, channel, record, stamp=None):
+        """Запоминает публикацию; на диск попадёт при save()."""
+        stamp = "%.0f" % (time.time() if stamp is None else stamp)
+        for key in self._keys(record):
+            composite = channel + "\t" + key
+            self._index[composite] = stamp
+            self._pending.append(f"{composite}\t{stamp}\n")
+
+    def save(self):
+        """Дописывает новые записи в журнал или переписывает его без устаревших."""
+        if not self._pending and not self._file_lines:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        alive = {key: stamp for key, stamp in self._index.items() if self._is_alive(stamp)}
+        garbage = self._file_lines + len(self._pending) - len(alive)
+        if garbage > max(len(alive) // 2, 100):
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(f"{key}\t{stamp}\n" for key, stamp in alive.items())
+            os.replace(tmp_path, self.path)
+            self._index = alive
+            self._file_lines = len(alive)
+        elif self._pending:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(self._pending)
+            self._file_lines += len(self._pending)
+        self._pending = []
@@ -0,0 +1,225 @@
+# Параллельная загрузка RSS-лент с пулом keep-alive соединений на каждый хост
+
+import queue
+import socket
+import threading
+import time
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+# === Настройки загрузки ===
+FEED_TIMEOUT = 15        # Максимум секунд на одну ленту (соединение + чтение тела)
+TOTAL_TIMEOUT = 45       # Максимум секунд на всю стадию загрузки
+CONNECT_TIMEOUT = 5      # Таймаут установки соединения
+MAX_WORKERS = 16         # Сколько лент качаем одновременно
+POOL_SIZE = 4            # Сколько keep-alive соединений держим на один хост
+CHUNK_SIZE = 16 * 1024   # Тело читается не больше чем по стольку байт за одно чтение из сокета
+USER_AGENT = "Mozilla/5.0 (compatible; ai-news-bot/1.0; +https://t.me/natalialeaiart)"
+
+
+class FetchResult(NamedTuple):
+    """Результат загрузки одной ленты."""
+    url: str
+    content: bytes = b""
+    headers: dict = {}
+    status: int = 0
+    elapsed: float = 0.0
+    error: str = ""
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+
+# Одна сессия на хост: соединения переиспользуются между лентами одного сайта
+# и между запусками fetch_feeds() внутри одного процесса
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url):
+    """Возвращает сессию requests с пулом соединений для хоста из url."""
+    # requests загружается при первой загрузке ленты, а не при запуске бота
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    host = urlsplit(url).netloc.lower()
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _sessions[host] = session
+        return session
+
+
+def close_sessions():
+    """Закрывает все открытые соединения."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _socket(response):
+    """Сокет, из которого читается тело ответа, или None, если до него не добраться."""
+    return getattr(getattr(response.raw, "connection", None), "sock", None)
+
+
+def _abort(response):
+    """Обрывает соединение, из которого читается тело ответа: зависшее чтение сразу завершается."""
+    sock = _socket(response)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def fetch_feed(url, timeout=FEED_TIMEOUT, deadline=None, headers=None):
+    """
+    Скачивает одну ленту целиком.
+    timeout ограничивает всё время загрузки тела, а не только ожидание между пакетами:
+    тело читается по одному чтению из сокета, и перед каждым таймаут сокета
+    сокращается до остатка времени, так что сервер, отдающий ленту по байту,
+    не растянет загрузку.
+    deadline — абсолютный момент (time.monotonic()), после которого загрузка прерывается.
+    headers — дополнительные заголовки запроса (например, условные из HttpCache).
+    """
+    started = time.monotonic()
+    stop_at = started + timeout
+    if deadline is not None:
+        stop_at = min(stop_at, deadline)
+    try:
+        read_timeout = max(stop_at - started, 0.001)
+        response = get_session(url).get(
+            url,
+            headers=headers,
+            timeout=(min(CONNECT_TIMEOUT, read_timeout), read_timeout),
+            stream=True,
+        )
+        with response:
+            if response.status_code == 304:
+                return FetchResult(
+                    url=url,
+                    headers={k.lower(): v for k, v in response.headers.items()},
+                    status=304,
+                    elapsed=time.monotonic() - started,
+                )
+            response.raise_for_status()
+            read1 = getattr(response.raw, "read1", None)
+            watchdog = None
+            if read1 is None:
+                # Старый urllib3 (< 2.3) без read1: блок ждёт все свои байты, и таймаут сокета
+                # его не ограничивает, поэтому по истечении бюджета сокет закрывается из таймера
+                watchdog = threading.Timer(max(stop_at - time.monotonic(), 0), _abort, (response,))
+                watchdog.daemon = True
+                watchdog.start()
+            chunks = []
+            try:
+                while True:
+                    remaining = stop_at - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"лента не скачалась за {timeout} с")
+                    # Дочитанное соединение urllib3 сразу отдаёт в пул или закрывает, поэтому сокет — каждый раз заново
+                    sock = _socket(response)
+                    if sock is not None:
+                        sock.settimeout(remaining)
+                    try:
+                        if read1 is not None:
+                            # read1 — одно чтение из сокета, а не ожидание полного CHUNK_SIZE
+                            chunk = read1(CHUNK_SIZE, decode_content=True)
+                        else:
+                            chunk = response.raw.read(CHUNK_SIZE, decode_content=True)
+                    except Exception as e:
+                        if time.monotonic() >= stop_at:
+                            raise TimeoutError(f"лента не скачалась за {timeout} с") from e
+                        raise
+                    if not chunk:
+                        if watchdog is not None and time.monotonic() >= stop_at:
+                            raise TimeoutError(f"лента не скачалась за {timeout} с")
+                        break
+                    chunks.append(chunk)
+            finally:
+                if watchdog is not None:
+                    watchdog.cancel()
+            return FetchResult(
+                url=url,
+                content=b"".join(chunks),
+                headers={k.lower(): v for k, v in response.headers.items()},
+                status=response.status_code,
+                elapsed=time.monotonic() - started,
+            )
+    except Exception as e:
+        return FetchResult(url=url, elapsed=time.monotonic() - started, error=str(e) or type(e).__name__)
+
+
+def iter_feeds(urls, timeout=FEED_TIMEOUT, total_timeout=TOTAL_TIMEOUT, max_workers=MAX_WORKERS,
+               cache=None, timeouts=None):
+    """
+    Параллельно скачивает ленты и отдаёт FetchResult по мере готовности:
+    первая ответившая лента обрабатывается, пока остальные ещё качаются.
+    Ленты, не успевшие за total_timeout, отдаются в конце с ошибкой.
+    Если передан cache (HttpCache), запросы отправляются условными,
+    а ответы 304 помечаются в кэше.
+    timeouts — свои таймауты отдельных лент {url: секунды} вместо timeout.
+    """
+    timeouts = timeouts or {}
+    urls = list(urls)
+    if not urls:
+        return
+    deadline = time.monotonic() + total_timeout
+    tasks = queue.SimpleQueue()
+    for url in urls:
+        tasks.put((url, cache.request_headers(url) if cache is not None else None))
+    results = queue.SimpleQueue()
+
+    def work():
+        while True:
+            try:
+                url, headers = tasks.get_nowait()
+            except queue.Empty:
+                return
+            results.put(fetch_feed(url, timeouts.get(url, timeout), deadline, headers))
+
+    # Потоки-демоны: загрузка, которую уже не ждут, не задерживает выход из процесса
+    for number in range(min(max_workers, len(urls))):
+        threading.Thread(target=work, name=f"fetch-{number}", daemon=True).start()
+    pending = set(urls)
+    try:
+        while pending:
+            try:
+                result = results.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            pending.discard(result.url)
+            if cache is not None and result.not_modified:
+                cache.mark_not_modified(result.url)
+            yield result
+        for url in urls:
+            if url in pending:
+                yield FetchResult(url=url, elapsed=total_timeout,
+                                  error=f"общий таймаут загрузки {total_timeout} с")
+    finally:
+        # Ленты, которые ещё не начали качаться, больше не нужны; начатые прервутся по deadline
+        while True:
+            try:
+                tasks.get_nowait()
+            except queue.Empty:
+                break
+
+
+def fetch_feeds(urls, timeout=FEED_TIMEOUT, total_timeout=TOTAL_TIMEOUT, max_workers=MAX_WORKERS,
+                cache=None):
+    """
+    Параллельно скачивает все ленты.
+    Возвращает список FetchResult в том же порядке, что и urls, независимо
+    от того, какая лента ответила первой.
+    """
+    urls = list(urls)
+    order = {url: position for position, url in reversed(list(enumerate(urls)))}
+    results = iter_feeds(urls, timeout, total_timeout, max_workers, cache)
+    return sorted(results, key=lambda result: order[result.url])
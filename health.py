@@ -0,0 +1,183 @@
+# Здоровье лент: задержки, ошибки подряд и статьи за опрос, автомат отключения больных лент
+
+import json
+import math
+import os
+import time
+
+from fetcher import FEED_TIMEOUT
+from metrics import log
+
+HEALTH_PATH = os.getenv("HEALTH_PATH", os.path.join(".cache", "health.json"))
+
+SAMPLES = 20                 # Сколько последних опросов помним для перцентилей
+FAILURE_THRESHOLD = 3        # После стольких ошибок подряд лента отключается
+BASE_BACKOFF = 3600          # Первое отключение — на час
+MAX_BACKOFF = 24 * 3600      # Дальше каждое вдвое дольше, но не дольше суток
+PROBE_TIMEOUT = 5            # Пробный опрос отключённой ленты ждёт не дольше этого
+MIN_TIMEOUT = 5              # Таймаут здоровой ленты — TIMEOUT_FACTOR × p90 её задержки,
+TIMEOUT_FACTOR = 4           # но не меньше MIN_TIMEOUT и не больше FEED_TIMEOUT
+MIN_SAMPLES = 5              # Пока опросов меньше, таймаут ленты — FEED_TIMEOUT
+
+
+def percentile(values, q):
+    """Перцентиль q (0–100) методом ближайшего ранга; None для пустого списка."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(q / 100 * len(ordered)))) - 1]
+
+
+class FeedHealth:
+    """
+    Для каждой ленты хранит задержки и число статей последних SAMPLES опросов,
+    число ошибок подряд и момент, до которого лента отключена.
+    Ошибкой считается сбой загрузки, таймаут, пустой ответ или неразборчивая лента.
+    После FAILURE_THRESHOLD ошибок подряд лента не опрашивается BASE_BACKOFF секунд,
+    затем опрашивается пробно с коротким таймаутом; каждая следующая неудача
+    удваивает отключение (до MAX_BACKOFF), первый успех возвращает ленту в строй.
+    Так мёртвая лента добавляет к запуску не больше FEED_TIMEOUT, пока её не
+    отключили, и не больше PROBE_TIMEOUT потом.
+    path=None — показатели только в памяти (у шарда).
+    """
+
+    def __init__(self, path=HEALTH_PATH, threshold=FAILURE_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.feeds = {}
+        if path is None:
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.feeds = {url: self._state(state) for url, state in saved.items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            log.warning("❗ Не удалось прочитать здоровье лент %s: %s", path, e)
+
+    @staticmethod
+    def _state(saved=None):
+        saved = saved or {}
+        return {
+            "latency": list(saved.get("latency", [])),   # секунды, последние SAMPLES опросов
+            "entries": list(saved.get("entries", [])),   # статей за опрос, последние SAMPLES
+            "failures": saved.get("failures", 0),        # ошибок подряд
+            "open_until": saved.get("open_until"),       # до какого момента лента отключена
+            "fetches": saved.get("fetches", 0),
+            "errors": saved.get("errors", 0),
+            "last_error": saved.get("last_error"),
+        }
+
+    def _get(self, url):
+        state = self.feeds.get(url)
+        if state is None:
+            state = self.feeds[url] = self._state()
+        return state
+
+    def is_open(self, url, now=None):
+        """Лента отключена и срок пробного опроса ещё не наступил."""
+        state = self.feeds.get(url)
+        if not state or state["open_until"] is None:
+            return False
+        return (time.time() if now is None else now) < state["open_until"]
+
+    def allowed(self, urls, now=None):
+        """Ленты из urls, которые можно опрашивать, в том же порядке."""
+        now = time.time() if now is None else now
+        result = []
+        for url in urls:
+            if self.is_open(url, now):
+                log.info("⏸ Лента %s отключена после %d ошибок подряд, пробный опрос через %.0f мин",
+                         url, self.feeds[url]["failures"], (self.feeds[url]["open_until"] - now) / 60)
+                continue
+            result.append(url)
+        return result
+
+    def timeout(self, url):
+        """Таймаут загрузки ленты по её истории."""
+        state = self.feeds.get(url)
+        if not state:
+            return FEED_TIMEOUT
+        if state["failures"] >= self.threshold:
+            return PROBE_TIMEOUT
+        if len(state["latency"]) < MIN_SAMPLES:
+            return FEED_TIMEOUT
+        return min(FEED_TIMEOUT, max(MIN_TIMEOUT, percentile(state["latency"], 90) * TIMEOUT_FACTOR))
+
+    def timeouts(self, urls):
+        return {url: self.timeout(url) for url in urls}
+
+    def success(self, url, elapsed, entries=None):
+        """Лента ответила и разобралась; entries — None для ответа 304."""
+        state = self._get(url)
+        if state["open_until"] is not None:
+            log.info("✅ Лента %s снова отвечает", url)
+        state["fetches"] += 1
+        state["failures"] = 0
+        state["open_until"] = None
+        self._sample(state["latency"], round(elapsed, 3))
+        if entries is not None:
+            self._sample(state["entries"], entries)
+
+    def failure(self, url, elapsed, error, now=None):
+        """Загрузка или разбор ленты не удались."""
+        now = time.time() if now is None else now
+        state = self._get(url)
+        state["fetches"] += 1
+        state["errors"] += 1
+        state["failures"] += 1
+        state["last_error"] = error
+        self._sample(state["latency"], round(elapsed, 3))
+        if state["failures"] >= self.threshold:
+            backoff = min(BASE_BACKOFF * 2 ** (state["failures"] - self.threshold), MAX_BACKOFF)
+            state["open_until"] = now + backoff
+            log.warning("⏸ Лента %s отключена на %.0f мин: ошибок подряд %d",
+                        url, backoff / 60, state["failures"])
+
+    @staticmethod
+    def _sample(samples, value):
+        samples.append(value)
+        del samples[:-SAMPLES]
+
+    def summary(self, urls=None, now=None):
+        """Показатели лент для сводки запуска: перцентили задержки в мс, ошибки, статьи за опрос."""
+        now = time.time() if now is None else now
+        result = {}
+        for url in self.feeds if urls is None else urls:
+            state = self.feeds.get(url)
+            if not state:
+                continue
+            p50, p90 = percentile(state["latency"], 50), percentile(state["latency"], 90)
+            entries = state["entries"]
+            result[url] = {
+                "state": "open" if self.is_open(url, now) else
+                         "probe" if state["failures"] >= self.threshold else "ok",
+                "p50_ms": None if p50 is None else round(p50 * 1000),
+                "p90_ms": None if p90 is None else round(p90 * 1000),
+                "failures": state["failures"],
+                "error_rate": round(state["errors"] / state["fetches"], 3) if state["fetches"] else 0.0,
+                "entries_avg": round(sum(entries) / len(entries), 1) if entries else None,
+            }
+        return result
+
+    def export(self, urls):
+        """Показатели лент urls для передачи между шардом и координатором."""
+        return {url: self.feeds.get(url) for url in urls}
+
+    def merge(self, feeds):
+        """Принимает показатели лент от шарда (результат export)."""
+        for url, state in feeds.items():
+            if state is None:
+                self.feeds.pop(url, None)
+            else:
+                self.feeds[url] = self._state(state)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.feeds, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,120 @@
+# Кэш HTTP-валидаторов (ETag / Last-Modified) для условных запросов к RSS-лентам
+
+import json
+import os
+import time
+
+from metrics import log
+
+CACHE_PATH = os.getenv("HTTP_CACHE_PATH", os.path.join(".cache", "http_cache.json"))
+
+
+class HttpCache:
+    """
+    Хранит на диске для каждой ленты ETag и Last-Modified последнего полного ответа.
+    Валидаторы нового ответа откладываются (defer) и вступают в силу только
+    в commit(): пока судьба статей ленты не решена, лента должна прийти
+    целиком ещё раз, а не ответом 304.
+    path=None — кэш только в памяти (у шарда, которому состояние передаёт координатор).
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.feeds = {}
+        self.pending = {}        # {url: заголовки ответа}, ждут commit()
+        self.stats = {"hit": 0, "miss": 0, "not_modified": 0}
+        self._dirty = False
+        if path is None:
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.feeds = json.load(f)
+            # Кэш прежних версий хранил ещё и статьи лент — они не нужны
+            for state in self.feeds.values():
+                if state.pop("entries", None) is not None:
+                    self._dirty = True
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            log.warning("❗ Не удалось прочитать HTTP-кэш %s: %s", path, e)
+
+    def request_headers(self, url):
+        """Заголовки условного запроса для url; заодно считает hit/miss."""
+        cached = self.feeds.get(url)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        self.stats["hit" if headers else "miss"] += 1
+        return headers
+
+    def mark_not_modified(self, url):
+        """Сервер ответил 304: лента не менялась с прошлого запуска."""
+        self.stats["not_modified"] += 1
+        if url in self.feeds:
+            self.feeds[url]["checked_at"] = int(time.time())
+            self._dirty = True
+
+    def store(self, url, headers):
+        """Запоминает валидаторы ответа."""
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            # Без валидаторов условный запрос невозможен — хранить нечего
+            if self.feeds.pop(url, None) is not None:
+                self._dirty = True
+            return
+        self.feeds[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "checked_at": int(time.time()),
+        }
+        self._dirty = True
+
+    def defer(self, url, headers):
+        """Запоминает заголовки полного ответа ленты до commit()."""
+        self.pending[url] = {name: headers[name] for name in ("etag", "last-modified") if name in headers}
+
+    def commit(self, skip=()):
+        """
+        Сохраняет отложенные валидаторы всех лент, кроме skip; валидаторы
+        лент из skip забываются, и в следующий раз они скачаются целиком.
+        """
+        for url, headers in self.pending.items():
+            if url not in skip:
+                self.store(url, headers)
+        for url in skip:
+            # Старые валидаторы тоже нельзя оставлять: лента, вернувшаяся к прошлой
+            # версии, ответила бы 304, и отложенные статьи так и не вернулись бы
+            if self.feeds.pop(url, None) is not None:
+                self._dirty = True
+        self.pending = {}
+
+    def export(self, urls):
+        """Состояние лент urls для передачи шарду: {url: запись или None}."""
+        return {url: self.feeds.get(url) for url in urls}
+
+    def merge(self, feeds):
+        """Принимает состояние лент от шарда (результат export); None — записи нет."""
+        for url, state in feeds.items():
+            if state is None:
+                if self.feeds.pop(url, None) is not None:
+                    self._dirty = True
+            else:
+                self.feeds[url] = state
+                self._dirty = True
+
+    def save(self):
+        """Атомарно записывает кэш на диск."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.feeds, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -1,175 +1,175 @@
+import argparse
 import os
-import telebot
-import feedparser
+import signal
+import tempfile
+import threading
 import html
+import logging
 import re
 import time
 import random
-from datetime import datetime, timedelta
-import email.utils
+from datetime import datetime, timezone
+
+from clustering import ClusterIndex, StoryLog, representative
+from config import load_config
+from dates import entry_timestamp
+from dedup_store import PublishedStore
+from feed_parser import parse_feed
+from fetcher import close_sessions, fetch_feed, iter_feeds
+from health import FeedHealth
+from http_cache import HttpCache
+from metrics import log, setup_logging, stats
+from pipeline import Pipeline
+from publisher import Publisher
+from ranking import RankedQueue, score
+from records import EntryRecord
+from replay import FeedArchive, PostCapture
+from shards import ShardResult, ShardTask, partition
+from watermarks import WatermarkStore
+from scheduler import DUE_AHEAD, NEWS_INTERVAL, WEEKLY_INTERVAL, FeedScheduler
 
 # === Настройки ===
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-CHANNEL1_USERNAME = os.getenv("CHANNEL1_USERNAME")  # Канал для генерации контента
-CHANNEL2_USERNAME = os.getenv("CHANNEL2_USERNAME")  # Канал для автоматизации
-bot = telebot.TeleBot(TELEGRAM_BOT_TOKEN)
-
-# === Список сайтов ===
-SITES = [
-    # Англоязычные источники
-    'https://feeds.bbci.co.uk/news/technology/rss.xml',
-    'https://www.deeplearning.ai/the-batch/feed/',
-    'https://venturebeat.com/feed/',
-    'https://syncedreview.com/feed/',
-    'https://feeds.arstechnica.com/arstechnica/technology-lab',
-    'https://rss.beehiiv.com/feeds/2R3C6Bt5wj.xml',             # The Rundown AI
-    'https://artificialintelligence-news.com/feed/',
-    'https://www.geeky-gadgets.com/category/artificial-intelligence/feed/',  # была пропущена запятая
-
-    # Русскоязычные источники
-    'https://habr.com/ru/rss/interesting/',
-    'https://habr.com/ru/rss/hub/artificial_intelligence/',
-    'https://neurohive.io/ru/feed/',
-    'https://rb.ru/feeds/tag/ai/',
-    'https://vc.ru/rss/all',
-    'https://skillbox.ru/media/rss.xml',
-    'https://letaibe.media/feed/'
-]
-
-# Еженедельные источники — для них окно свежести 7 дней
-WEEKLY_SITES = {
-    'https://www.deeplearning.ai/the-batch/feed/',
-    'https://www.bensbites.com/feed',
-}
-
-# Импорт ключевых слов для каждого канала
-from keywords_channel1 import KEYWORDS_CHANNEL1
-from keywords_channel2 import KEYWORDS_CHANNEL2
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")  # Например, локальный сервер Bot API для тестов
+
+# Клиент Telegram создаётся при первой отправке (get_bot): запуск, которому
+# нечего публиковать, не загружает telebot и requests
+_bot = None
+_bot_lock = threading.Lock()
+
+# === Ленты и каналы ===
+# Описаны в config.toml; ключевые слова компилируются при первом запуске после
+# правки файла, а дальше берутся из кэша в .cache/
+CONFIG = load_config()
+
+SITES = CONFIG.sites
+
+# Еженедельные источники — опрашиваются реже, окно свежести у них 7 дней
+WEEKLY_SITES = {url for url, feed in CONFIG.feeds.items() if feed.cadence == "weekly"}
+
+# Каналы: внутреннее имя набора ключевых слов -> username канала в Telegram
+CHANNELS = [(channel.name, channel.username) for channel in CONFIG.channels.values()]
+
+# Предел длины сообщения Telegram (в символах UTF-16); по нему дайджест делится на сообщения
+MESSAGE_LIMIT = 4096
+
+# Символы, которые в MarkdownV2 нужно экранировать в тексте, и в адресе ссылки
+MARKDOWN_ESCAPES = str.maketrans({char: "\\" + char for char in "_*[]()~`>#+-=|{}.!\\"})
+LINK_ESCAPES = str.maketrans({char: "\\" + char for char in ")\\"})
+CONTROL_CHARS = re.compile(r'[\u0000-\u001F\u007F-\u009F]')
+
+# Сколько процессов-шардов качают, разбирают и маршрутизируют ленты; 1 — всё в одном процессе
+WORKERS = int(os.getenv("BOT_WORKERS", "1"))
+
+# Скорость «отправки» в пробных прогонах (record/replay): сообщений в секунду
+DRY_RUN_RATE = 1e6
+
+# Вес источника при ранжировании: URL ленты -> множитель очков (по умолчанию 1.0)
+SOURCE_WEIGHTS = {url: feed.weight for url, feed in CONFIG.feeds.items()}
+
+MATCHER = CONFIG.matcher
 
 # === Функции ===
-def fetch_rss(url):
-    """Получает и парсит RSS-ленту с указанного URL."""
-    feed = feedparser.parse(url)
-    print(f"Найдено статей на сайте {url}: {len(feed.entries)}")
+def fetch_rss(url, content=None, headers=None, cutoff=None):
+    """
+    Парсит RSS-ленту с указанного URL.
+    Если content не передан, лента сначала скачивается.
+    cutoff — время (секунды эпохи UTC), старше которого статьи не нужны:
+    быстрый разборщик перестаёт читать ленту, дойдя до них.
+    """
+    if content is None:
+        result = fetch_feed(url)
+        if result.error:
+            raise RuntimeError(result.error)
+        content, headers = result.content, result.headers
+    entries = parse_feed(content, url, headers, cutoff)
+    log.debug("Найдено статей на сайте %s: %d", url, len(entries))
     
     # Выводим информацию о первой статье для диагностики
-    if feed.entries and len(feed.entries) > 0:
-        entry = feed.entries[0]
-        print(f"Пример статьи с {url}:")
-        print(f"  Заголовок: {entry.title if 'title' in entry else 'Нет заголовка'}")
-        print(f"  Доступные поля даты:")
+    if entries and log.isEnabledFor(logging.DEBUG):
+        entry = entries[0]
+        log.debug("Пример статьи с %s:", url)
+        log.debug("  Заголовок: %s", entry.title if 'title' in entry else 'Нет заголовка')
+        log.debug("  Доступные поля даты:")
         for field in ['published', 'published_parsed', 'updated', 'updated_parsed']:
             if hasattr(entry, field):
-                print(f"    {field}: {getattr(entry, field)}")
-    
-    # Помечаем каждую статью источником, чтобы знать откуда она пришла
-    for entry in feed.entries:
-        entry['_source_url'] = url
-    return feed.entries
+                log.debug("    %s: %s", field, getattr(entry, field))
+    return entries
 
 def clean_text(text):
     """Очищает текст от HTML-сущностей и невидимых символов."""
     text = html.unescape(text)
-    text = re.sub(r'[\u0000-\u001F\u007F-\u009F]', '', text)
+    text = CONTROL_CHARS.sub('', text)
     return text.encode("utf-16", "surrogatepass").decode("utf-16")
 
-def is_relevant_for_channel(entry, channel_keywords):
-    """Проверяет, содержит ли статья ключевые слова для конкретного канала."""
+def get_entry_text(entry):
+    """Собирает текст статьи для поиска ключевых слов."""
     title = entry.title if 'title' in entry else ''
     description = entry.get('description', '')
     summary = entry.get('summary', '')
+    if summary == description:
+        # Разборщики отдают description и под именем summary — не храним текст дважды
+        summary = ''
     content = ''
     if 'content' in entry and isinstance(entry.content, list):
         content = ' '.join([c.value for c in entry.content if 'value' in c])
     
-    text = (title + ' ' + description + ' ' + summary + ' ' + content).lower()
-    return any(keyword.lower() in text for keyword in channel_keywords)
+    return title + ' ' + description + ' ' + summary + ' ' + content
 
-def parse_date_string(date_str):
-    """Пытается распарсить строку даты в различных форматах."""
-    try:
-        # RFC 2822 формат (наиболее распространенный в RSS)
-        return email.utils.parsedate_to_datetime(date_str)
-    except:
-        pass
-    
-    # Пробуем различные форматы дат
-    date_formats = [
-        "%a, %d %b %Y %H:%M:%S %z",  # RFC 822 / RFC 1123
-        "%a, %d %b %Y %H:%M:%S %Z",  # Вариация RFC 822 с текстовой временной зоной
-        "%Y-%m-%dT%H:%M:%S%z",       # ISO 8601
-        "%Y-%m-%dT%H:%M:%SZ",        # ISO 8601 (UTC)
-        "%Y-%m-%dT%H:%M:%S.%f%z",    # ISO 8601 с миллисекундами
-        "%Y-%m-%dT%H:%M:%S.%fZ",     # ISO 8601 с миллисекундами (UTC)
-        "%Y-%m-%d %H:%M:%S",         # Простой формат
-        "%d %b %Y %H:%M:%S",         # Еще один распространенный формат
-        "%d %b %Y",                  # Только дата
-        "%Y-%m-%d"                   # Только дата (ISO)
-    ]
-    
-    for fmt in date_formats:
-        try:
-            return datetime.strptime(date_str, fmt)
-        except:
-            continue
-    
-    return None
+def get_published_time(entry, source=None):
+    """Время публикации статьи в секундах эпохи UTC; None, если дату распознать не удалось."""
+    published = entry_timestamp(entry, source)
+    if published is not None and log.isEnabledFor(logging.DEBUG):
+        log.debug("⏰ Время публикации: %s UTC", f"{datetime.fromtimestamp(published, timezone.utc):%Y-%m-%d %H:%M:%S}")
+    return published
 
-def is_fresh(entry, days=1):
+def is_fresh(published_time, days=1, now=None):
     """
     Проверяет, является ли статья свежей.
+    published_time — секунды эпохи UTC из get_published_time().
     days=1 для ежедневных источников, days=7 для еженедельных.
     """
-    # Проверяем published_parsed (стандартное поле)
-    if hasattr(entry, 'published_parsed') and entry.published_parsed:
-        try:
-            published_time = datetime.fromtimestamp(time.mktime(entry.published_parsed))
-            print(f"⏰ Время публикации (published_parsed): {published_time} UTC")
-            return published_time >= datetime.utcnow() - timedelta(days=days)
-        except Exception as e:
-            print(f"❗ Ошибка при обработке published_parsed: {e}")
-    
-    # Проверяем updated_parsed (альтернативное поле)
-    if hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-        try:
-            updated_time = datetime.fromtimestamp(time.mktime(entry.updated_parsed))
-            print(f"⏰ Время обновления (updated_parsed): {updated_time} UTC")
-            return updated_time >= datetime.utcnow() - timedelta(days=days)
-        except Exception as e:
-            print(f"❗ Ошибка при обработке updated_parsed: {e}")
-    
-    # Проверяем строковые поля published или updated
-    date_str = None
-    if hasattr(entry, 'published'):
-        date_str = entry.published
-        print(f"⏰ Строка даты публикации: {date_str}")
-    elif hasattr(entry, 'updated'):
-        date_str = entry.updated
-        print(f"⏰ Строка даты обновления: {date_str}")
-    
-    if date_str:
-        date_obj = parse_date_string(date_str)
-        if date_obj:
-            print(f"⏰ Распарсенная дата: {date_obj} UTC")
-            return date_obj >= datetime.utcnow() - timedelta(days=days)
-    
-    # Если не удалось определить дату, проверяем поле pubDate (часто используется)
-    if hasattr(entry, 'pubDate'):
-        date_str = entry.pubDate
-        print(f"⏰ Строка pubDate: {date_str}")
-        date_obj = parse_date_string(date_str)
-        if date_obj:
-            print(f"⏰ Распарсенная дата из pubDate: {date_obj} UTC")
-            return date_obj >= datetime.utcnow() - timedelta(days=days)
-    
-    # Если не удалось определить дату, считаем статью свежей
-    print("❗ Не удалось определить дату публикации — считаем статью СВЕЖЕЙ")
-    return True
+    if published_time is None:
+        # Если не удалось определить дату, считаем статью свежей
+        log.debug("❗ Не удалось определить дату публикации — считаем статью СВЕЖЕЙ")
+        stats.count("entries_undated")
+        return True
+    if now is None:
+        now = time.time()
+    return published_time >= now - days * 86400
+
+def escape_markdown(text):
+    """Экранирует текст для MarkdownV2, чтобы символы из заголовка не стали разметкой."""
+    return text.translate(MARKDOWN_ESCAPES)
+
+def escape_link(url):
+    """Экранирует адрес для ссылки MarkdownV2 [текст](адрес)."""
+    return url.translate(LINK_ESCAPES)
+
+def render_title(record):
+    """
+    Очищенный и экранированный заголовок статьи. Считается один раз и
+    запоминается в записи: статья, подошедшая обоим каналам, не обрабатывается дважды.
+    """
+    if record.markup is None:
+        record.markup = escape_markdown(clean_text(record.title))
+    return record.markup
 
-def create_post(title, link):
+def create_post(record):
     """Создает текст поста для Telegram."""
-    safe_title = clean_text(title)
-    return f"\U0001F4C8 *{safe_title}*\n\n[Читать статью]({link})"
+    return f"\U0001F4C8 *{render_title(record)}*\n\n[Читать статью]({escape_link(record.link)})"
+
+def digest_line(record):
+    """Строка статьи в дайджесте: заголовок-ссылка."""
+    return f"\U0001F4C8 [{render_title(record)}]({escape_link(record.link)})"
+
+def create_digest(records):
+    """Собирает дайджест из нескольких статей одним сообщением."""
+    return "\n\n".join(digest_line(record) for record in records)
+
+def message_length(text):
+    """Длина сообщения так, как её считает Telegram: в символах UTF-16."""
+    return len(text.encode("utf-16-le")) // 2
 
 def get_entry_id(entry):
     """Получает уникальный идентификатор статьи."""
@@ -185,93 +185,669 @@ def get_entry_id(entry):
     # Если ничего нет, генерируем случайный id
     return f"unknown_{random.randint(1000, 9999)}"
 
-def process_entries_for_channel(entries, channel_keywords, channel_username, max_posts=20):
-    """Обрабатывает и публикует статьи для конкретного канала."""
-    relevant_entries = []
+def normalize_entry(entry, source=''):
+    """
+    Извлекает из разобранной статьи всё, что нужно дальше, в компактную запись.
+    source — URL ленты, из которой пришла статья.
+    """
+    title = entry.title if 'title' in entry else ''
+    return EntryRecord(
+        id=get_entry_id(entry),
+        title=title,
+        link=entry.get('link', ''),
+        source=source,
+        published=get_published_time(entry, source),
+        text=get_entry_text(entry).lower(),
+    )
+
+def route_records(records, channels, arrivals=None, watermarks=None, now=None):
+    """
+    Стадия маршрутизации: отдаёт (запись, каналы) для каждой подходящей статьи.
+    Каждая статья проверяется на дубликат один раз, текст
+    сканируется сразу по ключевым словам всех каналов, свежесть проверяется
+    только у статей, подошедших хотя бы одному каналу.
+    Если передан словарь arrivals, в него собираются времена публикации
+    всех статей по лентам — для расписания опроса.
+    Статьи, которые не попали ни в один канал, отмечаются в watermarks
+    как разобранные и в следующие запуски не рассматриваются.
+    now — момент, от которого отсчитывается свежесть (по умолчанию текущий).
+    """
+    if now is None:
+        now = time.time()
     
     # Создаем множество для отслеживания уже обработанных статей
     processed_entries = set()
+    windows_of = {}     # лента -> самое широкое окно свежести её каналов, в секундах
     
-    for entry in entries:
-        # Получаем уникальный идентификатор статьи
-        entry_id = get_entry_id(entry)
+    for record in records:
+        if arrivals is not None:
+            arrivals.setdefault(record.source, []).append(record.published)
         
         # Пропускаем статью, если она уже была обработана
-        if entry_id in processed_entries:
-            print(f"⚠️ Пропускаем дубликат: {entry.title if hasattr(entry, 'title') else 'Без заголовка'}")
+        if record.id in processed_entries:
+            log.debug("⚠️ Пропускаем дубликат: %s", record.title or 'Без заголовка')
+            stats.count("entries_duplicate")
             continue
+        processed_entries.add(record.id)
         
-        # Добавляем идентификатор в множество обработанных статей
-        processed_entries.add(entry_id)
+        if record.source not in windows_of:
+            windows_of[record.source] = max(CONFIG.fresh_days(record.source, channel)
+                                            for channel in CONFIG.channels) * 86400
+        if watermarks is not None and watermarks.is_old(record.source, record.published, record.id,
+                                                        windows_of[record.source]):
+            log.debug("⚠️ Пропускаем старую статью: %s", record.title or 'Без заголовка')
+            stats.count("entries_old")
+            watermarks.add(record.source, record.id, record.published)
+            continue
         
-        if is_relevant_for_channel(entry, channel_keywords):
-            source_url = entry.get('_source_url', '')
-            days = 7 if source_url in WEEKLY_SITES else 1
-            if is_fresh(entry, days=days):
-                relevant_entries.append(entry)
-    
-    print(f"\nВсего подходящих статей для канала {channel_username}: {len(relevant_entries)}")
-    
-    # Перемешиваем статьи для разнообразия
-    random.shuffle(relevant_entries)
+        # Один проход по тексту: заголовок идёт в нём первым, поэтому
+        # попадания в заголовок для ранжирования находятся заодно
+        record.hits, record.title_hits = MATCHER.match_title(record.text, len(record.title))
+        targets = [channel for channel in channels if channel in record.hits]
+        if targets:
+            stats.count("entries_matched")
+            # Окно свежести своё у каждого канала; дату проверяем один раз по самому широкому
+            windows = {channel: CONFIG.fresh_days(record.source, channel) for channel in targets}
+            if is_fresh(record.published, days=max(windows.values()), now=now):
+                if record.published is not None:
+                    targets = [channel for channel in targets
+                               if record.published >= now - windows[channel] * 86400]
+                if targets:
+                    stats.count("entries_fresh")
+                    yield record, targets
+                    continue
+        
+        # Статья никуда не подходит и в следующий раз не подойдёт
+        if watermarks is not None:
+            watermarks.add(record.source, record.id, record.published)
+
+def route_entries(records, channels, arrivals=None, watermarks=None):
+    """Распределяет статьи по каналам сразу целиком: {канал: список EntryRecord}."""
+    queues = {channel: [] for channel in channels}
+    for record, targets in route_records(records, channels, arrivals, watermarks):
+        for channel in targets:
+            queues[channel].append(record)
+    return queues
+
+def parse_results(results, http_cache, watermarks, arrivals, now=None, health=None):
+    """
+    Стадия разбора: превращает ответы лент в компактные записи EntryRecord
+    по мере их загрузки. Записи извлекаются сразу после разбора ленты, так что
+    объекты разборщика с полным HTML освобождаются, не дожидаясь
+    остальных лент. Ленты, не изменившиеся с прошлого запуска (ответ 304),
+    не разбираются вовсе, а статьи, разобранные в прошлые запуски, отсекаются
+    по водяным знакам ещё до разбора дат.
+    В arrivals заводится запись для каждой ленты, ответившей без ошибок.
+    Валидаторы ответа откладываются в http_cache до решения судьбы статей (см. run_cycle).
+    Успехи и ошибки лент (в том числе пустые ответы) учитываются в health.
+    """
+    if now is None:
+        now = time.time()
+    for result in results:
+        stats.feed(result.url, ms=round(result.elapsed * 1000, 1), bytes=len(result.content),
+                   status=result.status or None)
+        error = result.error or ("пустой ответ" if not result.content and not result.not_modified else "")
+        if error:
+            log.warning("❗ Ошибка при получении RSS с %s: %s", result.url, error)
+            stats.feed(result.url, error=error)
+            stats.count("fetch_errors")
+            if health is not None:
+                health.failure(result.url, result.elapsed, error)
+            continue
+        arrivals[result.url] = []
+        if result.not_modified:
+            log.debug("Лента %s не изменилась с прошлого запуска — новых статей нет", result.url)
+            stats.count("feeds_not_modified")
+            if health is not None:
+                health.success(result.url, result.elapsed)
+            continue
+        try:
+            days = max(CONFIG.fresh_days(result.url, channel) for channel in CONFIG.channels)
+            entries = fetch_rss(result.url, result.content, result.headers, cutoff=now - days * 86400)
+            http_cache.defer(result.url, result.headers)
+        except Exception as e:
+            log.warning("❗ Ошибка при разборе RSS с %s: %s", result.url, e)
+            stats.feed(result.url, error=str(e))
+            stats.count("parse_errors")
+            if health is not None:
+                health.failure(result.url, result.elapsed, str(e) or type(e).__name__)
+            continue
+        if health is not None:
+            health.success(result.url, result.elapsed, len(entries))
+        # Статьи, разобранные в прошлые запуски, дальше не идут
+        new_entries = watermarks.unseen(result.url, entries, get_entry_id)
+        stats.feed(result.url, entries=len(entries), new=len(new_entries))
+        stats.count("entries_parsed", len(entries))
+        stats.count("entries_seen", len(entries) - len(new_entries))
+        records = [normalize_entry(entry, result.url) for entry in new_entries]
+        del entries, new_entries
+        yield from records
+    stats.mark("last_feed")
+
+def collapse_clusters(pairs, candidates=None, stories=None, now=None):
+    """
+    Стадия склейки: одна и та же новость из разных источников превращается в один пост.
+    Статьи копятся, пока не придут все ленты цикла (без текста, он к этому моменту
+    уже не нужен): только тогда кластеры окончательны
+    и у всех статей кластера одинаковое record.duplicates — число других источников
+    той же новости, за которое статья получает очки при ранжировании. В каждый канал
+    от кластера уходит одна статья — из источника с наибольшим весом SOURCE_WEIGHTS,
+    при равных весах более ранняя (clustering.representative).
+    stories (StoryLog) — новости, опубликованные в прошлые циклы: в канал,
+    куда похожая новость уже ушла, кластер не попадает.
+    Все входящие статьи складываются в список candidates, если он передан.
+    """
+    index = ClusterIndex()
+    channels_of = {}
+    for record, targets in pairs:
+        if candidates is not None:
+            candidates.append(record)
+        index.add(record)
+        # Текст нужен только для поиска слов и отпечатка: до конца цикла копятся лёгкие записи
+        record.text = None
+        channels_of[id(record)] = targets
+    for cluster in index.clusters():
+        duplicates = len({member.source for member in cluster}) - 1
+        for member in cluster:
+            member.duplicates = duplicates
+        repeated = set()
+        if stories is not None:
+            for member in cluster:
+                repeated |= stories.channels(member.fingerprint, now)
+        picked = {}     # id статьи -> (статья, её каналы)
+        for channel in dict.fromkeys(channel for member in cluster for channel in channels_of[id(member)]):
+            if channel in repeated:
+                stats.count("stories_repeated")
+                continue
+            members = [member for member in cluster if channel in channels_of[id(member)]]
+            stats.count("near_duplicates", len(members) - 1)
+            best = representative(members, SOURCE_WEIGHTS)
+            picked.setdefault(id(best), (best, []))[1].append(channel)
+        yield from picked.values()
+
+def rank_posts(pairs, channel_queues, now=None):
+    """
+    Стадия ранжирования: считает очки статьи для каждого её канала и передаёт
+    её в RankedQueue канала. Статьи приходят сюда после склейки, когда
+    record.duplicates уже окончательное, а публикация начинается, когда
+    очереди заполнены, так что порядок и выбор max_posts постов определяются
+    очками всех кандидатов цикла, а не случайностью.
+    """
+    if now is None:
+        now = time.time()
+    for record, targets in pairs:
+        weight = SOURCE_WEIGHTS.get(record.source, 1.0)
+        for channel in targets:
+            window = CONFIG.fresh_days(record.source, channel) * 86400
+            channel_queues[channel].put(record, score(record, channel, now, weight, window))
+        yield record, targets
+
+def get_bot():
+    """Возвращает клиент Telegram, при первом вызове загружает telebot и создаёт его."""
+    global _bot
+    with _bot_lock:
+        if _bot is None:
+            import telebot
+            if TELEGRAM_API_URL:
+                telebot.apihelper.API_URL = TELEGRAM_API_URL
+            _bot = telebot.TeleBot(TELEGRAM_BOT_TOKEN)
+        return _bot
+
+def send_post(channel_username, post):
+    """Отправляет готовый пост в канал."""
+    get_bot().send_message(channel_username, post, parse_mode="MarkdownV2", disable_web_page_preview=False)
+
+def publish_records(records, post, channel, channel_username, published_store, publisher):
+    """
+    Отправляет одно сообщение с постом или дайджестом статей records.
+    Возвращает, сколько статей опубликовано: все или ни одной.
+    """
+    try:
+        log.debug("Готовый пост для канала %s:\n%s", channel_username, post)
+        publisher.send(channel_username, post)
+    except Exception as e:
+        log.error("❗ Ошибка отправки в Telegram: %s", e)
+        stats.count("publish_errors")
+        return 0
+    if len(records) == 1:
+        log.info("✅ Опубликовано в %s: %s", channel_username, records[0].title)
+    else:
+        log.info("✅ Опубликован дайджест в %s: статей %d", channel_username, len(records))
+    stats.count("published", len(records))
+    stats.mark("first_post")
+    # Запоминаем публикацию, чтобы не повторить её ни сейчас, ни в следующие запуски
+    for record in records:
+        published_store.add(channel, record)
+    return len(records)
+
+def publish_entries(records, channel, channel_username, published_store, publisher, max_posts=20,
+                    digest=False, failed=None):
+    """
+    Публикует статьи в конкретный канал по мере их поступления через publisher,
+    который сам выдерживает паузы между сообщениями и повторяет отправку.
+    records — любой поток статей, например заполненная RankedQueue канала.
+    Статьи, уже опубликованные в этом канале (в том числе в прошлые запуски),
+    пропускаются по published_store. После max_posts публикаций поток больше
+    не читается: остальные кандидаты канала всё равно не будут опубликованы.
+    digest=True собирает статьи в дайджесты: сообщение уходит, когда следующая
+    статья в него уже не помещается (MESSAGE_LIMIT), и в конце потока.
+    Статьи, которые не удалось отправить, добавляются в список failed, если он передан.
+    """
+    count = relevant = skipped = 0
+    batch = []           # Статьи следующего дайджеста
+    size = 0             # Его длина в символах UTF-16
     
-    # Создаем множество для отслеживания опубликованных статей
-    published_urls = set()
+    def send(batch, post):
+        sent = publish_records(batch, post, channel, channel_username, published_store, publisher)
+        if not sent and failed is not None:
+            failed.extend(batch)
+        return sent
     
-    count = 0
-    for entry in relevant_entries:
-        if count >= max_posts:
+    for record in records:
+        if count + len(batch) >= max_posts:
             break
-        
-        url = entry.link
-        
-        # Пропускаем статью, если она уже была опубликована
-        if url in published_urls:
-            print(f"⚠️ Пропускаем уже опубликованную статью: {entry.title}")
+        # Пропускаем статью, если она уже была опубликована (например, пришла из двух лент)
+        if published_store.contains(channel, record):
+            log.debug("⚠️ Пропускаем уже опубликованную статью: %s", record.title)
+            skipped += 1
             continue
+        relevant += 1
         
-        title = entry.title
-        post = create_post(title, url)
-        
-        try:
-            print(f"\nГотовый пост для канала {channel_username}:\n{post}")
-            bot.send_message(channel_username, post, parse_mode="Markdown", disable_web_page_preview=False)
-            print(f"✅ Опубликовано в {channel_username}: {title}")
-            
-            # Добавляем URL в множество опубликованных статей
-            published_urls.add(url)
-            
-            count += 1
-            time.sleep(1)
-        except Exception as e:
-            print(f"❗ Ошибка отправки в Telegram: {e}")
+        if not digest:
+            count += send([record], create_post(record))
+            continue
+        # Статьи в дайджесте разделены пустой строкой
+        length = message_length(digest_line(record)) + (2 if batch else 0)
+        if batch and size + length > MESSAGE_LIMIT:
+            count += send(batch, create_digest(batch))
+            batch, size, length = [], 0, length - 2
+        batch.append(record)
+        size += length
+    if batch:
+        count += send(batch, create_digest(batch))
+    
+    stats.count("already_published", skipped)
+    log.info("Рассмотрено статей для канала %s: %d (уже публиковались ранее: %d)",
+             channel_username, relevant, skipped)
+    log.info("Опубликовано статей в канале %s: %d", channel_username, count)
+    return count
+
+def mark_decided(candidates, failed, published_store, watermarks):
+    """
+    Отмечает в watermarks статьи-кандидаты, судьба которых решена: опубликованы,
+    отброшены как дубликаты или не вошли в лучшие max_posts канала.
+    Статьи, которые не удалось отправить (failed: {канал: статьи}), откладываются
+    (watermarks.hold) и будут рассмотрены в следующий раз.
+    Возвращает множество лент, у которых остались отложенные статьи.
+    """
+    targets = {}
+    for channel, records in failed.items():
+        for record in records:
+            targets.setdefault(id(record), []).append(channel)
+    undecided = set()
+    for record in candidates:
+        channels = targets.get(id(record), ())
+        if all(published_store.contains(channel, record) for channel in channels):
+            watermarks.add(record.source, record.id, record.published)
+        else:
+            watermarks.hold(record.source, record.id)
+            undecided.add(record.source)
+    return undecided
+
+def run_shard(task):
+    """
+    Работа шарда в отдельном процессе: загрузка, разбор и маршрутизация
+    лент task.urls. Состояние лент приходит в задании и возвращается
+    обновлённым в ShardResult; склейка, ранжирование и публикация
+    остаются координатору.
+    """
+    stats.reset()
+    http_cache, watermarks, health = HttpCache(None), WatermarkStore(None), FeedHealth(None)
+    http_cache.merge(task.http_cache)
+    watermarks.merge(task.watermarks)
+    health.merge(task.health)
+    arrivals = {}
+    channels = [channel for channel, _ in CHANNELS]
+    pipeline = Pipeline([
+        ("parse", lambda results: parse_results(results, http_cache, watermarks, arrivals, task.now, health)),
+        ("route", lambda records: route_records(records, channels, arrivals, watermarks, task.now)),
+    ])
+    pairs = list(pipeline.run(iter_feeds(task.urls, cache=http_cache, timeouts=task.timeouts), name="fetch"))
+    for stage, ms in pipeline.stage_ms().items():
+        stats.add_time(stage, ms)
+    return ShardResult(
+        shard=task.shard,
+        pairs=pairs,
+        arrivals=arrivals,
+        http_cache=http_cache.export(task.urls),
+        validators=dict(http_cache.pending),
+        watermarks=watermarks.export(task.urls),
+        health=health.export(task.urls),
+        http_stats=dict(http_cache.stats),
+        summary=stats.summary(),
+        items=dict(pipeline.counts),
+    )
+
+def shard_pairs(urls, workers, http_cache, watermarks, health, timeouts, arrivals, counts, now=None):
+    """
+    Источник конвейера в режиме шардов: ленты делятся между workers процессами
+    по хэшу адреса, и каждый процесс загружает, разбирает и маршрутизирует
+    свои ленты (run_shard). Координатор по мере готовности шардов принимает
+    обновлённое состояние их лент и отдаёт статьи дальше — на склейку,
+    ранжирование и публикацию. Статья с id, уже пришедшим из другого шарда
+    (одна статья в двух лентах), отбрасывается.
+    В counts складывается, сколько элементов отдала каждая стадия шардов.
+    """
+    tasks = [
+        ShardTask(shard=shard, urls=shard_urls, http_cache=http_cache.export(shard_urls),
+                  watermarks=watermarks.export(shard_urls),
+                  health=health.export(shard_urls) if health is not None else {},
+                  timeouts=timeouts or {}, now=now)
+        for shard, shard_urls in enumerate(partition(urls, workers)) if shard_urls
+    ]
+    if not tasks:
+        return
+    # Процессы нужны только в режиме шардов, обычный запуск их не загружает
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
     
-    print(f"Опубликовано статей в канале {channel_username}: {count}")
+    seen = set()
+    # spawn: процессы шардов не наследуют потоки публикации и соединения координатора
+    with ProcessPoolExecutor(max_workers=len(tasks), mp_context=multiprocessing.get_context("spawn"),
+                             initializer=setup_logging) as executor:
+        futures = {executor.submit(run_shard, task): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                log.error("❗ Шард %d (лент: %d) завершился с ошибкой: %s", task.shard, len(task.urls), e)
+                stats.count("shard_errors")
+                continue
+            http_cache.merge(result.http_cache)
+            http_cache.pending.update(result.validators)
+            watermarks.merge(result.watermarks)
+            if health is not None:
+                health.merge(result.health)
+            for key, value in result.http_stats.items():
+                http_cache.stats[key] = http_cache.stats.get(key, 0) + value
+            stats.merge(result.summary)
+            arrivals.update(result.arrivals)
+            for stage, count in result.items.items():
+                counts[stage] = counts.get(stage, 0) + count
+            log.debug("Шард %d: лент %d, статей для каналов %d", result.shard, len(task.urls), len(result.pairs))
+            for record, targets in result.pairs:
+                if record.id in seen:
+                    log.debug("⚠️ Пропускаем дубликат из другого шарда: %s", record.title or 'Без заголовка')
+                    stats.count("entries_duplicate")
+                    continue
+                seen.add(record.id)
+                yield record, targets
+    stats.mark("last_feed")
 
-def main():
-    """Основная функция бота."""
-    print("=== Запуск бота ===")
+def run_cycle(sites, http_cache, published_store, publisher, watermarks, fetch=iter_feeds, now=None,
+              health=None, workers=1, stories=None):
+    """
+    Один цикл работы: скачать ленты sites, отобрать статьи и опубликовать их.
+    Стадии связаны в потоковый конвейер (загрузка → разбор → маршрутизация →
+    склейка → ранжирование): ленты разбираются по мере ответа, пока остальные
+    ещё качаются. Склейка ждёт все ленты, чтобы у каждой новости были учтены
+    все источники, а публикация начинается, когда очки посчитаны у всех
+    кандидатов: в канал уходят лучшие max_posts статей цикла, и результат не
+    зависит от того, какая лента ответила первой.
+    Кэш, хранилище опубликованного, publisher и водяные знаки лент передаются
+    снаружи, чтобы в режиме демона они жили между циклами.
+    fetch(sites, cache, timeouts) отдаёт ответы лент (по умолчанию iter_feeds — из сети),
+    now — момент, от которого отсчитывается свежесть статей; оба параметра
+    нужны для воспроизведения записанных лент (replay).
+    health (FeedHealth) отключает ленты, которые раз за разом не отвечают,
+    и задаёт каждой ленте таймаут по её истории.
+    stories (StoryLog) помнит отпечатки опубликованных новостей между циклами,
+    чтобы пересказ уже вышедшей новости из другой ленты не публиковался снова.
+    workers > 1 включает режим шардов (shard_pairs): загрузку, разбор и
+    маршрутизацию выполняют workers процессов, а этот процесс — координатор —
+    склеивает дубликаты по всем лентам сразу, ранжирует, публикует и хранит
+    всё состояние. fetch в этом режиме не используется: шарды качают ленты сами.
+    Возвращает {url: времена публикации статей} для лент, ответивших без ошибок
+    (у неизменившихся лент список пуст).
+    """
+    arrivals = {}
+    stats.reset()
+    publisher.reset_stats()
+    # Валидаторы прошлого цикла, прерванного ошибкой, не сохраняются: его статьи не разобраны
+    http_cache.pending = {}
+    polled = sites
+    timeouts = None
+    if health is not None:
+        # Отключённые ленты не опрашиваются до срока пробного опроса
+        polled = health.allowed(sites)
+        stats.count("feeds_skipped", len(sites) - len(polled))
+        timeouts = health.timeouts(polled)
+    channels = [channel for channel, _ in CHANNELS]
+    candidates = []
+    queued = {channel: [] for channel in channels}
+    failed = {channel: [] for channel in channels}
     
-    # Собираем все статьи из всех источников
-    all_entries = []
-    for site in SITES:
+    # Каналы публикуются параллельно, по потоку на канал; лимиты Telegram соблюдает Publisher
+    channel_queues = {channel: RankedQueue(CONFIG.channels[channel].max_posts) for channel in channels}
+    jobs = {
+        channel: (lambda channel=channel, channel_username=channel_username:
+                  publish_entries(channel_queues[channel], channel, channel_username,
+                                  published_store, publisher, CONFIG.channels[channel].max_posts,
+                                  CONFIG.channels[channel].digest, failed[channel]))
+        for channel, channel_username in CHANNELS
+    }
+    shard_counts = {}
+    if workers > 1:
+        # Загрузка, разбор и маршрутизация — в процессах шардов, остальное — здесь
+        source = shard_pairs(polled, workers, http_cache, watermarks, health, timeouts, arrivals,
+                             shard_counts, now)
+        stages, source_name = [], "shards"
+    else:
+        source = fetch(polled, cache=http_cache, timeouts=timeouts)
+        stages, source_name = [
+            ("parse", lambda results: parse_results(results, http_cache, watermarks, arrivals, now, health)),
+            ("route", lambda records: route_records(records, channels, arrivals, watermarks, now)),
+        ], "fetch"
+    pipeline = Pipeline(stages + [
+        ("cluster", lambda pairs: collapse_clusters(pairs, candidates, stories, now)),
+        ("rank", lambda pairs: rank_posts(pairs, channel_queues, now)),
+    ])
+    try:
+        # Ленты приходят в порядке готовности; неизменившиеся (ответ 304) не скачиваются
+        for record, targets in pipeline.run(source, name=source_name):
+            for channel in targets:
+                queued[channel].append(record)
+    finally:
+        # Все кандидаты цикла в очередях: потоки публикации разбирают их по убыванию очков
         try:
-            entries = fetch_rss(site)
-            all_entries.extend(entries)
-        except Exception as e:
-            print(f"❗ Ошибка при получении RSS с {site}: {e}")
+            with stats.timer("publish"):
+                publisher.run(jobs)
+        finally:
+            # Сохраняем даже при сбое, чтобы не повторить уже отправленные посты
+            try:
+                published_store.save()
+            except OSError as e:
+                log.error("❗ Не удалось сохранить список опубликованных статей: %s", e)
     
-    print(f"\nВсего найдено статей: {len(all_entries)}")
+    log.info("Всего найдено новых статей: %d", pipeline.counts.get("parse", shard_counts.get("parse", 0)))
+    undecided = mark_decided(candidates, failed, published_store, watermarks)
+    if stories is not None:
+        stamp = now if now is not None else time.time()
+        for channel, records in queued.items():
+            for record in records:
+                if published_store.contains(channel, record):
+                    stories.add(channel, record.fingerprint, stamp)
+    # Лента с отложенными статьями должна в следующий раз прийти целиком, а не ответом 304
+    http_cache.commit(skip=undecided)
+    for name, storage in (("HTTP-кэш", http_cache), ("водяные знаки лент", watermarks),
+                          ("здоровье лент", health), ("журнал новостей", stories)):
+        if storage is None:
+            continue
+        try:
+            storage.save()
+        except OSError as e:
+            log.error("❗ Не удалось сохранить %s: %s", name, e)
     
-    # Обработка для канала 1 (генерация контента)
-    print("\n=== Обработка для канала генерации контента ===")
-    process_entries_for_channel(all_entries, KEYWORDS_CHANNEL1, CHANNEL1_USERNAME)
+    for stage, ms in pipeline.stage_ms().items():
+        stats.add_time(stage, ms)
+    stats.set("pipeline", pipeline.summary())
+    if workers > 1:
+        stats.set("shards", {"workers": workers, "items": shard_counts})
+    stats.set("http_cache", dict(http_cache.stats))
+    stats.set("telegram", dict(publisher.stats))
+    stats.set("channels", {channel: len(queued[channel]) for channel in channels})
+    if health is not None:
+        stats.set("health", health.summary(sites))
+    stats.emit()
+    http_cache.stats = dict.fromkeys(http_cache.stats, 0)
+    return arrivals
+
+def make_scheduler():
+    """Расписание опроса всех SITES с состоянием прошлых запусков."""
+    scheduler = FeedScheduler({
+        site: WEEKLY_INTERVAL if site in WEEKLY_SITES else NEWS_INTERVAL
+        for site in SITES
+    })
+    scheduler.load()
+    return scheduler
+
+def update_schedule(scheduler, polled, arrivals):
+    """Учитывает результаты опроса и планирует следующие опросы лент."""
+    now = time.time()
+    for site in polled:
+        if site in arrivals:
+            scheduler.observe(site, arrivals[site], now)
+        scheduler.mark_polled(site, now)
+        log.debug("Следующий опрос %s через %.0f мин", site, (scheduler.next_due[site] - now) / 60)
+    try:
+        scheduler.save()
+    except OSError as e:
+        log.error("❗ Не удалось сохранить расписание опроса: %s", e)
+
+def main(workers=WORKERS):
+    """
+    Основная функция бота: один проход по источникам, которым подошёл срок опроса.
+    Ленты, срок которых наступит в ближайшие DUE_AHEAD секунд, тоже опрашиваются,
+    чтобы при запуске по cron не ждать лишний период.
+    workers > 1 делит ленты между процессами-шардами (см. run_cycle).
+    """
+    setup_logging()
+    log.info("=== Запуск бота ===")
+    scheduler = make_scheduler()
+    due = scheduler.due(time.time() + DUE_AHEAD)
+    log.info("Лент к опросу: %d из %d", len(due), len(SITES))
+    if due:
+        published_store = PublishedStore()
+        log.debug("Загружено записей об опубликованных статьях: %d", len(published_store))
+        arrivals = run_cycle(due, HttpCache(), published_store, Publisher(send_post), WatermarkStore(),
+                             health=FeedHealth(), workers=workers, stories=StoryLog())
+        update_schedule(scheduler, due, arrivals)
+    log.info("=== Работа бота завершена ===")
+
+def run_daemon(workers=WORKERS):
+    """
+    Режим демона: бот живёт постоянно и опрашивает каждую ленту по её
+    расписанию: сначала новостные — раз в час, еженедельные — раз в сутки,
+    дальше интервал подстраивается под то, как часто лента обновляется.
+    Кэш, журналы публикаций и новостей и пулы соединений остаются в памяти между циклами.
+    Завершается по SIGTERM/SIGINT после окончания текущего цикла.
+    """
+    setup_logging()
+    log.info("=== Запуск бота в режиме демона ===")
+    stop = threading.Event()
+    
+    def request_stop(signum, frame):
+        log.info("Получен сигнал %s — завершаем после текущего цикла", signum)
+        stop.set()
+    
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
     
-    # Обработка для канала 2 (автоматизация)
-    print("\n=== Обработка для канала автоматизации ===")
-    process_entries_for_channel(all_entries, KEYWORDS_CHANNEL2, CHANNEL2_USERNAME)
+    scheduler = make_scheduler()
+    http_cache = HttpCache()
+    published_store = PublishedStore()
+    publisher = Publisher(send_post)
+    watermarks = WatermarkStore()
+    health = FeedHealth()
+    stories = StoryLog()
     
-    print("\n=== Работа бота завершена ===")
+    while not stop.is_set():
+        due = scheduler.due()
+        if due:
+            log.info("Цикл: лент к опросу %d из %d", len(due), len(SITES))
+            arrivals = {}
+            try:
+                arrivals = run_cycle(due, http_cache, published_store, publisher, watermarks, health=health,
+                                     workers=workers, stories=stories)
+            except Exception as e:
+                log.exception("❗ Ошибка в цикле демона: %s", e)
+            update_schedule(scheduler, due, arrivals)
+        # Спим до ближайшего срока, но просыпаемся сразу по сигналу
+        stop.wait(max(scheduler.next_wakeup() - time.time(), 1))
+    
+    close_sessions()
+    log.info("=== Демон остановлен ===")
+
+def dry_run(sites, fetch=iter_feeds, now=None):
+    """
+    Цикл без публикации и без следов: посты складываются в PostCapture,
+    а HTTP-кэш, журналы опубликованного и новостей и водяные знаки живут во временном
+    каталоге, так что состояние бота в .cache/ не меняется.
+    Возвращает PostCapture с постами, которые ушли бы в каналы.
+    """
+    capture = PostCapture()
+    # Отправка мгновенная, лимиты Telegram не нужны
+    publisher = Publisher(capture, global_rate=DRY_RUN_RATE, chat_rate=DRY_RUN_RATE, chat_burst=DRY_RUN_RATE)
+    with tempfile.TemporaryDirectory(prefix="bot-dry-run-") as tmp:
+        run_cycle(sites, HttpCache(os.path.join(tmp, "http_cache.json")),
+                  PublishedStore(os.path.join(tmp, "published.log"), now=now), publisher,
+                  WatermarkStore(os.path.join(tmp, "watermarks.json")), fetch, now,
+                  FeedHealth(os.path.join(tmp, "health.json")),
+                  stories=StoryLog(os.path.join(tmp, "stories.json")))
+    for channel_username, post in capture.posts:
+        log.info("📝 Пост для %s:\n%s", channel_username, post)
+    return capture
+
+def record(path):
+    """
+    Скачивает все ленты SITES целиком (без условных запросов), записывает
+    ответы в архив path и прогоняет по ним цикл без публикации.
+    """
+    setup_logging()
+    log.info("=== Запись лент в архив %s ===", path)
+    archive = FeedArchive(path)
+    return dry_run(SITES, fetch=lambda sites, cache, timeouts: archive.record(
+        iter_feeds(sites, cache=cache, timeouts=timeouts)))
+
+def replay(path):
+    """
+    Прогоняет цикл по архиву, записанному record(), без сети и Telegram.
+    Свежесть статей отсчитывается от момента записи, поэтому один и тот же
+    архив всегда даёт одни и те же посты.
+    """
+    setup_logging()
+    log.info("=== Воспроизведение архива %s ===", path)
+    archive = FeedArchive(path)
+    return dry_run(archive.sites, fetch=lambda sites, cache, timeouts: archive.replay(sites),
+                   now=archive.recorded_at)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Telegram-бот AI-новостей")
+    parser.add_argument("--daemon", action="store_true",
+                        help="работать постоянно и опрашивать ленты по расписанию")
+    parser.add_argument("--workers", type=int, default=WORKERS, metavar="N",
+                        help="сколько процессов-шардов качают и разбирают ленты (по умолчанию BOT_WORKERS или 1)")
+    parser.add_argument("--record", metavar="ARCHIVE",
+                        help="скачать все ленты, записать ответы в архив и прогнать цикл без публикации")
+    parser.add_argument("--replay", metavar="ARCHIVE",
+                        help="прогнать цикл по записанному архиву без сети и Telegram")
+    args = parser.parse_args()
+    if args.record:
+        record(args.record)
+    elif args.replay:
+        replay(args.replay)
+    elif args.daemon or os.getenv("BOT_MODE") == "daemon":
+        run_daemon(args.workers)
+    else:
+        main(args.workers)
@@ -0,0 +1,106 @@
+# Поиск ключевых слов всех каналов за один проход по тексту статьи
+
+import re
+
+
+def _trie_regex(node):
+    """Превращает префиксное дерево в регулярное выражение без лишних альтернатив."""
+    terminal = "" in node
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if terminal:
+        # Жадный необязательный хвост: сначала пробуем более длинное слово
+        return "(?:" + body + ")?"
+    return body
+
+
+class KeywordMatcher:
+    """
+    Компилирует ключевые слова нескольких каналов в одно регулярное выражение
+    в виде префиксного дерева. Поиск идёт за один проход по тексту и находит
+    все вхождения, в том числе перекрывающиеся, — результат совпадает
+    с проверкой `keyword.lower() in text.lower()` для каждого слова.
+    """
+
+    def __init__(self, keyword_sets):
+        # keyword -> множество каналов, которым оно принадлежит
+        self.channels_by_keyword = {}
+        for channel, keywords in keyword_sets.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword:
+                    self.channels_by_keyword.setdefault(keyword, set()).add(channel)
+        self.channels = tuple(keyword_sets)
+
+        trie = {}
+        for keyword in self.channels_by_keyword:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = True
+        # В каждой позиции регулярка находит самое длинное слово; более короткие
+        # слова, которые являются его префиксами, добавляем по этой таблице
+        self._prefixes = {
+            keyword: tuple(k for k in self.channels_by_keyword if keyword.startswith(k))
+            for keyword in self.channels_by_keyword
+        }
+        self._pattern = _trie_regex(trie) if trie else "(?!)"
+        self._regex = re.compile(self._pattern)
+
+    def __getstate__(self):
+        # Скомпилированное выражение в кэш настроек не пишем: после загрузки
+        # из кэша оно собирается при первом поиске, а не при запуске
+        state = self.__dict__.copy()
+        state["_regex"] = None
+        return state
+
+    def _compiled(self):
+        if self._regex is None:
+            self._regex = re.compile(self._pattern)
+        return self._regex
+
+    def scan(self, text):
+        """Возвращает (позиция, ключевое слово) для всех вхождений; text уже в нижнем регистре."""
+        prefixes = self._prefixes
+        search = self._compiled().search
+        match = search(text)
+        while match is not None:
+            start = match.start()
+            for keyword in prefixes[match.group()]:
+                yield start, keyword
+            # Продолжаем со следующего символа, а не с конца совпадения,
+            # чтобы не пропустить слова, перекрывающиеся с найденным
+            match = search(text, start + 1)
+
+    def match(self, text):
+        """Возвращает {канал: множество найденных ключевых слов} только для каналов с совпадениями."""
+        return self.match_lower(text.lower())
+
+    def match_lower(self, text):
+        """То же, что match(), для текста, уже приведённого к нижнему регистру."""
+        hits = {}
+        channels_by_keyword = self.channels_by_keyword
+        found = {keyword for _, keyword in self.scan(text)}
+        for keyword in found:
+            for channel in channels_by_keyword[keyword]:
+                hits.setdefault(channel, set()).add(keyword)
+        return hits
+
+    def match_title(self, text, title_end):
+        """
+        Как match_lower(), но за тот же проход отдельно собирает слова,
+        целиком попавшие в заголовок — первые title_end символов text.
+        Возвращает (hits, title_hits).
+        """
+        hits = {}
+        title_hits = {}
+        channels_by_keyword = self.channels_by_keyword
+        for start, keyword in self.scan(text):
+            in_title = start + len(keyword) <= title_end
+            for channel in channels_by_keyword[keyword]:
+                hits.setdefault(channel, set()).add(keyword)
+                if in_title:
+                    title_hits.setdefault(channel, set()).add(keyword)
+        return hits, title_hits
@@ -0,0 +1,117 @@
+# Логирование и счётчики запуска: тихо по умолчанию, одна JSON-сводка в конце
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")   # DEBUG возвращает подробную диагностику по каждой статье
+SUMMARY_PATH = os.getenv("RUN_SUMMARY_PATH")  # Куда дополнительно записать JSON-сводку запуска
+
+log = logging.getLogger("ai_news_bot")
+
+
+def setup_logging(level=None):
+    """Настраивает вывод логов бота в stdout."""
+    level = (level or LOG_LEVEL).upper()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname).1s %(message)s", "%H:%M:%S"))
+    log.handlers[:] = [handler]
+    log.setLevel(getattr(logging, level, logging.INFO))
+    log.propagate = False
+
+
+class RunStats:
+    """
+    Счётчики и таймеры одного запуска. Потокобезопасны: в них пишут
+    потоки загрузки и публикации.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.counters = {}
+            self.stages = {}
+            self.feeds = {}
+            self.marks = {}
+            self.extra = {}
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, stage):
+        """Замеряет время стадии в миллисекундах; повторные замеры складываются."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, (time.perf_counter() - started) * 1000)
+
+    def add_time(self, stage, ms):
+        """Добавляет к стадии время, замеренное снаружи (например, конвейером)."""
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + ms
+
+    def mark(self, name):
+        """Запоминает, через сколько миллисекунд от старта событие случилось впервые."""
+        with self._lock:
+            self.marks.setdefault(name, round((time.time() - self.started) * 1000, 1))
+
+    def feed(self, url, **values):
+        """Запоминает показатели отдельной ленты (время загрузки, байты, статьи, статус)."""
+        with self._lock:
+            self.feeds.setdefault(url, {}).update(values)
+
+    def set(self, name, value):
+        """Добавляет в сводку произвольный раздел (например, счётчики кэша)."""
+        with self._lock:
+            self.extra[name] = value
+
+    def merge(self, summary):
+        """
+        Добавляет сводку другого процесса (шарда): счётчики и время стадий
+        складываются, показатели лент дополняются.
+        """
+        with self._lock:
+            for name, value in summary["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for stage, ms in summary["stages_ms"].items():
+                self.stages[stage] = self.stages.get(stage, 0.0) + ms
+            for url, values in summary["feeds"].items():
+                self.feeds.setdefault(url, {}).update(values)
+
+    def summary(self):
+        with self._lock:
+            return {
+                "started_at": round(self.started),
+                "duration_ms": round((time.time() - self.started) * 1000, 1),
+                "counters": dict(sorted(self.counters.items())),
+                "stages_ms": {k: round(v, 1) for k, v in self.stages.items()},
+                "marks_ms": dict(self.marks),
+                "feeds": {url: dict(values) for url, values in self.feeds.items()},
+                **self.extra,
+            }
+
+    def emit(self):
+        """Печатает сводку одной JSON-строкой и при необходимости сохраняет её в файл."""
+        line = json.dumps(self.summary(), ensure_ascii=False, sort_keys=False)
+        print(f"RUN_SUMMARY {line}", flush=True)
+        if SUMMARY_PATH:
+            try:
+                with open(SUMMARY_PATH, "w", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                log.warning("Не удалось записать сводку в %s: %s", SUMMARY_PATH, e)
+
+
+# Общие счётчики текущего запуска
+stats = RunStats()
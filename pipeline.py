@@ -0,0 +1,70 @@
+# Потоковый конвейер: стадии передают друг другу элементы по одному, по мере готовности
+
+import time
+
+
+class Pipeline:
+    """
+    Цепочка стадий. Стадия — любая функция, которая принимает итератор
+    элементов и возвращает итератор (обычно это генератор), поэтому каждую
+    стадию можно запустить и замерить отдельно на списке элементов.
+    Элементы не копятся между стадиями: следующая стадия получает элемент,
+    как только предыдущая его отдала.
+
+    Для каждой стадии считается, сколько элементов она отдала, собственное
+    время работы (без времени предыдущих стадий) и момент первого элемента.
+    """
+
+    def __init__(self, stages, clock=time.perf_counter):
+        self.stages = list(stages)     # [(имя, стадия)]
+        self.clock = clock
+        self.counts = {}
+        self.total = {}                # Время стадии вместе с предыдущими, с
+        self.first = {}                # Момент первого элемента от старта, с
+        self.started = None
+
+    def run(self, source, name="source"):
+        """Подключает стадии к источнику; возвращает итератор на выходе последней стадии."""
+        self.started = self.clock()
+        items = self._measured(name, source)
+        for stage_name, stage in self.stages:
+            items = self._measured(stage_name, stage(items))
+        return items
+
+    def _measured(self, name, items):
+        # Счётчики заводятся сразу, а не при первом next(), чтобы сохранить порядок стадий
+        self.counts[name] = 0
+        self.total[name] = 0.0
+        return self._measure(name, items)
+
+    def _measure(self, name, items):
+        iterator = iter(items)
+        while True:
+            started = self.clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.total[name] += self.clock() - started
+                return
+            now = self.clock()
+            self.total[name] += now - started
+            if not self.counts[name]:
+                self.first[name] = now - self.started
+            self.counts[name] += 1
+            yield item
+
+    def stage_ms(self):
+        """Собственное время каждой стадии в миллисекундах."""
+        result = {}
+        previous = 0.0
+        for name, total in self.total.items():
+            result[name] = max(total - previous, 0.0) * 1000
+            previous = total
+        return result
+
+    def summary(self):
+        return {
+            "items": dict(self.counts),
+            "first_item_ms": {name: round(value * 1000, 1) for name, value in self.first.items()},
+        }
+
@@ -0,0 +1,157 @@
+# Публикация в Telegram с учётом лимитов: token bucket на чат и на бота, retry_after и повторы
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import log
+
+# === Лимиты Telegram Bot API ===
+GLOBAL_RATE = 25.0       # Сообщений в секунду на весь бот (Telegram допускает ~30)
+CHAT_RATE = 1.0          # Сообщений в секунду в один чат/канал
+CHAT_BURST = 3           # Сколько сообщений подряд можно отправить в чат без паузы
+MAX_ATTEMPTS = 5         # Попыток на одно сообщение, включая первую
+BACKOFF_BASE = 1.0       # Базовая пауза перед повтором после временной ошибки, с
+BACKOFF_MAX = 30.0
+
+
+class TokenBucket:
+    """Потокобезопасный token bucket: rate токенов в секунду, не больше capacity про запас."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Ждёт, пока появится токен, и забирает его."""
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            self.sleep(wait)
+
+    def block(self, seconds):
+        """Запрещает отправку на seconds секунд (ответ 429 с retry_after)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+            self.tokens = 0
+
+
+def _error_status(error):
+    """Код ошибки Telegram или HTTP-статус из исключения telebot, если он есть."""
+    status = getattr(error, "error_code", None)
+    if status is None:
+        status = getattr(getattr(error, "result", None), "status_code", None)
+    return status
+
+
+def _is_connection_error(error):
+    """Сетевая ошибка requests; сам requests к этому моменту уже загружен клиентом Telegram."""
+    import requests
+
+    return isinstance(error, requests.ConnectionError)
+
+
+def _retry_after(error):
+    result_json = getattr(error, "result_json", None) or {}
+    try:
+        return float(result_json.get("parameters", {}).get("retry_after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Publisher:
+    """
+    Отправляет сообщения через send(chat, text), соблюдая лимиты Telegram:
+    общий token bucket на бота и отдельный на каждый чат. Ответ 429 блокирует
+    чат на retry_after секунд, временные ошибки (5xx, сеть) повторяются
+    с экспоненциальной паузой, остальные ошибки считаются окончательными.
+    """
+
+    def __init__(self, send, global_rate=GLOBAL_RATE, chat_rate=CHAT_RATE, chat_burst=CHAT_BURST,
+                 max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE, sleep=time.sleep):
+        self._send = send
+        self._sleep = sleep
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self._global = TokenBucket(global_rate, max(global_rate, 1), sleep=sleep)
+        self._chats = {}
+        self._lock = threading.Lock()
+        self.stats = {"sent": 0, "retried": 0, "rate_limited": 0, "failed": 0}
+
+    def reset_stats(self):
+        """Обнуляет счётчики (в режиме демона — перед каждым циклом)."""
+        with self._lock:
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def _bucket(self, chat):
+        with self._lock:
+            bucket = self._chats.get(chat)
+            if bucket is None:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst, sleep=self._sleep)
+                self._chats[chat] = bucket
+            return bucket
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def send(self, chat, text):
+        """Отправляет сообщение; возвращает True при успехе, исключение последней попытки — при неудаче."""
+        bucket = self._bucket(chat)
+        for attempt in range(1, self.max_attempts + 1):
+            bucket.acquire()
+            self._global.acquire()
+            try:
+                self._send(chat, text)
+                self._count("sent")
+                return True
+            except Exception as e:
+                status = _error_status(e)
+                # ReadTimeout не повторяем: сообщение могло уже дойти до канала
+                transient = (status is not None and status >= 500) or _is_connection_error(e)
+                if (status != 429 and not transient) or attempt == self.max_attempts:
+                    self._count("failed")
+                    raise
+                self._count("retried")
+                if status == 429:
+                    wait = _retry_after(e) or self.backoff_base
+                    log.info("⏳ Лимит Telegram для %s: ждём %.0f с", chat, wait)
+                    self._count("rate_limited")
+                    bucket.block(wait)
+                else:
+                    wait = min(BACKOFF_MAX, self.backoff_base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+                    log.warning("❗ Временная ошибка Telegram (%s), повтор через %.1f с", e, wait)
+                    self._sleep(wait)
+
+    def run(self, jobs):
+        """
+        Выполняет задания публикации параллельно, по потоку на канал.
+        jobs: {канал: функция без аргументов}. Возвращает {канал: результат}.
+        """
+        if not jobs:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="publish") as executor:
+            futures = {channel: executor.submit(job) for channel, job in jobs.items()}
+            results = {}
+            for channel, future in futures.items():
+                try:
+                    results[channel] = future.result()
+                except Exception as e:
+                    log.error("❗ Ошибка публикации в канал %s: %s", channel, e)
+                    results[channel] = None
+            return results
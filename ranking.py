@@ -0,0 +1,95 @@
+# Ранжирование статей-кандидатов: какие max_posts статей попадут в канал
+
+import heapq
+import itertools
+import time
+
+TITLE_HIT = 3.0            # Очки за ключевое слово в заголовке
+BODY_HIT = 1.0             # Очки за ключевое слово, найденное только в тексте
+MAX_KEYWORD_SCORE = 12.0   # Потолок за ключевые слова: длинный текст не должен выигрывать объёмом
+RECENCY_WEIGHT = 4.0       # Очки только что вышедшей статьи; убывают вдвое за четверть окна свежести
+CORROBORATION = 2.0        # Очки за каждый другой источник, рассказавший ту же новость
+MAX_CORROBORATION = 3
+SOURCE_REPEAT = 0.6        # Множитель очков за каждую уже выбранную статью того же источника
+
+
+def score(record, channel, now=None, source_weight=1.0, window=86400):
+    """
+    Очки статьи для канала: ключевые слова (в заголовке весят больше),
+    свежесть относительно окна window (секунды), подтверждение другими
+    источниками (record.duplicates) и вес источника.
+    Ключевые слова уже найдены при маршрутизации, текст заново не сканируется.
+    """
+    title_hits = len(record.title_hits.get(channel, ()))
+    body_hits = len(record.hits.get(channel, ())) - title_hits
+    keywords = min(TITLE_HIT * title_hits + BODY_HIT * body_hits, MAX_KEYWORD_SCORE)
+    if record.published is None:
+        # Дата не распознана: считаем статью средней по свежести
+        recency = RECENCY_WEIGHT / 2
+    else:
+        age = max((now if now is not None else time.time()) - record.published, 0.0)
+        recency = RECENCY_WEIGHT * 0.5 ** (age / (window / 4))
+    corroboration = CORROBORATION * min(record.duplicates, MAX_CORROBORATION)
+    return (keywords + recency + corroboration) * source_weight
+
+
+class RankedQueue:
+    """
+    Очередь кандидатов одного канала, которая отдаёт лучшую статью из пришедших. Для каждого источника хранится не больше limit
+    лучших статей в куче: худшая вытесняется за O(log k), так что отбор
+    из n кандидатов стоит O(n log k). Очки каждой следующей статьи источника
+    умножаются на SOURCE_REPEAT, поэтому при близких очках посты
+    чередуют источники.
+    Очередь заполняется целиком до того, как из неё начинают брать статьи
+    (см. main.run_cycle); get() возвращает None, когда кандидаты кончились.
+    """
+
+    def __init__(self, limit, repeat=SOURCE_REPEAT):
+        self.limit = limit
+        self.repeat = repeat
+        self.sources = {}    # источник -> мин-куча (очки, -порядковый номер, запись)
+        self.picked = {}     # источник -> сколько его статей уже отдано
+        self.received = 0
+        self.evicted = 0
+        self._order = itertools.count()
+
+    def put(self, record, points):
+        """Добавляет кандидата с очками points."""
+        # При равных очках выигрывает пришедшая раньше статья
+        item = (points, -next(self._order), record)
+        self.received += 1
+        heap = self.sources.setdefault(record.source, [])
+        if len(heap) < self.limit:
+            heapq.heappush(heap, item)
+        else:
+            heapq.heappushpop(heap, item)
+            self.evicted += 1
+
+    def get(self):
+        """Забирает лучшую статью с учётом разнообразия источников; None, если статей не осталось."""
+        if not self.sources:
+            return None
+        best = best_key = None
+        for source, heap in self.sources.items():
+            # Куча источника не длиннее limit, так что максимум ищем простым проходом
+            top = max(heap)
+            key = (top[0] * self.repeat ** self.picked.get(source, 0), top[1])
+            if best_key is None or key > best_key:
+                best, best_key = (source, top), key
+        source, top = best
+        heap = self.sources[source]
+        heap.remove(top)
+        if heap:
+            heapq.heapify(heap)
+        else:
+            # Пустые кучи не храним, чтобы get() не обходил исчерпанные источники
+            del self.sources[source]
+        self.picked[source] = self.picked.get(source, 0) + 1
+        return top[2]
+
+    def __iter__(self):
+        while True:
+            record = self.get()
+            if record is None:
+                return
+            yield record
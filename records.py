@@ -0,0 +1,28 @@
+# Компактное представление статьи, которое проходит через весь конвейер бота
+
+
+class EntryRecord:
+    """
+    Нормализованная статья: всё, что нужно для маршрутизации и публикации,
+    вычисляется один раз сразу после разбора ленты.
+    """
+
+    __slots__ = ("id", "title", "link", "source", "published", "text", "hits", "title_hits",
+                 "duplicates", "markup", "fingerprint")
+
+    def __init__(self, id, title, link, source, published, text, hits=None, title_hits=None,
+                 duplicates=0):
+        self.id = id                    # Уникальный идентификатор (id, ссылка или заголовок)
+        self.title = title
+        self.link = link
+        self.source = source            # URL ленты, из которой пришла статья
+        self.published = published      # Время публикации (секунды эпохи UTC) или None
+        self.text = text                # Текст для поиска ключевых слов в нижнем регистре
+        self.hits = hits or {}          # {канал: найденные ключевые слова}
+        self.title_hits = title_hits or {}  # {канал: ключевые слова, найденные в заголовке}
+        self.duplicates = duplicates    # Сколько других источников рассказали ту же новость
+        self.markup = None              # Заголовок, готовый для поста (см. main.render_title)
+        self.fingerprint = None         # SimHash статьи (см. clustering.ClusterIndex)
+
+    def __repr__(self):
+        return f"EntryRecord(id={self.id!r}, title={self.title!r}, source={self.source!r})"
@@ -0,0 +1,101 @@
+# Запись ответов лент в архив и воспроизведение запусков без сети и Telegram
+
+import json
+import threading
+import time
+import zipfile
+
+from fetcher import FetchResult
+from metrics import log
+
+ARCHIVE_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+class FeedArchive:
+    """
+    Zip-архив ответов лент: manifest.json с адресами, заголовками, статусами,
+    временем загрузки и моментом записи, и тело каждой ленты отдельным файлом.
+    Ленты хранятся в том порядке, в каком пришли ответы, и в том же
+    порядке воспроизводятся.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._manifest = None
+
+    def record(self, results, recorded_at=None):
+        """
+        Пропускает через себя поток FetchResult (как стадия конвейера),
+        записывая каждый ответ в архив. Архив перезаписывается целиком.
+        recorded_at — момент записи (секунды эпохи UTC); при воспроизведении
+        от него отсчитывается свежесть статей.
+        """
+        feeds = []
+        manifest = {"version": ARCHIVE_VERSION,
+                    "recorded_at": time.time() if recorded_at is None else recorded_at,
+                    "feeds": feeds}
+        with zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            try:
+                for result in results:
+                    name = f"feeds/{len(feeds):05d}.xml"
+                    if result.content:
+                        archive.writestr(name, result.content)
+                    feeds.append({"url": result.url, "file": name if result.content else None,
+                                  "headers": dict(result.headers), "status": result.status,
+                                  "elapsed": result.elapsed, "error": result.error})
+                    yield result
+            finally:
+                archive.writestr(MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=1))
+                self._manifest = manifest
+        log.info("💾 Записано лент в архив %s: %d", self.path, len(feeds))
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            with zipfile.ZipFile(self.path) as archive:
+                manifest = json.loads(archive.read(MANIFEST))
+            if manifest.get("version") != ARCHIVE_VERSION:
+                raise ValueError(f"{self.path}: неизвестная версия архива {manifest.get('version')!r}")
+            self._manifest = manifest
+        return self._manifest
+
+    @property
+    def recorded_at(self):
+        return self.manifest["recorded_at"]
+
+    @property
+    def sites(self):
+        return [feed["url"] for feed in self.manifest["feeds"]]
+
+    def replay(self, urls=None):
+        """
+        Отдаёт записанные ответы как FetchResult, будто ленты только что
+        скачались. urls ограничивает набор лент; лент без записи в архиве
+        нет и в результатах.
+        """
+        wanted = None if urls is None else set(urls)
+        with zipfile.ZipFile(self.path) as archive:
+            for feed in self.manifest["feeds"]:
+                if wanted is not None and feed["url"] not in wanted:
+                    continue
+                yield FetchResult(
+                    url=feed["url"],
+                    content=archive.read(feed["file"]) if feed["file"] else b"",
+                    headers=feed["headers"],
+                    status=feed["status"],
+                    elapsed=feed["elapsed"],
+                    error=feed["error"],
+                )
+
+
+class PostCapture:
+    """Подмена отправки в Telegram: складывает посты в список вместо публикации."""
+
+    def __init__(self):
+        self.posts = []       # (канал, текст)
+        self._lock = threading.Lock()
+
+    def __call__(self, chat, text):
+        with self._lock:
+            self.posts.append((chat, text))
@@ -0,0 +1,124 @@
+# Расписание опроса лент: интервал каждой ленты подстраивается под то, как часто она обновляется
+
+import json
+import math
+import os
+import random
+import time
+
+from metrics import log
+
+SCHEDULE_PATH = os.getenv("SCHEDULE_PATH", os.path.join(".cache", "schedule.json"))
+
+NEWS_INTERVAL = 3600         # Начальный интервал для новостных лент — раз в час
+WEEKLY_INTERVAL = 24 * 3600  # Для еженедельных — раз в сутки
+MIN_INTERVAL = 25 * 60       # Чаще не опрашиваем даже самые активные ленты
+MAX_INTERVAL = 12 * 3600     # Реже — нет: окно свежести новостей всего сутки
+DUE_AHEAD = 5 * 60           # Разовый запуск опрашивает и ленты, срок которых наступит в ближайшие минуты
+POLL_SCALE = 22 * 60         # Интервал — среднее геометрическое промежутка между статьями и POLL_SCALE
+EMA_ALPHA = 0.3              # Вес нового промежутка в скользящем среднем
+JITTER = 0.1                 # Случайный разброс интервала ±10%, чтобы запросы не шли пачкой
+
+
+class FeedScheduler:
+    """
+    Хранит для каждой ленты момент следующего опроса и статистику выхода статей:
+    экспоненциальное скользящее среднее промежутков между публикациями (ema)
+    и время самой свежей увиденной статьи. Интервал опроса — sqrt(ema × POLL_SCALE),
+    ограниченный MIN_INTERVAL и MAX_INTERVAL: при том же числе запросов средняя
+    задержка статей минимальна, когда интервал растёт как корень из промежутка
+    между статьями, а не пропорционально ему. Пока ema неизвестно, используется
+    начальный интервал ленты. Если лента долго молчит, растущий промежуток
+    с последней статьи тоже учитывается, и опросы становятся реже.
+    """
+
+    def __init__(self, intervals, jitter=JITTER, now=None, rng=None,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        now = time.time() if now is None else now
+        self.intervals = dict(intervals)   # {url: начальный интервал в секундах}
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.next_due = {url: now for url in self.intervals}
+        self.ema = {}                      # {url: средний промежуток между статьями}
+        self.last_entry = {}               # {url: время самой свежей статьи}
+
+    def due(self, now=None):
+        """Ленты, которые пора опросить, в порядке конфигурации."""
+        now = time.time() if now is None else now
+        return [url for url in self.intervals if self.next_due[url] <= now]
+
+    def interval(self, url):
+        """Текущий интервал опроса ленты без разброса."""
+        ema = self.ema.get(url)
+        if ema is None:
+            return self.intervals[url]
+        return min(self.max_interval, max(self.min_interval, math.sqrt(ema * POLL_SCALE)))
+
+    def observe(self, url, timestamps, now=None):
+        """
+        Учитывает времена публикации статей, полученных при опросе ленты.
+        Новыми считаются только статьи свежее уже виденных.
+        """
+        now = time.time() if now is None else now
+        last = self.last_entry.get(url)
+        fresh = sorted(t for t in timestamps if t is not None and t <= now and (last is None or t > last))
+        for stamp in fresh:
+            if last is not None:
+                self._update(url, stamp - last)
+            last = stamp
+        if last is not None:
+            self.last_entry[url] = last
+            # Тишина дольше обычного — тоже сигнал: лента обновляется реже, чем думали
+            silence = now - last
+            if not fresh and silence > self.ema.get(url, self.intervals[url]):
+                self._update(url, silence)
+
+    def _update(self, url, gap):
+        gap = max(gap, 1.0)
+        ema = self.ema.get(url)
+        self.ema[url] = gap if ema is None else EMA_ALPHA * gap + (1 - EMA_ALPHA) * ema
+
+    def mark_polled(self, url, now=None):
+        """Планирует следующий опрос ленты после текущего."""
+        now = time.time() if now is None else now
+        self.next_due[url] = now + self.interval(url) * (1 + self.rng.uniform(-self.jitter, self.jitter))
+
+    def next_wakeup(self):
+        """Ближайший момент, когда какая-нибудь лента станет просроченной."""
+        return min(self.next_due.values(), default=None)
+
+    def load(self, path=SCHEDULE_PATH):
+        """Восстанавливает состояние прошлых запусков для лент, которые есть в конфигурации."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.warning("❗ Не удалось прочитать расписание %s: %s", path, e)
+            return
+        for url, state in saved.items():
+            if url not in self.intervals:
+                continue
+            if state.get("ema") is not None:
+                self.ema[url] = state["ema"]
+            if state.get("last_entry") is not None:
+                self.last_entry[url] = state["last_entry"]
+            if state.get("next_due") is not None:
+                self.next_due[url] = state["next_due"]
+
+    def save(self, path=SCHEDULE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            url: {"ema": self.ema.get(url), "last_entry": self.last_entry.get(url),
+                  "next_due": self.next_due[url]}
+            for url in self.intervals
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
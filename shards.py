@@ -0,0 +1,54 @@
+# Разбиение лент на шарды: какой процесс (а потом и машина) обрабатывает какую ленту
+
+import hashlib
+from typing import NamedTuple
+
+
+class ShardTask(NamedTuple):
+    """
+    Задание шарду: ленты и всё их состояние, нужное для загрузки, разбора
+    и маршрутизации. Только данные, без ссылок на объекты координатора,
+    поэтому задание можно передать в другой процесс или на другую машину.
+    """
+    shard: int
+    urls: list
+    http_cache: dict        # HttpCache.export(urls)
+    watermarks: dict        # WatermarkStore.export(urls)
+    health: dict            # FeedHealth.export(urls)
+    timeouts: dict          # {url: таймаут загрузки}
+    now: float | None       # Момент, от которого отсчитывается свежесть статей
+
+
+class ShardResult(NamedTuple):
+    """Ответ шарда: подходящие статьи с каналами и обновлённое состояние его лент."""
+    shard: int
+    pairs: list             # [(EntryRecord, [канал, ...])]
+    arrivals: dict          # {url: времена публикации статей}
+    http_cache: dict
+    validators: dict        # Отложенные валидаторы ответов (HttpCache.pending)
+    watermarks: dict
+    health: dict
+    http_stats: dict        # Счётчики HttpCache (hit/miss/not_modified)
+    summary: dict           # RunStats.summary() шарда
+    items: dict             # Сколько элементов отдала каждая стадия шарда
+
+
+def _weight(url, shard):
+    return hashlib.blake2b(f"{shard}:{url}".encode("utf-8"), digest_size=8).digest()
+
+
+def shard_of(url, shards):
+    """
+    Номер шарда ленты из shards по rendezvous-хэшу её адреса: одна и та же
+    лента всегда попадает в один шард, а при добавлении шарда
+    переезжает только каждая shards-я лента.
+    """
+    return max(range(shards), key=lambda shard: _weight(url, shard))
+
+
+def partition(urls, shards):
+    """Ленты по шардам: [[url, ...], ...] длиной shards, порядок лент сохраняется."""
+    result = [[] for _ in range(shards)]
+    for url in urls:
+        result[shard_of(url, shards)].append(url)
+    return result
@@ -0,0 +1,165 @@
+# Водяные знаки лент: какие статьи каждой ленты уже разобраны в прошлые запуски
+
+import json
+import os
+
+from metrics import log
+
+WATERMARK_PATH = os.getenv("WATERMARK_PATH", os.path.join(".cache", "watermarks.json"))
+MAX_IDS = 300            # Сколько последних id помним для каждой ленты
+SEEN_STREAK = 3          # После стольких уже виденных статей подряд ленту дальше не читаем
+GRACE = 24 * 3600        # Статья с новым id, но старше самой свежей на окно свежести (по умолчанию сутки), считается старой
+
+
+class WatermarkStore:
+    """
+    Для каждой ленты хранит время самой свежей разобранной статьи и ограниченный
+    набор id последних статей. Ленты отдают статьи от новых к старым, поэтому,
+    встретив несколько уже виденных статей подряд, ленту можно не дочитывать:
+    дальше идут только старые. Несколько виденных подряд, а не одна, —
+    потому что в начале ленты бывают закреплённые записи.
+    Статьи, которые рассматривались, но не были опубликованы (ошибка отправки,
+    лимит max_posts), отмечаются как отложенные (hold): пока у ленты есть
+    отложенные статьи, она читается целиком, чтобы они вернулись в кандидаты,
+    даже если стоят ниже уже разобранных.
+    path=None — водяные знаки только в памяти (у шарда).
+    """
+
+    def __init__(self, path=WATERMARK_PATH, max_ids=MAX_IDS, streak=SEEN_STREAK, grace=GRACE):
+        self.path = path
+        self.max_ids = max_ids
+        self.streak = streak
+        self.grace = grace
+        self.feeds = {}          # {url: {"newest": время или None, "ids": {id: время или None}, "pending": [id]}}
+        self._newest = {}        # Свежайшие даты текущего цикла, вступают в силу при сохранении
+        self._dirty = False
+        if path is None:
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.feeds = {
+                url: {"newest": state.get("newest"), "ids": dict(state.get("ids", {})),
+                      "pending": list(state.get("pending", []))}
+                for url, state in saved.items()
+            }
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            log.warning("❗ Не удалось прочитать водяные знаки %s: %s", path, e)
+
+    def unseen(self, url, entries, key):
+        """
+        Статьи ленты, которых не было в прошлые запуски, в исходном порядке.
+        key(entry) — id статьи; даты на этом шаге не разбираются.
+        """
+        state = self.feeds.get(url)
+        if not state or not state["ids"]:
+            return list(entries)
+        ids = state["ids"]
+        pending = state.get("pending")
+        result = []
+        streak = 0
+        for entry in entries:
+            if key(entry) in ids:
+                streak += 1
+                # Отложенная статья может стоять и ниже уже разобранных — такую ленту дочитываем
+                if streak >= self.streak and not pending:
+                    break
+                continue
+            streak = 0
+            result.append(entry)
+        if pending:
+            # Отложенные статьи, которые выпали из ленты, больше не вернутся
+            present = {key(entry) for entry in result}
+            state["pending"] = [entry_id for entry_id in pending if entry_id in present]
+            self._dirty = True
+        return result
+
+    def is_old(self, url, published, entry_id=None, grace=None):
+        """
+        Статья с незнакомым id, но заметно старше разобранных в прошлые циклы
+        (например, у ленты сменился формат id). grace — окно свежести ленты
+        в секундах (по умолчанию self.grace). Отложенная статья (hold) старой
+        не считается: её уже признали кандидатом.
+        """
+        state = self.feeds.get(url)
+        if not state or state["newest"] is None or published is None:
+            return False
+        if entry_id is not None and entry_id in state["pending"]:
+            return False
+        return published < state["newest"] - (self.grace if grace is None else grace)
+
+    def _state(self, url):
+        return self.feeds.setdefault(url, {"newest": None, "ids": {}, "pending": []})
+
+    def add(self, url, entry_id, published=None):
+        """Отмечает статью ленты как разобранную."""
+        state = self._state(url)
+        ids = state["ids"]
+        ids[entry_id] = published
+        if entry_id in state["pending"]:
+            state["pending"].remove(entry_id)
+        if len(ids) > self.max_ids * 2:
+            self._trim(ids)
+        if published is not None and published > self._newest.get(url, float("-inf")):
+            self._newest[url] = published
+        self._dirty = True
+
+    def hold(self, url, entry_id):
+        """Статья ленты рассмотрена, но не опубликована: в следующий раз она снова будет кандидатом."""
+        state = self._state(url)
+        if entry_id not in state["pending"] and entry_id not in state["ids"]:
+            state["pending"].append(entry_id)
+            self._dirty = True
+
+    def _trim(self, ids):
+        # Забываем самые старые статьи; статьи без даты считаем новыми
+        keep = sorted(ids.items(), key=lambda item: float("inf") if item[1] is None else item[1],
+                      reverse=True)[:self.max_ids]
+        ids.clear()
+        ids.update(keep)
+
+    def _apply_newest(self, urls):
+        for url in urls:
+            newest = self._newest.pop(url, None)
+            if newest is None:
+                continue
+            state = self.feeds[url]
+            if state["newest"] is None or newest > state["newest"]:
+                state["newest"] = newest
+
+    def export(self, urls):
+        """
+        Водяные знаки лент urls для передачи между шардом и координатором:
+        {url: состояние или None}. Свежайшие даты цикла вступают в силу,
+        как при сохранении.
+        """
+        self._apply_newest(urls)
+        return {url: self.feeds.get(url) for url in urls}
+
+    def merge(self, feeds):
+        """Принимает водяные знаки лент от шарда (результат export)."""
+        for url, state in feeds.items():
+            if state is None:
+                self.feeds.pop(url, None)
+            else:
+                self.feeds[url] = state
+            self._dirty = True
+
+    def save(self):
+        """Атомарно записывает водяные знаки на диск."""
+        if not self._dirty:
+            return
+        self._apply_newest(list(self._newest))
+        for state in self.feeds.values():
+            if len(state["ids"]) > self.max_ids:
+                self._trim(state["ids"])
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.feeds, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False